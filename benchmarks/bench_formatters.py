@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк форматирования записей eve.json
+
+Сравнивает реестр форматтеров LogConverter и быстрый разбор времени с
+прежней цепочкой if/elif (скопирована ниже как эталон) и проверяет, что
+вывод совпадает.
+
+Запуск: python benchmarks/bench_formatters.py [количество записей]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.log_converter import LogConverter
+from services.eve_formatters import FORMATTERS, format_generic
+from services.eve_timestamp import format_timestamp, format_timestamp_slow
+
+EVENT_TYPES = ['alert', 'http', 'dns', 'tls', 'fileinfo', 'flow', 'stats', 'ssh']
+
+def make_entries(count: int) -> list:
+    """Синтетические записи eve.json всех основных типов"""
+    entries = []
+    for i in range(count):
+        event_type = EVENT_TYPES[i % len(EVENT_TYPES)]
+        entries.append({
+            "timestamp": f"2024-01-15T10:30:{i // 1000 % 60:02d}.{i % 1000000:06d}+0000",
+            "event_type": event_type,
+            "src_ip": f"10.0.0.{i % 255}", "src_port": 1024 + i % 60000,
+            "dest_ip": "192.168.1.1", "dest_port": 443, "proto": "TCP",
+            "alert": {"signature": "ET POLICY Test", "category": "Misc", "severity": 2},
+            "http": {"hostname": "example.com", "http_method": "GET", "url": "/", "status": 200, "length": 512},
+            "dns": {"rrname": "example.com", "rrtype": "1", "rcode": "NOERROR"},
+            "tls": {"sni": "example.com", "subject": "CN=example.com", "version": "TLS 1.3"},
+            "fileinfo": {"filename": "/a.exe", "size": 1024, "magic": "PE32"},
+            "flow": {"state": "closed", "reason": "timeout"},
+            "stats": {"uptime": 100, "capture": {"kernel_packets": 123456, "kernel_drops": 1},
+                      "detect": {"alert": 5}},
+        })
+    return entries
+
+class LegacyFormatter:
+    """Прежняя реализация форматирования (цепочка if/elif)"""
+    
+    def format_entry_as_text(self, entry):
+        """Форматирует запись eve.json в читаемый текст"""
+        
+        # Базовые поля
+        timestamp = entry.get('timestamp', '')
+        event_type = entry.get('event_type', 'unknown')
+        
+        # Форматируем timestamp
+        try:
+            if timestamp:
+                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                formatted_time = dt.strftime('%d/%m/%Y-%H:%M:%S.%f')[:-3]
+            else:
+                formatted_time = 'unknown time'
+        except:
+            formatted_time = timestamp
+        
+        return self.dispatch(entry, formatted_time)
+
+    def dispatch(self, entry, formatted_time):
+        """Выбор форматтера цепочкой if/elif"""
+        event_type = entry.get('event_type', 'unknown')
+        if event_type == 'alert':
+            return self.format_alert_text(entry, formatted_time)
+        elif event_type == 'http':
+            return self.format_http_text(entry, formatted_time)
+        elif event_type == 'dns':
+            return self.format_dns_text(entry, formatted_time)
+        elif event_type == 'tls':
+            return self.format_tls_text(entry, formatted_time)
+        elif event_type == 'fileinfo':
+            return self.format_fileinfo_text(entry, formatted_time)
+        elif event_type == 'flow':
+            return self.format_flow_text(entry, formatted_time)
+        elif event_type == 'stats':
+            return self.format_stats_text(entry, formatted_time)
+        else:
+            return self.format_generic_text(entry, formatted_time)
+
+    def format_alert_text(self, entry, timestamp):
+        """Форматирует алерт"""
+        alert = entry.get('alert', {})
+        signature = alert.get('signature', 'Unknown alert')
+        category = alert.get('category', '')
+        severity = alert.get('severity', 3)
+        
+        src_ip = entry.get('src_ip', 'unknown')
+        src_port = entry.get('src_port', '')
+        dest_ip = entry.get('dest_ip', 'unknown')
+        dest_port = entry.get('dest_port', '')
+        proto = entry.get('proto', '').upper()
+        
+        lines = [
+            f"[ALERT {timestamp}]",
+            f"Сигнатура: {signature}",
+            f"От: {src_ip}:{src_port} -> К: {dest_ip}:{dest_port}",
+            f"Протокол: {proto} | Категория: {category} | Важность: {severity}"
+        ]
+        
+        return '\n'.join(lines)
+
+    def format_http_text(self, entry, timestamp):
+        """Форматирует HTTP события"""
+        http = entry.get('http', {})
+        hostname = http.get('hostname', 'unknown host')
+        method = http.get('http_method', 'unknown method')
+        url = http.get('url', '/')
+        status = http.get('status', 'unknown status')
+        length = http.get('length', 0)
+        
+        src_ip = entry.get('src_ip', 'unknown')
+        
+        lines = [
+            f"[HTTP {timestamp}]",
+            f"Запрос: {method} {hostname}{url}",
+            f"Статус: {status} | Размер: {length} байт",
+            f"Источник: {src_ip}"
+        ]
+        
+        return '\n'.join(lines)
+
+    def format_dns_text(self, entry, timestamp):
+        """Форматирует DNS события"""
+        dns = entry.get('dns', {})
+        query = dns.get('rrname', 'unknown query')
+        query_type = dns.get('rrtype', 'unknown type')
+        rcode = dns.get('rcode', 'UNKNOWN')
+        
+        src_ip = entry.get('src_ip', 'unknown')
+        
+        # Преобразуем тип запроса в читаемый вид
+        type_map = {
+            '1': 'A', '2': 'NS', '5': 'CNAME', '6': 'SOA', 
+            '12': 'PTR', '15': 'MX', '16': 'TXT', '28': 'AAAA'
+        }
+        query_type_str = type_map.get(str(query_type), str(query_type))
+        
+        lines = [
+            f"[DNS {timestamp}]",
+            f"Запрос: {query_type_str} для {query}",
+            f"Код ответа: {rcode}",
+            f"Клиент: {src_ip}"
+        ]
+        
+        return '\n'.join(lines)
+
+    def format_tls_text(self, entry, timestamp):
+        """Форматирует TLS события"""
+        tls = entry.get('tls', {})
+        sni = tls.get('sni', '')
+        subject = tls.get('subject', '')
+        version = tls.get('version', '')
+        
+        src_ip = entry.get('src_ip', 'unknown')
+        dest_ip = entry.get('dest_ip', 'unknown')
+        
+        lines = [
+            f"[TLS {timestamp}]",
+            f"SNI: {sni}",
+            f"Сертификат: {subject}",
+            f"Клиент: {src_ip} -> Сервер: {dest_ip}"
+        ]
+        
+        if version:
+            lines.append(f"Версия TLS: {version}")
+        
+        return '\n'.join(lines)
+
+    def format_fileinfo_text(self, entry, timestamp):
+        """Форматирует информацию о файлах"""
+        fileinfo = entry.get('fileinfo', {})
+        filename = fileinfo.get('filename', 'unknown')
+        size = fileinfo.get('size', 0)
+        file_type = fileinfo.get('magic', 'unknown type')
+        
+        src_ip = entry.get('src_ip', 'unknown')
+        dest_ip = entry.get('dest_ip', 'unknown')
+        
+        lines = [
+            f"[FILE {timestamp}]",
+            f"Файл: {filename}",
+            f"Размер: {size} байт | Тип: {file_type}",
+            f"Передача: {src_ip} -> {dest_ip}"
+        ]
+        
+        return '\n'.join(lines)
+
+    def format_flow_text(self, entry, timestamp):
+        """Форматирует flow события"""
+        flow = entry.get('flow', {})
+        
+        src_ip = entry.get('src_ip', 'unknown')
+        src_port = entry.get('src_port', '')
+        dest_ip = entry.get('dest_ip', 'unknown')
+        dest_port = entry.get('dest_port', '')
+        proto = entry.get('proto', '').upper()
+        
+        lines = [
+            f"[FLOW {timestamp}]",
+            f"Поток: {src_ip}:{src_port} -> {dest_ip}:{dest_port}",
+            f"Протокол: {proto}"
+        ]
+        
+        # Добавляем информацию о состоянии потока
+        if flow:
+            state = flow.get('state', '')
+            reason = flow.get('reason', '')
+            if state:
+                lines.append(f"Состояние: {state}")
+            if reason:
+                lines.append(f"Причина завершения: {reason}")
+        
+        return '\n'.join(lines)
+
+    def format_stats_text(self, entry, timestamp):
+        """Форматирует статистику"""
+        stats = entry.get('stats', {})
+        
+        lines = [f"[STATS {timestamp}]"]
+        
+        # Основная статистика
+        if 'uptime' in stats:
+            lines.append(f"Время работы: {stats['uptime']} сек")
+        
+        # Статистика захвата
+        capture = stats.get('capture', {})
+        if capture:
+            kernel_packets = capture.get('kernel_packets', 0)
+            kernel_drops = capture.get('kernel_drops', 0)
+            errors = capture.get('errors', 0)
+            
+            lines.append(f"Пакеты: {kernel_packets:,} | Потери: {kernel_drops} | Ошибки: {errors}")
+        
+        # Статистика детекта
+        detect = stats.get('detect', {})
+        if detect:
+            alerts = detect.get('alert', 0)
+            lines.append(f"Обнаружено алертов: {alerts}")
+        
+        return '\n'.join(lines)
+
+    def format_generic_text(self, entry, timestamp):
+        """Форматирует неизвестные типы событий"""
+        event_type = entry.get('event_type', 'unknown')
+        
+        lines = [f"[{event_type.upper()} {timestamp}]"]
+        
+        # Добавляем основные поля, которые есть в большинстве событий
+        src_ip = entry.get('src_ip')
+        dest_ip = entry.get('dest_ip')
+        
+        if src_ip and dest_ip:
+            lines.append(f"От: {src_ip} -> К: {dest_ip}")
+        
+        # Для неизвестных типов просто показываем тип события
+        lines.append(f"Тип события: {event_type}")
+        
+        return '\n'.join(lines)
+
+def bench(func, entries: list) -> float:
+    """Время форматирования одной записи в микросекундах"""
+    start = time.perf_counter()
+    for entry in entries:
+        func(entry)
+    return (time.perf_counter() - start) / len(entries) * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    entries = make_entries(count)
+    legacy = LegacyFormatter()
+    converter = LogConverter()
+    
+    for entry in entries[:len(EVENT_TYPES) * 10]:
+        assert legacy.format_entry_as_text(entry) == converter.format_entry_as_text(entry), entry['event_type']
+    
+    # Только выбор форматтера и форматирование, время уже отформатировано
+    formatted_time = '15/01/2024-10:30:00.000'
+    legacy_us = bench(lambda entry: legacy.dispatch(entry, formatted_time), entries)
+    registry_us = bench(
+        lambda entry: FORMATTERS.get(entry.get('event_type', 'unknown'), format_generic)(entry, formatted_time),
+        entries
+    )
+    
+    # Полный путь format_entry_as_text вместе с разбором времени
+    legacy_full_us = bench(legacy.format_entry_as_text, entries)
+    registry_full_us = bench(converter.format_entry_as_text, entries)
+    
+    print(f"Записей: {count}")
+    print("Форматирование (без разбора времени):")
+    print(f"  if/elif цепочка:    {legacy_us:.2f} мкс/запись")
+    print(f"  реестр форматтеров: {registry_us:.2f} мкс/запись")
+    print(f"  ускорение:          {legacy_us / registry_us:.2f}x")
+    print("Разбор времени:")
+    slow_us = bench(lambda entry: format_timestamp_slow(entry['timestamp']), entries)
+    fast_us = bench(lambda entry: format_timestamp(entry['timestamp']), entries)
+    print(f"  datetime.fromisoformat: {slow_us:.2f} мкс/запись")
+    print(f"  кэш префиксов:          {fast_us:.2f} мкс/запись")
+    print(f"  ускорение:              {slow_us / fast_us:.2f}x")
+    print("format_entry_as_text целиком:")
+    print(f"  if/elif цепочка:    {legacy_full_us:.2f} мкс/запись")
+    print(f"  реестр форматтеров: {registry_full_us:.2f} мкс/запись")
+    print(f"  ускорение:          {legacy_full_us / registry_full_us:.2f}x")
+
+if __name__ == "__main__":
+    main()
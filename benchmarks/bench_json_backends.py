@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк JSON бэкендов для разбора строк eve.json
+
+Для каждого установленного бэкенда (orjson, msgspec, stdlib json)
+выводит скорость разбора в записях в секунду. Строки подаются как bytes,
+так же как их читает LogConverter.
+
+Запуск: python benchmarks/bench_json_backends.py [количество записей]
+"""
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.json_backend import available_backends, get_decoder
+
+def make_lines(count: int) -> list:
+    """Синтетические строки eve.json в виде bytes"""
+    lines = []
+    for i in range(count):
+        event = {
+            "timestamp": f"2024-01-15T10:30:{i // 1000 % 60:02d}.{i % 1000000:06d}+0000",
+            "flow_id": 1000000000000 + i,
+            "in_iface": "eth0",
+            "event_type": ["flow", "dns", "alert", "http"][i % 4],
+            "src_ip": f"10.0.{i // 255 % 255}.{i % 255}", "src_port": 1024 + i % 60000,
+            "dest_ip": "192.168.1.1", "dest_port": 443, "proto": "TCP",
+            "flow": {"pkts_toserver": i % 100, "pkts_toclient": i % 50, "bytes_toserver": i * 10,
+                     "bytes_toclient": i * 5, "start": "2024-01-15T10:30:00.000000+0000",
+                     "end": "2024-01-15T10:30:05.000000+0000", "age": 5, "state": "closed",
+                     "reason": "timeout", "alerted": False},
+        }
+        lines.append(json.dumps(event).encode('utf-8'))
+    return lines
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    lines = make_lines(count)
+    
+    print(f"Записей: {count}, по умолчанию используется: {get_decoder().name}")
+    for name in available_backends():
+        loads = get_decoder(name).loads
+        start = time.perf_counter()
+        for line in lines:
+            loads(line)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<8} {count / elapsed:>12,.0f} записей/сек")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+import time
+import asyncio
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from .orchestrator import check_dependencies
+
+# Сколько последних строк stderr хранить для сообщения об ошибке
+TAIL_LINES = 20
+# Предел длины строки вывода (apt и скрипты сборки печатают длинные строки)
+LINE_LIMIT = 1024 * 1024
+
+class Step:
+    """Шаг выполнения: команда с собственным сроком и зависимостями"""
+
+    def __init__(self, name: str, cmd: Sequence[str], cwd: Optional[str] = None,
+                 timeout: Optional[float] = None, depends_on: Iterable[str] = (),
+                 description: Optional[str] = None):
+        self.name = name
+        self.cmd = list(cmd)
+        self.cwd = cwd
+        self.timeout = timeout
+        self.depends_on = tuple(depends_on)
+        self.description = description or name
+
+class StepResult:
+    """Результат шага: код возврата, время выполнения и хвост stderr"""
+
+    def __init__(self, step: Step):
+        self.name = step.name
+        self.description = step.description
+        self.returncode: Optional[int] = None
+        self.duration = 0.0
+        self.timed_out = False
+        self.skipped = False
+        self.error: Optional[str] = None
+        self.lines = 0
+        self.stderr_tail = deque(maxlen=TAIL_LINES)
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not (self.timed_out or self.skipped or self.error)
+
+    @property
+    def stderr(self) -> str:
+        return '\n'.join(self.stderr_tail)
+
+    def __repr__(self):
+        return f"StepResult({self.name!r}, returncode={self.returncode}, duration={self.duration:.2f})"
+
+class CommandRunner:
+    """
+    Выполнение команд с построчной передачей вывода
+
+    Шаги запускаются через asyncio: stdout и stderr читаются построчно и
+    сразу передаются в output_callback, в памяти остается только хвост
+    stderr. Шаг без зависимостей не ждет остальных - независимые шаги
+    выполняются одновременно. У каждого шага свой срок (Step.timeout),
+    у всего запуска - total_timeout; по истечении процесс получает SIGTERM,
+    затем SIGKILL. Время шагов накапливается в history для анализа
+    медленных установок.
+    """
+
+    def __init__(self, output_callback: Optional[Callable] = None,
+                 total_timeout: Optional[float] = None, kill_grace: float = 5.0):
+        self.output_callback = output_callback
+        self.total_timeout = total_timeout
+        self.kill_grace = kill_grace
+        self.history: List[StepResult] = []
+
+    def output(self, message: str):
+        """Передача строки вывода"""
+        if self.output_callback:
+            self.output_callback(message)
+
+    def run(self, steps: List[Step]) -> Dict[str, StepResult]:
+        """
+        Выполнение шагов (блокирует вызывающий поток)
+
+        Returns:
+            {имя шага: StepResult} в порядке steps
+
+        Raises:
+            ValueError: неизвестная зависимость или цикл
+        """
+        check_dependencies((step.name for step in steps),
+                           {step.name: step.depends_on for step in steps})
+        results = asyncio.run(self._run_all(steps))
+        self.history.extend(results.values())
+        return results
+
+    async def _run_all(self, steps: List[Step]) -> Dict[str, StepResult]:
+        results = {step.name: StepResult(step) for step in steps}
+        finished = {step.name: asyncio.Event() for step in steps}
+
+        async def run_one(step: Step):
+            result = results[step.name]
+            try:
+                for dependency in step.depends_on:
+                    await finished[dependency].wait()
+                failed = [dep for dep in step.depends_on if not results[dep].ok]
+                if failed:
+                    result.skipped = True
+                    return
+                await self._run_step(step, result)
+            finally:
+                finished[step.name].set()
+
+        tasks = [asyncio.ensure_future(run_one(step)) for step in steps]
+        try:
+            await asyncio.wait_for(asyncio.gather(*tasks), self.total_timeout)
+        except asyncio.TimeoutError:
+            self.output(f"❌ Истек общий срок выполнения ({self.total_timeout} сек)")
+            for result in results.values():
+                if result.returncode is None and not (result.timed_out or result.error):
+                    # Не начатые шаги пропущены
+                    result.skipped = True
+        return results
+
+    async def _run_step(self, step: Step, result: StepResult):
+        started = time.monotonic()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *step.cmd, cwd=step.cwd,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                limit=LINE_LIMIT)
+        except OSError as e:
+            result.error = str(e)
+            return
+
+        try:
+            await asyncio.wait_for(asyncio.gather(
+                self._pump(process.stdout, step, result, False),
+                self._pump(process.stderr, step, result, True),
+                process.wait()), step.timeout)
+            result.returncode = process.returncode
+        except asyncio.TimeoutError:
+            result.timed_out = True
+            await self._terminate(process)
+        except asyncio.CancelledError:
+            # Истек общий срок
+            result.timed_out = True
+            await self._terminate(process)
+            raise
+        finally:
+            result.duration = time.monotonic() - started
+            self.output(f"⏱ {step.description}: {result.duration:.1f} сек")
+
+    async def _pump(self, stream: asyncio.StreamReader, step: Step, result: StepResult, is_stderr: bool):
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                # Строка длиннее LINE_LIMIT - пропускаем ее остаток
+                continue
+            if not line:
+                break
+            text = line.decode(errors='replace').rstrip('\r\n')
+            result.lines += 1
+            if is_stderr:
+                result.stderr_tail.append(text)
+            self.output(f"[{step.name}] {text}")
+
+    async def _terminate(self, process):
+        """SIGTERM, по истечении kill_grace - SIGKILL"""
+        try:
+            if process.returncode is not None:
+                return
+            # sudo передает SIGTERM запущенной команде
+            process.terminate()
+            await asyncio.wait_for(process.wait(), self.kill_grace)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+        finally:
+            # Чтение вывода прервано, каналы не дочитаны до EOF - транспорт
+            # закрываем сами, иначе он закроется уже после остановки цикла
+            transport = getattr(process, '_transport', None)
+            if transport is not None:
+                transport.close()
@@ -2,9 +2,48 @@
 import subprocess
 import os
 import json
-import time
+import shutil
 from pathlib import Path
 import psutil
+from .process_inventory import ProcessInventory
+from .service_state import ServiceStateCache
+from .orchestrator import Orchestrator
+from .command_runner import CommandRunner, Step
+from .readiness import (wait_until, pids_gone, pidfile_alive, existing, file_opened_by,
+                        suricata_socket_responds, clamd_responds,
+                        SURICATA_SOCKETS, SURICATA_PIDFILES, EVE_JSON, CLAMD_SOCKETS)
+
+# Имена процессов систем (целиком, см. ProcessInventory)
+SYSTEM_PROCESSES = {
+    'suricata': ('suricata', 'Suricata-Main'),
+    'clamav': ('clamd', 'freshclam'),
+}
+
+# Службы systemd систем
+SYSTEM_UNITS = {
+    'suricata': ('suricata',),
+    'clamav': ('clamav-daemon', 'clamav-freshclam'),
+}
+
+# Порядок операций между системами: {операция: {система: системы, которые
+# должны завершиться раньше}}. Сейчас Suricata и ClamAV независимы.
+SYSTEM_DEPENDENCIES = {
+    'start': {},
+    'stop': {},
+    'update': {},
+}
+
+# Сроки ожидания готовности и завершения (секунды); возврат - сразу по достижении
+SURICATA_START_TIMEOUT = 15
+# clamd загружает базы сигнатур до ответа на PING
+CLAMD_START_TIMEOUT = 60
+STOP_TIMEOUT = 10
+KILL_TIMEOUT = 5
+# Срок обновления правил и баз (suricata-update, freshclam)
+UPDATE_TIMEOUT = 600
+# Сроки шага установки и всей полной установки
+INSTALL_STEP_TIMEOUT = 300
+INSTALL_TOTAL_TIMEOUT = 1800
 
 class SecuritySystemLogic:
     def __init__(self):
@@ -15,6 +54,13 @@ class SecuritySystemLogic:
         # Пути к скриптам
         self.scripts_dir = "/home/freem/CURSACH/CurrentCursach/scripts_suricata"
         self.clamav_scripts_dir = "/home/freem/CURSACH/CurrentCursach/scripts_clamav"
+        
+        # Один снимок таблицы процессов на обновление статуса
+        self.processes = ProcessInventory()
+        # Состояние всех служб одним вызовом systemctl show
+        self.services = ServiceStateCache(unit for units in SYSTEM_UNITS.values() for unit in units)
+        # Время выполненных шагов установки (для анализа медленных установок)
+        self.step_history = []
     
     def load_config(self):
         """Загрузка конфигурации"""
@@ -31,89 +77,80 @@ class SecuritySystemLogic:
     
     # === ОСНОВНЫЕ ФУНКЦИИ УСТАНОВКИ ===
     
-    def install_system(self, system):
+    def install_system(self, system, output_callback=None):
         """Установка системы"""
         if system == 'suricata':
-            return self.run_suricata_full_installation()
+            return self.run_suricata_full_installation(output_callback)
         elif system == 'clamav':
-            return self.run_clamav_full_installation()
+            return self.run_clamav_full_installation(output_callback)
         else:
             return f"❌ Система {system} не поддерживается"
     
-    def run_suricata_full_installation(self):
-        """Полная установка Suricata через три скрипта"""
-        scripts = [
-            ('install_dependencies.sh', "Установка зависимостей"),
-            ('install_suricata.sh', "Установка Suricata"), 
-            ('setting_system_suricata.py', "Настройка Suricata")
-        ]
+    def run_steps(self, steps, output_callback=None, total_timeout=None):
+        """
+        Выполнение шагов установки с построчной передачей вывода в output_callback
         
-        for script_name, description in scripts:
-            script_path = os.path.join(self.scripts_dir, script_name)
-            
-            try:
-                if script_name.endswith('.py'):
-                    cmd = ['sudo', 'python', script_path, '--no-update']
-                else:
-                    cmd = ['sudo', 'bash', script_path]
-                
-                result = subprocess.run(
-                    cmd,
-                    cwd=self.scripts_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
-                
-                if result.returncode != 0:
-                    return f"❌ Ошибка в {description}: {result.stderr}"
-                    
-                time.sleep(2)
-                
-            except subprocess.TimeoutExpired:
-                return f"❌ Таймаут в {description}"
-            except Exception as e:
-                return f"❌ Исключение в {description}: {str(e)}"
+        Время шагов сохраняется в step_history.
+        """
+        runner = CommandRunner(output_callback, total_timeout)
+        results = runner.run(steps)
+        self.step_history.extend(runner.history)
+        return results
+    
+    def run_full_installation(self, steps, success_message, output_callback=None):
+        """Полная установка: шаги выполняются цепочкой, до первой ошибки"""
+        try:
+            results = self.run_steps(steps, output_callback, INSTALL_TOTAL_TIMEOUT)
+        except Exception as e:
+            return f"❌ Исключение: {str(e)}"
+        
+        for result in results.values():
+            if result.error:
+                return f"❌ Исключение в {result.description}: {result.error}"
+            if result.timed_out:
+                return f"❌ Таймаут в {result.description}"
+            if not result.ok:
+                return f"❌ Ошибка в {result.description}: {result.stderr}"
         
-        return "✅ Suricata полностью установлена и настроена"
+        return success_message
     
-    def run_clamav_full_installation(self):
+    def run_suricata_full_installation(self, output_callback=None):
+        """Полная установка Suricata через три скрипта"""
+        # Шаги зависят друг от друга (и используют общую блокировку apt/dpkg)
+        steps = [
+            Step('dependencies', ['sudo', 'bash', os.path.join(self.scripts_dir, 'install_dependencies.sh')],
+                 self.scripts_dir, INSTALL_STEP_TIMEOUT, description="Установка зависимостей"),
+            Step('install', ['sudo', 'bash', os.path.join(self.scripts_dir, 'install_suricata.sh')],
+                 self.scripts_dir, INSTALL_STEP_TIMEOUT, depends_on=['dependencies'],
+                 description="Установка Suricata"),
+            Step('configure', ['sudo', 'python', os.path.join(self.scripts_dir, 'setting_system_suricata.py'), '--no-update'],
+                 self.scripts_dir, INSTALL_STEP_TIMEOUT, depends_on=['install'],
+                 description="Настройка Suricata"),
+        ]
+        return self.run_full_installation(steps, "✅ Suricata полностью установлена и настроена", output_callback)
+    
+    def run_clamav_full_installation(self, output_callback=None):
         """Полная установка ClamAV"""
-        scripts = [
-            ('clamav_install.sh', "Установка ClamAV"),
-            ('clamav_configurate.sh', "Настройка ClamAV"),
-            ('clamav_start.sh', "Запуск ClamAV")
+        steps = [
+            Step('install', ['sudo', 'bash', os.path.join(self.clamav_scripts_dir, 'clamav_install.sh')],
+                 self.clamav_scripts_dir, INSTALL_STEP_TIMEOUT, description="Установка ClamAV"),
+            Step('configure', ['sudo', 'bash', os.path.join(self.clamav_scripts_dir, 'clamav_configurate.sh')],
+                 self.clamav_scripts_dir, INSTALL_STEP_TIMEOUT, depends_on=['install'],
+                 description="Настройка ClamAV"),
+            Step('start', ['sudo', 'bash', os.path.join(self.clamav_scripts_dir, 'clamav_start.sh')],
+                 self.clamav_scripts_dir, INSTALL_STEP_TIMEOUT, depends_on=['configure'],
+                 description="Запуск ClamAV"),
         ]
-        
-        for script_name, description in scripts:
-            script_path = os.path.join(self.clamav_scripts_dir, script_name)
-            
-            try:
-                cmd = ['sudo', 'bash', script_path]
-                
-                result = subprocess.run(
-                    cmd,
-                    cwd=self.clamav_scripts_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
-                
-                if result.returncode != 0:
-                    return f"❌ Ошибка в {description}: {result.stderr}"
-                    
-                time.sleep(2)
-                
-            except subprocess.TimeoutExpired:
-                return f"❌ Таймаут в {description}"
-            except Exception as e:
-                return f"❌ Исключение в {description}: {str(e)}"
-        
-        return "✅ ClamAV полностью установлен и настроен"
+        return self.run_full_installation(steps, "✅ ClamAV полностью установлен и настроен", output_callback)
     
     # === ОТДЕЛЬНЫЕ ФУНКЦИИ ДЛЯ SURICATA И CLAMAV ===
     
-    def install_dependencies(self, system):
+    def run_script(self, cmd, cwd, description, output_callback=None, timeout=INSTALL_STEP_TIMEOUT):
+        """Выполнение одного скрипта с построчным выводом и сроком timeout; возвращает StepResult"""
+        step = Step('script', cmd, cwd, timeout, description=description)
+        return self.run_steps([step], output_callback)['script']
+    
+    def install_dependencies(self, system, output_callback=None):
         """Установка зависимостей для выбранной системы"""
         if system == 'suricata':
             script_path = os.path.join(self.scripts_dir, 'install_dependencies.sh')
@@ -126,14 +163,13 @@ class SecuritySystemLogic:
             return "❌ Система не поддерживается"
         
         try:
-            result = subprocess.run(
-                cmd,
-                cwd=self.scripts_dir,
-                capture_output=True,
-                text=True
-            )
+            result = self.run_script(cmd, self.scripts_dir, f"Установка {description}", output_callback)
             
-            if result.returncode == 0:
+            if result.error:
+                return f"❌ Исключение: {result.error}"
+            if result.timed_out:
+                return f"❌ Таймаут в {result.description}"
+            if result.ok:
                 return f"✅ Зависимости {system} установлены успешно"
             else:
                 return f"❌ Ошибка установки {description}: {result.stderr}"
@@ -141,7 +177,7 @@ class SecuritySystemLogic:
         except Exception as e:
             return f"❌ Исключение: {str(e)}"
     
-    def install_security_system(self, system):
+    def install_security_system(self, system, output_callback=None):
         """Установка выбранной системы безопасности"""
         if system == 'suricata':
             script_path = os.path.join(self.scripts_dir, 'install_suricata.sh')
@@ -155,14 +191,14 @@ class SecuritySystemLogic:
             return "❌ Система не поддерживается"
         
         try:
-            result = subprocess.run(
-                cmd,
-                cwd=self.scripts_dir if system == 'suricata' else self.clamav_scripts_dir,
-                capture_output=True,
-                text=True
-            )
+            result = self.run_script(cmd, self.scripts_dir if system == 'suricata' else self.clamav_scripts_dir,
+                                     f"Установка {description}", output_callback)
             
-            if result.returncode == 0:
+            if result.error:
+                return f"❌ Исключение: {result.error}"
+            if result.timed_out:
+                return f"❌ Таймаут в {result.description}"
+            if result.ok:
                 return f"✅ {description} установлена успешно"
             else:
                 return f"❌ Ошибка установки {description}: {result.stderr}"
@@ -170,7 +206,7 @@ class SecuritySystemLogic:
         except Exception as e:
             return f"❌ Исключение: {str(e)}"
     
-    def configure_system(self, system):
+    def configure_system(self, system, output_callback=None):
         """Настройка выбранной системы"""
         if system == 'suricata':
             script_path = os.path.join(self.scripts_dir, 'setting_system_suricata.py')
@@ -184,14 +220,14 @@ class SecuritySystemLogic:
             return "❌ Система не поддерживается"
         
         try:
-            result = subprocess.run(
-                cmd,
-                cwd=self.scripts_dir if system == 'suricata' else self.clamav_scripts_dir,
-                capture_output=True,
-                text=True
-            )
+            result = self.run_script(cmd, self.scripts_dir if system == 'suricata' else self.clamav_scripts_dir,
+                                     f"Настройка {description}", output_callback)
             
-            if result.returncode == 0:
+            if result.error:
+                return f"❌ Исключение: {result.error}"
+            if result.timed_out:
+                return f"❌ Таймаут в {result.description}"
+            if result.ok:
                 return f"✅ {description} настроена успешно"
             else:
                 return f"❌ Ошибка настройки {description}: {result.stderr}"
@@ -204,42 +240,10 @@ class SecuritySystemLogic:
     def is_system_running(self, system):
         """Проверка запущена ли система"""
         try:
-            if system == 'suricata':
-                # Проверяем через systemctl
-                result = subprocess.run(
-                    ['systemctl', 'is-active', 'suricata'],
-                    capture_output=True,
-                    text=True
-                )
-                
-                # Проверяем через ps aux
-                ps_result = subprocess.run(['ps', 'aux'], capture_output=True, text=True)
-                
-                systemctl_running = result.returncode == 0
-                process_running = 'suricata' in ps_result.stdout and 'grep' not in ps_result.stdout
-                
-                return systemctl_running or process_running
-                
-            elif system == 'clamav':
-                # Проверяем службы ClamAV
-                services = ['clamav-daemon', 'clamav-freshclam']
-                for service in services:
-                    result = subprocess.run(
-                        ['systemctl', 'is-active', service],
-                        capture_output=True,
-                        text=True
-                    )
-                    if result.returncode == 0:
-                        return True
-                
-                # Проверяем процессы
-                ps_result = subprocess.run(['ps', 'aux'], capture_output=True, text=True)
-                clamav_processes = ['clamd', 'freshclam']
-                for process in clamav_processes:
-                    if process in ps_result.stdout and 'grep' not in ps_result.stdout:
-                        return True
-                
-                return False
+            if system in SYSTEM_UNITS:
+                # Проверяем службы, затем процессы
+                return self.services.is_active(*SYSTEM_UNITS[system]) or \
+                    self.processes.is_running(*SYSTEM_PROCESSES[system])
             
         except Exception as e:
             print(f"Ошибка проверки {system}: {e}")
@@ -257,8 +261,8 @@ class SecuritySystemLogic:
     def start_suricata(self):
         """Запуск Suricata"""
         if self.is_system_running('suricata'):
+            # Возвращается после завершения процессов
             self.stop_suricata()
-            time.sleep(3)
         
         try:
             result = subprocess.run(
@@ -266,10 +270,11 @@ class SecuritySystemLogic:
                 capture_output=True,
                 text=True
             )
+            self.services.invalidate()
             
-            time.sleep(3)
-            
-            if self.is_system_running('suricata'):
+            # Ждем готовности, только если служба запускается
+            timeout = SURICATA_START_TIMEOUT if result.returncode == 0 else 0
+            if wait_until(self.suricata_ready, timeout) or self.is_system_running('suricata'):
                 return "✅ Suricata запущена"
             else:
                 return self.start_suricata_direct()
@@ -280,18 +285,18 @@ class SecuritySystemLogic:
     def start_clamav(self):
         """Запуск ClamAV"""
         try:
-            # Запускаем основные службы ClamAV
-            services = ['clamav-daemon', 'clamav-freshclam']
-            for service in services:
-                result = subprocess.run(
-                    ['sudo', 'systemctl', 'start', service],
-                    capture_output=True,
-                    text=True
-                )
-            
-            time.sleep(3)
+            # Запускаем основные службы ClamAV одной командой
+            result = subprocess.run(
+                ['sudo', 'systemctl', 'start', *SYSTEM_UNITS['clamav']],
+                capture_output=True,
+                text=True
+            )
+            self.services.invalidate()
             
-            if self.is_system_running('clamav'):
+            timeout = CLAMD_START_TIMEOUT if result.returncode == 0 else 0
+            # Упавшая служба clamd не ответит на PING - не ждем весь срок
+            wait_until(lambda: self.clamav_ready() or self.clamav_failed(), timeout)
+            if not self.clamav_failed() and (self.clamav_ready() or self.is_system_running('clamav')):
                 return "✅ ClamAV запущен"
             else:
                 # Пробуем прямой запуск
@@ -310,6 +315,41 @@ class SecuritySystemLogic:
         except Exception as e:
             return f"❌ Исключение при запуске ClamAV: {e}"
 
+    def suricata_ready(self):
+        """Suricata готова: отвечает командный сокет или открыт eve.json"""
+        pids = self.processes.pids(*SYSTEM_PROCESSES['suricata'], refresh=True)
+        if not pids:
+            return False
+        command_socket = existing(SURICATA_SOCKETS)
+        if command_socket and suricata_socket_responds(command_socket):
+            return True
+        opened = file_opened_by(EVE_JSON, pids)
+        if opened is not None:
+            return opened
+        # Дескрипторы чужих процессов недоступны без root - достаточно pid-файла
+        return any(pidfile_alive(path) for path in SURICATA_PIDFILES)
+    
+    def clamav_ready(self):
+        """clamd отвечает на PING (без clamd - запущены службы или процессы ClamAV)"""
+        if not shutil.which('clamd'):
+            return self.is_system_running('clamav')
+        clamd_socket = existing(CLAMD_SOCKETS)
+        if clamd_socket:
+            return clamd_responds(clamd_socket)
+        return self.processes.is_running('clamd', refresh=True)
+    
+    def clamav_failed(self):
+        """Служба clamd завершилась с ошибкой (systemd ActiveState=failed)"""
+        return self.services.get('clamav-daemon').get('ActiveState') == 'failed'
+    
+    def wait_stopped(self, system, timeout):
+        """Ожидание завершения процессов системы; возвращает оставшиеся PID"""
+        pids = self.get_process_pids(system)
+        if pids:
+            wait_until(lambda: pids_gone(pids), timeout)
+            pids = self.get_process_pids(system)
+        return pids
+    
     def start_suricata_direct(self):
         """Прямой запуск Suricata"""
         try:
@@ -348,8 +388,6 @@ class SecuritySystemLogic:
     
     def stop_suricata(self):
         """Остановка Suricata"""
-        pids_before = self.get_process_pids('suricata')
-        
         try:
             # 1. Останавливаем через systemctl
             result = subprocess.run(
@@ -357,32 +395,26 @@ class SecuritySystemLogic:
                 capture_output=True,
                 text=True
             )
-            time.sleep(2)
+            self.services.invalidate()
+            pids = self.wait_stopped('suricata', STOP_TIMEOUT)
             
-            # 2. Убиваем процессы
-            subprocess.run(['sudo', 'pkill', '-f', 'suricata'], capture_output=True, text=True)
-            time.sleep(1)
+            # 2. Завершаем оставшиеся процессы (только сами процессы Suricata,
+            # а не все, в командной строке которых встречается 'suricata')
+            if pids:
+                self.kill_processes(pids)
+                pids = self.wait_stopped('suricata', KILL_TIMEOUT)
             
             # 3. Убиваем процессы через kill -9
-            pids_after_pkill = self.get_process_pids('suricata')
-            if pids_after_pkill:
-                for pid in pids_after_pkill:
-                    try:
-                        subprocess.run(['sudo', 'kill', '-9', str(pid)], capture_output=True, text=True)
-                    except:
-                        pass
+            if pids:
+                self.kill_processes(pids, force=True)
+                pids = self.wait_stopped('suricata', KILL_TIMEOUT)
             
-            # 4. Дополнительная очистка
-            subprocess.run(['sudo', 'pkill', '-9', '-f', 'suricata'], capture_output=True, text=True)
-            
-            # 5. Удаляем pid файлы
-            pid_files = ["/var/run/suricata.pid", "/run/suricata.pid"]
-            for pid_file in pid_files:
+            # 4. Удаляем pid файлы
+            for pid_file in SURICATA_PIDFILES:
                 if os.path.exists(pid_file):
                     subprocess.run(['sudo', 'rm', '-f', pid_file])
             
-            time.sleep(2)
-            pids_final = self.get_process_pids('suricata')
+            pids_final = pids
             
             if not pids_final:
                 return "✅ Suricata полностью остановлена"
@@ -396,31 +428,19 @@ class SecuritySystemLogic:
         """Остановка ClamAV"""
         try:
             # Останавливаем службы
-            services = ['clamav-daemon', 'clamav-freshclam']
-            for service in services:
-                subprocess.run(['sudo', 'systemctl', 'stop', service], capture_output=True, text=True)
-            
-            time.sleep(2)
+            subprocess.run(['sudo', 'systemctl', 'stop', *SYSTEM_UNITS['clamav']], capture_output=True, text=True)
+            self.services.invalidate()
+            pids = self.wait_stopped('clamav', STOP_TIMEOUT)
             
             # Убиваем процессы
-            clamav_processes = ['clamd', 'freshclam']
-            for process in clamav_processes:
-                subprocess.run(['sudo', 'pkill', '-f', process], capture_output=True, text=True)
-                subprocess.run(['sudo', 'pkill', '-9', '-f', process], capture_output=True, text=True)
-            
-            # Убиваем процессы по PID
-            for process in clamav_processes:
-                pids = self.get_process_pids(process)
-                for pid in pids:
-                    try:
-                        subprocess.run(['sudo', 'kill', '-9', str(pid)], capture_output=True, text=True)
-                    except:
-                        pass
+            if pids:
+                self.kill_processes(pids)
+                pids = self.wait_stopped('clamav', KILL_TIMEOUT)
+            if pids:
+                self.kill_processes(pids, force=True)
+                pids = self.wait_stopped('clamav', KILL_TIMEOUT)
             
-            time.sleep(2)
-            pids_final = []
-            for process in clamav_processes:
-                pids_final.extend(self.get_process_pids(process))
+            pids_final = pids
             
             if not pids_final:
                 return "✅ ClamAV полностью остановлен"
@@ -442,13 +462,14 @@ class SecuritySystemLogic:
     def update_suricata_rules(self):
         """Обновление правил Suricata"""
         try:
-            result = subprocess.run(
-                ['sudo', 'suricata-update'],
-                capture_output=True,
-                text=True
-            )
+            result = self.run_script(['sudo', 'suricata-update'], None, "Обновление правил Suricata",
+                                     timeout=UPDATE_TIMEOUT)
             
-            if result.returncode == 0:
+            if result.error:
+                return f"❌ Исключение: {result.error}"
+            if result.timed_out:
+                return f"❌ Таймаут обновления правил Suricata ({UPDATE_TIMEOUT} сек)"
+            if result.ok:
                 return "✅ Правила Suricata обновлены"
             else:
                 return f"❌ Ошибка обновления правил: {result.stderr}"
@@ -459,13 +480,14 @@ class SecuritySystemLogic:
     def update_clamav_database(self):
         """Обновление базы данных ClamAV"""
         try:
-            result = subprocess.run(
-                ['sudo', 'freshclam'],
-                capture_output=True,
-                text=True
-            )
+            result = self.run_script(['sudo', 'freshclam'], None, "Обновление базы ClamAV",
+                                     timeout=UPDATE_TIMEOUT)
             
-            if result.returncode == 0:
+            if result.error:
+                return f"❌ Исключение: {result.error}"
+            if result.timed_out:
+                return f"❌ Таймаут обновления базы ClamAV ({UPDATE_TIMEOUT} сек)"
+            if result.ok:
                 return "✅ База данных ClamAV обновлена"
             else:
                 return f"❌ Ошибка обновления базы: {result.stderr}"
@@ -474,20 +496,26 @@ class SecuritySystemLogic:
             return f"❌ Исключение: {str(e)}"
     
     def get_process_pids(self, process_name):
-        """Получить все PID процессов по имени"""
+        """
+        Получить все PID процессов по имени
+        
+        process_name - имя системы (все ее процессы) или имя процесса;
+        снимок таблицы процессов обновляется.
+        """
+        names = SYSTEM_PROCESSES.get(process_name, (process_name,))
         try:
-            result = subprocess.run(
-                ['pgrep', '-f', process_name],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                pids = [pid.strip() for pid in result.stdout.split('\n') if pid.strip()]
-                return pids
-            return []
-        except:
+            return self.processes.pids(*names, refresh=True)
+        except Exception:
             return []
     
+    def kill_processes(self, pids, force=False):
+        """Завершение процессов по PID одной командой kill"""
+        if not pids:
+            return
+        cmd = ['sudo', 'kill'] + (['-9'] if force else []) + [str(pid) for pid in pids]
+        subprocess.run(cmd, capture_output=True, text=True)
+        self.processes.invalidate()
+    
     # === МОНИТОРИНГ И СТАТУС ===
     
     def check_system_status(self, system):
@@ -501,32 +529,16 @@ class SecuritySystemLogic:
             if system in services:
                 service_name = services[system]
                 
-                # Проверяем через systemctl
-                result = subprocess.run(
-                    ['systemctl', 'is-active', service_name],
-                    capture_output=True,
-                    text=True
-                )
-                
-                # Проверяем через ps aux
-                ps_result = subprocess.run(['ps', 'aux'], capture_output=True, text=True)
+                # Проверяем через systemctl (кэш) и таблицу процессов
+                service_running = self.services.is_active(service_name)
+                process_running = self.processes.is_running(*SYSTEM_PROCESSES[system])
                 
-                if system == 'clamav':
-                    process_running = any(proc in ps_result.stdout for proc in ['clamd', 'freshclam']) and 'grep' not in ps_result.stdout
-                else:
-                    process_running = system in ps_result.stdout and 'grep' not in ps_result.stdout
-                
-                if result.returncode == 0 or process_running:
+                if service_running or process_running:
                     return "✅ Активна (systemctl или процесс)"
                 else:
                     # Проверяем установлена ли система
-                    if system == 'clamav':
-                        check_cmd = ['which', 'clamscan']
-                    else:
-                        check_cmd = ['which', system]
-                    
-                    result = subprocess.run(check_cmd, capture_output=True)
-                    if result.returncode == 0:
+                    binary = 'clamscan' if system == 'clamav' else system
+                    if shutil.which(binary):
                         return "⚠️ Установлена, но не запущена"
                     else:
                         return "❌ Не установлена"
@@ -539,6 +551,9 @@ class SecuritySystemLogic:
     def get_system_status_info(self):
         """Получить информацию о статусе всех систем"""
         status_info = "=== СТАТУС СИСТЕМ ===\n\n"
+        # Все проверки ниже обслуживаются одним снимком процессов и одним опросом служб
+        self.processes.refresh()
+        self.services.refresh()
         
         systems = ['suricata', 'clamav']
         for system in systems:
@@ -568,3 +583,22 @@ class SecuritySystemLogic:
             return self.stop_clamav()
         else:
             return f"❌ Система {system} не поддерживается"
+    
+    def run_for_systems(self, operation, systems, log_callback=None):
+        """
+        Параллельное выполнение операции (start, stop или update) для систем
+        
+        Returns:
+            {система: OperationResult} с результатом и временем выполнения
+        """
+        actions = {
+            'start': self.start_service,
+            'stop': self.stop_service,
+            'update': self.update_system,
+        }
+        if operation not in actions:
+            raise ValueError(f"Неизвестная операция {operation}")
+        action = actions[operation]
+        operations = {system: (lambda system=system: action(system)) for system in systems}
+        orchestrator = Orchestrator(log_callback=log_callback)
+        return orchestrator.run(operations, SYSTEM_DEPENDENCIES.get(operation))
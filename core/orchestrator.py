@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Optional
+
+def check_dependencies(names: Iterable[str], depends_on: Dict[str, Iterable[str]]):
+    """
+    Проверка, что зависимости известны и не образуют цикл
+
+    Raises:
+        ValueError: неизвестная зависимость или цикл
+    """
+    names = set(names)
+    state: Dict[str, int] = {}
+
+    def visit(name: str, path: tuple):
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise ValueError(f"Циклическая зависимость: {' -> '.join(path + (name,))}")
+        state[name] = 1
+        for dependency in depends_on.get(name, ()):
+            if dependency not in names:
+                raise ValueError(f"{name} зависит от неизвестной операции {dependency}")
+            visit(dependency, path + (name,))
+        state[name] = 2
+
+    for name in names:
+        visit(name, ())
+
+class OperationResult:
+    """Результат операции над одной системой"""
+
+    def __init__(self, system: str, result: str, duration: float, skipped: bool = False):
+        self.system = system
+        self.result = result
+        self.duration = duration
+        self.skipped = skipped
+
+    @property
+    def ok(self) -> bool:
+        # Методы логики сообщают об ошибке строкой, начинающейся с ❌
+        return not self.skipped and not self.result.startswith('❌')
+
+    def __repr__(self):
+        return f"OperationResult({self.system!r}, {self.result!r}, {self.duration:.2f})"
+
+class Orchestrator:
+    """
+    Параллельное выполнение операций над несколькими системами
+
+    Операции выполняются в пуле потоков, поэтому общее время - максимум, а
+    не сумма времен систем. depends_on задает порядок: операция системы
+    начинается после завершения операций систем, от которых она зависит,
+    и пропускается, если одна из них завершилась ошибкой.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, log_callback: Optional[Callable] = None):
+        self.max_workers = max_workers
+        self.log_callback = log_callback
+
+    def log(self, message: str):
+        """Логирование сообщений"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def _timed(self, system: str, operation: Callable[[], str]) -> OperationResult:
+        started = time.monotonic()
+        try:
+            result = operation()
+        except Exception as e:
+            result = f"❌ Исключение: {e}"
+        result = result if isinstance(result, str) else str(result)
+        return OperationResult(system, result, time.monotonic() - started)
+
+    def run(self, operations: Dict[str, Callable[[], str]],
+            depends_on: Optional[Dict[str, Iterable[str]]] = None) -> Dict[str, OperationResult]:
+        """
+        Выполнение операций {система: функция}
+
+        Returns:
+            {система: OperationResult} в порядке operations
+
+        Raises:
+            ValueError: неизвестная зависимость или цикл
+        """
+        depends_on = {system: tuple(deps) for system, deps in (depends_on or {}).items()
+                      if system in operations}
+        check_dependencies(operations, depends_on)
+
+        results: Dict[str, OperationResult] = {}
+        waiting = dict(operations)
+        running = {}
+        workers = self.max_workers or max(1, len(operations))
+
+        with ThreadPoolExecutor(workers, thread_name_prefix='orchestrator') as executor:
+            while waiting or running:
+                for system in list(waiting):
+                    dependencies = depends_on.get(system, ())
+                    if any(dep not in results for dep in dependencies):
+                        continue
+                    operation = waiting.pop(system)
+                    failed = [dep for dep in dependencies if not results[dep].ok]
+                    if failed:
+                        results[system] = OperationResult(
+                            system, f"⏭ Пропущено: ошибка в {', '.join(failed)}", 0.0, skipped=True)
+                        continue
+                    running[executor.submit(self._timed, system, operation)] = system
+
+                if not running:
+                    # Все оставшиеся операции пропущены - пересчитываем ожидающие
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    system = running.pop(future)
+                    results[system] = future.result()
+                    self.log(f"{'✅' if results[system].ok else '❌'} {system}: "
+                             f"{results[system].duration:.1f} сек")
+
+        return {system: results[system] for system in operations}
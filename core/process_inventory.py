@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import os
+import time
+import threading
+from typing import Dict, List, Optional, Set
+import psutil
+
+class ProcessInventory:
+    """
+    Снимок таблицы процессов с индексом по имени
+
+    Один проход psutil.process_iter() на обновление вместо ps aux / pgrep
+    на каждую проверку. Процесс индексируется по имени (comm), имени
+    исполняемого файла и argv[0] - только целыми именами, поэтому
+    'tail -f /var/log/suricata/eve.json' или сам агент не считаются
+    процессом suricata, как при поиске подстроки в выводе ps aux.
+
+    Снимок переиспользуется max_age секунд: все проверки одного обновления
+    статуса обслуживаются одним снимком.
+    """
+
+    def __init__(self, max_age: float = 1.0):
+        self.max_age = max_age
+        self._index: Dict[str, Set[int]] = {}
+        self._taken_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.snapshots = 0
+
+    @staticmethod
+    def _names(info: dict) -> Set[str]:
+        names = set()
+        if info.get('name'):
+            names.add(info['name'])
+        if info.get('exe'):
+            names.add(os.path.basename(info['exe']))
+        cmdline = info.get('cmdline')
+        if cmdline and cmdline[0]:
+            names.add(os.path.basename(cmdline[0]))
+        return names
+
+    def refresh(self):
+        """Новый снимок таблицы процессов"""
+        index: Dict[str, Set[int]] = {}
+        own_pid = os.getpid()
+        for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline']):
+            info = proc.info
+            if info['pid'] == own_pid:
+                continue
+            for name in self._names(info):
+                index.setdefault(name, set()).add(info['pid'])
+        with self._lock:
+            self._index = index
+            self._taken_at = time.monotonic()
+            self.snapshots += 1
+
+    def invalidate(self):
+        """Сброс снимка (после запуска/остановки процессов)"""
+        with self._lock:
+            self._taken_at = None
+
+    def _current(self, refresh: bool) -> Dict[str, Set[int]]:
+        with self._lock:
+            stale = self._taken_at is None or time.monotonic() - self._taken_at > self.max_age
+        if refresh or stale:
+            self.refresh()
+        with self._lock:
+            return self._index
+
+    def pids(self, *names: str, refresh: bool = False) -> List[int]:
+        """PID процессов с любым из имен names"""
+        index = self._current(refresh)
+        pids: Set[int] = set()
+        for name in names:
+            pids |= index.get(name, set())
+        return sorted(pids)
+
+    def is_running(self, *names: str, refresh: bool = False) -> bool:
+        """Есть ли процесс с одним из имен names"""
+        return bool(self.pids(*names, refresh=refresh))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import socket
+from typing import Callable, Iterable, Optional
+import psutil
+
+# Командный сокет Suricata (unix-command) в разных версиях пакетов
+SURICATA_SOCKETS = ('/var/run/suricata/suricata-command.socket', '/var/run/suricata-command.socket')
+SURICATA_PIDFILES = ('/var/run/suricata.pid', '/run/suricata.pid')
+EVE_JSON = '/var/log/suricata/eve.json'
+# LocalSocket clamd (Debian/Ubuntu)
+CLAMD_SOCKETS = ('/var/run/clamav/clamd.ctl', '/run/clamav/clamd.ctl')
+
+def wait_until(predicate: Callable[[], bool], timeout: float,
+               interval: float = 0.05, max_interval: float = 0.5) -> bool:
+    """
+    Опрос predicate до успеха или истечения timeout секунд
+
+    Пауза между проверками растет от interval до max_interval. Проверка
+    выполняется хотя бы один раз (timeout=0 - одна проверка без ожидания).
+
+    Returns:
+        True - условие выполнено, False - истек срок
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if predicate():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+
+def pid_alive(pid: int) -> bool:
+    """Жив ли процесс (зомби считается завершенным)"""
+    try:
+        return psutil.Process(int(pid)).status() != psutil.STATUS_ZOMBIE
+    except (psutil.NoSuchProcess, ValueError):
+        return False
+    except psutil.AccessDenied:
+        return True
+
+def pids_gone(pids: Iterable[int]) -> bool:
+    """Завершены ли все процессы pids"""
+    return not any(pid_alive(pid) for pid in pids)
+
+def pidfile_alive(path: str) -> bool:
+    """pid-файл существует и указывает на живой процесс"""
+    try:
+        with open(path, 'r') as f:
+            return pid_alive(int(f.read().strip()))
+    except (OSError, ValueError):
+        return False
+
+def existing(paths: Iterable[str]) -> Optional[str]:
+    """Первый существующий путь из paths"""
+    for path in paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+def _unix_request(path: str, payload: bytes, timeout: float) -> bytes:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(payload)
+        return sock.recv(4096)
+
+def clamd_responds(path: str, timeout: float = 1.0) -> bool:
+    """clamd принимает соединения и отвечает PONG на PING"""
+    try:
+        return _unix_request(path, b'zPING\0', timeout).startswith(b'PONG')
+    except OSError:
+        return False
+
+def suricata_socket_responds(path: str, timeout: float = 1.0) -> bool:
+    """Командный сокет Suricata принимает соединения и подтверждает версию протокола"""
+    try:
+        reply = _unix_request(path, json.dumps({'version': '0.2'}).encode(), timeout)
+        return json.loads(reply.decode(errors='replace')).get('return') == 'OK'
+    except (OSError, ValueError):
+        return False
+
+def file_opened_by(path: str, pids: Iterable[int]) -> Optional[bool]:
+    """
+    Открыт ли файл path одним из процессов pids (по /proc/<pid>/fd)
+
+    Returns:
+        None - дескрипторы процессов недоступны (нет прав), проверить нельзя
+    """
+    target = os.path.realpath(path)
+    readable = False
+    for pid in pids:
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            # Нет прав или процесс уже завершился
+            continue
+        readable = True
+        for fd in fds:
+            try:
+                if os.readlink(os.path.join(fd_dir, fd)) == target:
+                    return True
+            except OSError:
+                continue
+    return False if readable else None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import time
+import threading
+import subprocess
+from typing import Dict, Iterable, Optional
+
+# Состояния, в которых systemctl is-active считает службу активной
+ACTIVE_STATES = ('active', 'reloading')
+
+# Свойства, запрашиваемые у systemd
+PROPERTIES = ('Id', 'LoadState', 'ActiveState', 'SubState', 'MainPID')
+
+class ServiceStateCache:
+    """
+    Кэш состояния служб systemd
+
+    Все отслеживаемые службы опрашиваются одним вызовом
+    systemctl show <службы> --property=... вместо systemctl is-active на
+    каждую службу. Ответ хранится ttl секунд; после собственных
+    start/stop вызывается invalidate().
+    """
+
+    def __init__(self, units: Iterable[str], ttl: float = 2.0):
+        self.units = list(units)
+        self.ttl = ttl
+        self._states: Dict[str, Dict[str, str]] = {}
+        self._taken_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.queries = 0
+
+    def refresh(self):
+        """Опрос всех служб одним вызовом systemctl show"""
+        states: Dict[str, Dict[str, str]] = {}
+        try:
+            result = subprocess.run(
+                ['systemctl', 'show', *self.units, f"--property={','.join(PROPERTIES)}"],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            output = result.stdout
+        except (OSError, subprocess.TimeoutExpired):
+            # Нет systemd - службы считаются неактивными
+            output = ''
+
+        # Блоки свойств разделены пустой строкой и идут в порядке аргументов
+        blocks = [block for block in output.strip().split('\n\n') if block.strip()]
+        for unit, block in zip(self.units, blocks):
+            properties = {}
+            for line in block.splitlines():
+                key, sep, value = line.partition('=')
+                if sep:
+                    properties[key] = value
+            states[unit] = properties
+
+        with self._lock:
+            self._states = states
+            self._taken_at = time.monotonic()
+            self.queries += 1
+
+    def invalidate(self):
+        """Сброс кэша (после запуска/остановки служб)"""
+        with self._lock:
+            self._taken_at = None
+
+    def get(self, unit: str) -> Dict[str, str]:
+        """Свойства службы (пустой словарь - нет данных)"""
+        with self._lock:
+            stale = self._taken_at is None or time.monotonic() - self._taken_at > self.ttl
+        if stale:
+            self.refresh()
+        with self._lock:
+            return dict(self._states.get(unit, {}))
+
+    def is_active(self, *units: str) -> bool:
+        """Активна ли хотя бы одна из служб units"""
+        return any(self.get(unit).get('ActiveState') in ACTIVE_STATES for unit in units)
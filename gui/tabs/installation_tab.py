@@ -97,7 +97,7 @@ class InstallationTab:
             for system in selected:
                 self.main_window.log_install(f"🚀 Начало установки {system.upper()}...")
                 try:
-                    result = self.main_window.logic.install_system(system)
+                    result = self.main_window.logic.install_system(system, self.main_window.log_install)
                     self.main_window.log_install(f"{system.upper()}: {result}")
                 except Exception as e:
                     self.main_window.log_install(f"❌ Ошибка установки {system}: {str(e)}")
@@ -123,7 +123,7 @@ class InstallationTab:
         self.main_window.log_install(f"🚀 Запуск полной установки {system.upper()}...")
         
         def install_thread():
-            result = self.main_window.logic.install_system(system)
+            result = self.main_window.logic.install_system(system, self.main_window.log_install)
             self.main_window.log_install(result)
             
         threading.Thread(target=install_thread, daemon=True).start()
@@ -134,7 +134,7 @@ class InstallationTab:
         self.main_window.log_install(f"📦 Установка зависимостей для {system.upper()}...")
         
         def install_thread():
-            result = self.main_window.logic.install_dependencies(system)
+            result = self.main_window.logic.install_dependencies(system, self.main_window.log_install)
             self.main_window.log_install(result)
             
         threading.Thread(target=install_thread, daemon=True).start()
@@ -145,7 +145,7 @@ class InstallationTab:
         self.main_window.log_install(f"⚙️ Установка {system.upper()}...")
         
         def install_thread():
-            result = self.main_window.logic.install_security_system(system)
+            result = self.main_window.logic.install_security_system(system, self.main_window.log_install)
             self.main_window.log_install(result)
             
         threading.Thread(target=install_thread, daemon=True).start()
@@ -156,7 +156,7 @@ class InstallationTab:
         self.main_window.log_install(f"🔧 Настройка {system.upper()}...")
         
         def configure_thread():
-            result = self.main_window.logic.configure_system(system)
+            result = self.main_window.logic.configure_system(system, self.main_window.log_install)
             self.main_window.log_install(result)
             
         threading.Thread(target=configure_thread, daemon=True).start()
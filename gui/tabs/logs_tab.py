@@ -2,6 +2,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import threading
+import time
+from services.upload_compression import available_algorithms, clamp_level, DEFAULT_LEVELS, LEVEL_RANGES
+from services.endpoint_pool import POLICIES
 
 class LogsTab:
     """Вкладка отправки логов"""
@@ -10,6 +13,8 @@ class LogsTab:
         self.main_window = main_window
         self.frame = ttk.Frame(notebook)
         notebook.add(self.frame, text="Отправка логов")
+        # Таймер обратного отсчета до следующей отправки
+        self._countdown_id = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -22,9 +27,15 @@ class LogsTab:
         self.endpoint_url = tk.StringVar(value=self.main_window.config.get('endpoint_url', 'http://10.8.0.5:8000/api/analyze_file'))
         ttk.Entry(endpoint_frame, textvariable=self.endpoint_url, width=50).grid(row=0, column=1, sticky='we', padx=5, pady=2)
         
+        # Несколько серверов через запятую распределяются по политике
+        ttk.Label(endpoint_frame, text="Политика выбора сервера:").grid(row=1, column=0, sticky='w', padx=5, pady=2)
+        self.endpoint_policy = tk.StringVar(value=self.main_window.config.get('endpoint_policy', 'round_robin'))
+        ttk.Combobox(endpoint_frame, textvariable=self.endpoint_policy, values=list(POLICIES),
+                     state='readonly', width=20).grid(row=1, column=1, sticky='w', padx=5, pady=2)
+        
         # Тестирование соединения
         test_frame = ttk.Frame(endpoint_frame)
-        test_frame.grid(row=1, column=0, columnspan=2, sticky='we', pady=5)
+        test_frame.grid(row=2, column=0, columnspan=2, sticky='we', pady=5)
         
         ttk.Button(test_frame, text="Проверить связь с сервером", 
                   command=self.test_server_connection).pack(side='left', padx=5)
@@ -47,12 +58,18 @@ class LogsTab:
         interval_spin = ttk.Spinbox(settings_frame, from_=5, to=3600, textvariable=self.send_interval, width=10)
         interval_spin.grid(row=0, column=3, sticky='w', padx=5, pady=2)
         
-        # Количество логов в файле
-        ttk.Label(settings_frame, text="Логов в файле:").grid(row=1, column=0, sticky='w', padx=5, pady=2)
+        # Количество логов в тестовом файле
+        ttk.Label(settings_frame, text="Логов в тестовом файле:").grid(row=1, column=0, sticky='w', padx=5, pady=2)
         self.logs_per_file = tk.IntVar(value=self.main_window.config.get('logs_per_file', 10))
         logs_spin = ttk.Spinbox(settings_frame, from_=1, to=1000, textvariable=self.logs_per_file, width=10)
         logs_spin.grid(row=1, column=1, sticky='w', padx=5, pady=2)
         
+        # Одновременных отправок (запросов в полете)
+        ttk.Label(settings_frame, text="Параллельных отправок:").grid(row=1, column=2, sticky='w', padx=5, pady=2)
+        self.max_in_flight = tk.IntVar(value=self.main_window.config.get('max_in_flight', 4))
+        ttk.Spinbox(settings_frame, from_=1, to=32, textvariable=self.max_in_flight,
+                    width=10).grid(row=1, column=3, sticky='w', padx=5, pady=2)
+        
         # Выбор систем для логов
         ttk.Label(settings_frame, text="Системы для логов:").grid(row=2, column=0, sticky='nw', padx=5, pady=2)
         systems_frame = ttk.Frame(settings_frame)
@@ -73,6 +90,46 @@ class LogsTab:
             cb = ttk.Checkbutton(systems_frame, text=name, variable=var)
             cb.grid(row=0, column=i, sticky='w', padx=5)
         
+        # Фильтр типов событий Suricata (пусто - все события)
+        ttk.Label(settings_frame, text="Типы событий Suricata:").grid(row=3, column=0, sticky='w', padx=5, pady=2)
+        self.event_types = tk.StringVar(value=self.main_window.config.get('suricata_event_types', ''))
+        ttk.Entry(settings_frame, textvariable=self.event_types, width=40).grid(row=3, column=1, columnspan=3, sticky='w', padx=5, pady=2)
+        
+        # Отправка по событиям файловой системы вместо интервала
+        self.event_driven = tk.BooleanVar(value=self.main_window.config.get('event_driven', False))
+        ttk.Checkbutton(settings_frame, text="Отправлять при появлении новых логов (inotify)",
+                        variable=self.event_driven).grid(row=4, column=0, columnspan=4, sticky='w', padx=5, pady=2)
+        
+        # Потоковое сжатие отправляемых файлов
+        ttk.Label(settings_frame, text="Сжатие:").grid(row=5, column=0, sticky='w', padx=5, pady=2)
+        self.compression = tk.StringVar(value=self.main_window.config.get('compression', 'none'))
+        ttk.Combobox(settings_frame, textvariable=self.compression, values=['none'] + available_algorithms(),
+                     state='readonly', width=8).grid(row=5, column=1, sticky='w', padx=5, pady=2)
+        ttk.Label(settings_frame, text="Уровень сжатия:").grid(row=5, column=2, sticky='w', padx=5, pady=2)
+        # У gzip (1-9) и zstd (1-19) свои диапазоны и уровни
+        self.compression_levels = dict(DEFAULT_LEVELS)
+        self.compression_levels.update(self.main_window.config.get('compression_levels', {}))
+        if 'compression_level' in self.main_window.config and self.compression.get() in LEVEL_RANGES \
+                and 'compression_levels' not in self.main_window.config:
+            # Прежний общий уровень относится к выбранному алгоритму
+            self.compression_levels[self.compression.get()] = self.main_window.config['compression_level']
+        self.compression_level = tk.IntVar()
+        self.compression_level_spin = ttk.Spinbox(settings_frame, textvariable=self.compression_level, width=10)
+        self.compression_level_spin.grid(row=5, column=3, sticky='w', padx=5, pady=2)
+        self._level_algorithm = None
+        self._on_compression_change()
+        self.compression.trace_add('write', lambda *_: self._on_compression_change())
+        
+        # Пачка уходит по первому из порогов: число записей или задержка
+        ttk.Label(settings_frame, text="Записей в пачке (макс.):").grid(row=6, column=0, sticky='w', padx=5, pady=2)
+        self.batch_max_records = tk.IntVar(value=self.main_window.config.get('batch_max_records', 5000))
+        ttk.Spinbox(settings_frame, from_=1, to=100000, textvariable=self.batch_max_records,
+                    width=10).grid(row=6, column=1, sticky='w', padx=5, pady=2)
+        ttk.Label(settings_frame, text="Задержка пачки (сек):").grid(row=6, column=2, sticky='w', padx=5, pady=2)
+        self.batch_max_latency = tk.DoubleVar(value=self.main_window.config.get('batch_max_latency', 5.0))
+        ttk.Spinbox(settings_frame, from_=0.1, to=3600, increment=0.5, textvariable=self.batch_max_latency,
+                    width=10).grid(row=6, column=3, sticky='w', padx=5, pady=2)
+        
         # Управление отправкой
         control_frame = ttk.LabelFrame(self.frame, text="Управление отправкой")
         control_frame.pack(fill='x', padx=10, pady=5)
@@ -105,9 +162,18 @@ class LogsTab:
     def save_log_settings(self):
         """Сохранение настроек отправки логов"""
         self.main_window.config['endpoint_url'] = self.endpoint_url.get()
+        self.main_window.config['endpoint_policy'] = self.endpoint_policy.get()
         self.main_window.config['file_count'] = self.file_count.get()
         self.main_window.config['send_interval'] = self.send_interval.get()
         self.main_window.config['logs_per_file'] = self.logs_per_file.get()
+        self.main_window.config['max_in_flight'] = self.max_in_flight.get()
+        self.main_window.config['suricata_event_types'] = self.event_types.get()
+        self.main_window.config['event_driven'] = self.event_driven.get()
+        self.main_window.config['compression'] = self.compression.get()
+        self._remember_compression_level()
+        self.main_window.config['compression_levels'] = dict(self.compression_levels)
+        self.main_window.config['batch_max_records'] = self.batch_max_records.get()
+        self.main_window.config['batch_max_latency'] = self.batch_max_latency.get()
         
         for key, var in self.log_systems_vars.items():
             self.main_window.config[f'log_system_{key}'] = var.get()
@@ -115,6 +181,31 @@ class LogsTab:
         self.main_window.save_config()
         self.main_window.log_send("Настройки сохранены")
     
+    def _on_compression_change(self):
+        """Диапазон и уровень поля уровня сжатия для выбранного алгоритма"""
+        self._remember_compression_level()
+        algorithm = self.compression.get()
+        if algorithm not in LEVEL_RANGES:
+            self._level_algorithm = None
+            self.compression_level_spin.state(['disabled'])
+            return
+        low, high = LEVEL_RANGES[algorithm]
+        self.compression_level_spin.state(['!disabled'])
+        self.compression_level_spin.configure(from_=low, to=high)
+        self.compression_level.set(clamp_level(algorithm, self.compression_levels.get(algorithm)))
+        self._level_algorithm = algorithm
+    
+    def _remember_compression_level(self):
+        """Сохранение введенного уровня для текущего алгоритма"""
+        if self._level_algorithm is None:
+            return
+        try:
+            level = self.compression_level.get()
+        except tk.TclError:
+            # Поле пустое или не число - остается прежний уровень
+            return
+        self.compression_levels[self._level_algorithm] = clamp_level(self._level_algorithm, level)
+    
     def test_server_connection(self):
         """Тестирование соединения с сервером"""
         def test_thread():
@@ -143,12 +234,20 @@ class LogsTab:
     
     def start_log_sending(self):
         """Запуск автоматической отправки логов"""
+        self._remember_compression_level()
         config = {
             'file_count': self.file_count.get(),
             'send_interval': self.send_interval.get(),
-            'logs_per_file': self.logs_per_file.get(),
+            'max_in_flight': self.max_in_flight.get(),
             'selected_systems': [key for key, var in self.log_systems_vars.items() if var.get()],
-            'endpoint_url': self.endpoint_url.get()
+            'endpoint_url': self.endpoint_url.get(),
+            'endpoint_policy': self.endpoint_policy.get(),
+            'event_types': [t.strip() for t in self.event_types.get().split(',') if t.strip()],
+            'event_driven': self.event_driven.get(),
+            'compression': self.compression.get() if self.compression.get() != 'none' else None,
+            'compression_level': self.compression_levels.get(self.compression.get()),
+            'batch_max_records': self.batch_max_records.get(),
+            'batch_max_latency': self.batch_max_latency.get()
         }
         
         if self.main_window.log_manager.start_log_sending(config, self.update_progress):
@@ -159,20 +258,36 @@ class LogsTab:
     def stop_log_sending(self):
         """Остановка отправки логов"""
         self.main_window.log_manager.stop_log_sending()
+        if self._countdown_id is not None:
+            self.frame.after_cancel(self._countdown_id)
+            self._countdown_id = None
         self.start_send_btn.config(state='normal')
         self.stop_send_btn.config(state='disabled')
         self.send_status.config(text="Отправка остановлена")
     
     def update_progress(self, current: int, total: int, seconds_left: int = 0, completed: bool = False):
-        """Обновление прогресса отправки"""
+        """
+        Обновление прогресса отправки
+        
+        Планировщик сообщает время до следующего запуска один раз, обратный
+        отсчет ведется таймером Tk.
+        """
         def update_gui():
+            if self._countdown_id is not None:
+                self.frame.after_cancel(self._countdown_id)
+                self._countdown_id = None
             if completed:
                 self.send_status.config(text="Отправка завершена")
                 self.start_send_btn.config(state='normal')
                 self.stop_send_btn.config(state='disabled')
             elif seconds_left > 0:
-                self.send_status.config(text=f"Отправка {current}/{total}. Следующий через {seconds_left} сек")
+                tick(time.monotonic() + seconds_left)
             else:
                 self.send_status.config(text=f"Отправка {current}/{total}")
         
+        def tick(deadline: float):
+            remaining = max(0, round(deadline - time.monotonic()))
+            self.send_status.config(text=f"Отправка {current}/{total}. Следующий через {remaining} сек")
+            self._countdown_id = self.frame.after(1000, tick, deadline) if remaining > 0 else None
+        
         self.main_window.root.after(0, update_gui)
@@ -2,6 +2,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import threading
+import time
 
 class MonitoringTab:
     """Вкладка мониторинга систем"""
@@ -72,41 +73,33 @@ ClamAV: антивирусная защита
             
         threading.Thread(target=status_thread, daemon=True).start()
     
-    def start_all_services(self):
-        """Запуск всех служб"""
-        def start_thread():
-            self.main_window.log_install("🚀 Запуск всех систем безопасности...")
-            for system in self.main_window.available_systems:
-                self.main_window.log_install(f"Запуск {system}...")
-                self.main_window.logic.start_service(system)
+    def run_for_all(self, operation: str, title: str, done_message: str):
+        """Параллельное выполнение операции для всех систем с итогом по каждой"""
+        def operation_thread():
+            log = self.main_window.log_install
+            log(title)
+            started = time.monotonic()
+            results = self.main_window.logic.run_for_systems(operation, self.main_window.available_systems)
+            for system, result in results.items():
+                log(f"{system}: {result.result} ({result.duration:.1f} сек)")
             
             self.update_status()
-            self.main_window.log_install("✅ Все системы запущены")
+            failed = [system for system, result in results.items() if not result.ok]
+            if failed:
+                log(f"⚠️ Ошибки: {', '.join(failed)} (всего {time.monotonic() - started:.1f} сек)")
+            else:
+                log(f"{done_message} ({time.monotonic() - started:.1f} сек)")
         
-        threading.Thread(target=start_thread, daemon=True).start()
+        threading.Thread(target=operation_thread, daemon=True).start()
+    
+    def start_all_services(self):
+        """Запуск всех служб"""
+        self.run_for_all('start', "🚀 Запуск всех систем безопасности...", "✅ Все системы запущены")
     
     def stop_all_services(self):
         """Остановка всех служб"""
-        def stop_thread():
-            self.main_window.log_install("🛑 Остановка всех систем безопасности...")
-            for system in self.main_window.available_systems:
-                self.main_window.log_install(f"Остановка {system}...")
-                self.main_window.logic.stop_service(system)
-            
-            self.update_status()
-            self.main_window.log_install("✅ Все системы остановлены")
-        
-        threading.Thread(target=stop_thread, daemon=True).start()
+        self.run_for_all('stop', "🛑 Остановка всех систем безопасности...", "✅ Все системы остановлены")
     
     def update_all_systems(self):
         """Обновление всех систем"""
-        def update_thread():
-            self.main_window.log_install("🔄 Обновление всех систем...")
-            for system in self.main_window.available_systems:
-                self.main_window.log_install(f"Обновление {system}...")
-                self.main_window.logic.update_system(system)
-            
-            self.update_status()
-            self.main_window.log_install("✅ Все системы обновлены")
-        
-        threading.Thread(target=update_thread, daemon=True).start()
+        self.run_for_all('update', "🔄 Обновление всех систем...", "✅ Все системы обновлены")
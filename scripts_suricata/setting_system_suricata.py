@@ -10,6 +10,10 @@ import logging
 import re
 import time
 
+# Общие модули агента лежат в корне репозитория
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from services.tail_reader import tail_lines
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -294,16 +298,15 @@ alert tcp any any -> any 443 (msg:"HTTPS connection"; sid:1000004; rev:1;)
         
         if os.path.exists(log_file):
             logger.info(f"Последние {lines} строк лога:")
-            result = subprocess.run(['tail', f'-n{lines}', log_file], 
-                                  capture_output=True, text=True)
-            print(result.stdout)
+            try:
+                print('\n'.join(tail_lines(log_file, lines)))
+            except:
+                pass
         
         if os.path.exists(eve_file):
             logger.info(f"Последние {lines} событий EVE:")
             try:
-                result = subprocess.run(['tail', f'-n{lines}', eve_file], 
-                                      capture_output=True, text=True)
-                print(result.stdout)
+                print('\n'.join(tail_lines(eve_file, lines)))
             except:
                 pass
 
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional, Callable, Dict, List
+from .log_batch import LogBatch, DEFAULT_MEMORY_BUDGET
+
+# Причины отправки пачки
+FLUSH_BYTES = 'max_bytes'
+FLUSH_RECORDS = 'max_records'
+FLUSH_LATENCY = 'max_latency'
+FLUSH_SHUTDOWN = 'shutdown'
+
+class BatchFormat:
+    """Обрамление записей пачки: заголовок, разделитель и окончание"""
+
+    def __init__(self, extension: str, header: bytes = b'', separator: bytes = b'', footer: bytes = b''):
+        self.extension = extension
+        self.header = header
+        self.separator = separator
+        self.footer = footer
+
+# Текст конвертера: записи разделены пустой строкой (каждая запись уже с '\n\n')
+TEXT_FORMAT = BatchFormat('txt')
+# JSON массив в формате json.dump(..., indent=2)
+JSON_FORMAT = BatchFormat('json', b'[\n', b',\n', b'\n]')
+
+class AdaptiveBatcher:
+    """
+    Нарезка потока записей на пачки по объему, числу записей и задержке
+
+    Пачка закрывается по первому из условий: max_bytes, max_records или
+    max_latency секунд с момента первой записи. Пачки не дополняются
+    искусственными записями: при малом потоке уходит столько, сколько есть.
+
+    checkpoint() вызывается при закрытии пачки и возвращает функцию
+    подтверждения источника на этот момент (например, сохранение курсора
+    eve.json); rollback - возврат источника при неудаче.
+    """
+
+    def __init__(self, name: str, source: str, batch_format: BatchFormat = TEXT_FORMAT,
+                 max_bytes: int = 1024 * 1024, max_records: int = 5000, max_latency: float = 5.0,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 checkpoint: Optional[Callable[[], Callable]] = None,
+                 rollback: Optional[Callable] = None):
+        self.name = name
+        self.source = source
+        self.format = batch_format
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.max_latency = max_latency
+        self.memory_budget = memory_budget
+        self.checkpoint = checkpoint
+        self.rollback = rollback
+
+        self._batch: Optional[LogBatch] = None
+        self._opened_at = 0.0
+        self._sequence = 0
+        self.flush_reasons = Counter()
+        self.batches = 0
+        self.records = 0
+        self.bytes = 0
+
+    def add(self, record: bytes) -> Optional[LogBatch]:
+        """Добавление записи; возвращает пачку, если она заполнилась"""
+        if self._batch is None:
+            self._sequence += 1
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self._batch = LogBatch(f"{self.name}_{timestamp}_{self._sequence}.{self.format.extension}",
+                                   self.source, self.memory_budget, on_rollback=self.rollback)
+            self._batch.write(self.format.header, records=0)
+            self._opened_at = time.monotonic()
+        elif self.format.separator:
+            self._batch.write(self.format.separator, records=0)
+
+        self._batch.write(record)
+
+        if self._batch.size + len(self.format.footer) >= self.max_bytes:
+            return self.flush(FLUSH_BYTES)
+        if self._batch.count >= self.max_records:
+            return self.flush(FLUSH_RECORDS)
+        return None
+
+    def time_until_flush(self) -> Optional[float]:
+        """Секунд до отправки по задержке (None - пачка пуста)"""
+        if self._batch is None:
+            return None
+        return max(0.0, self.max_latency - (time.monotonic() - self._opened_at))
+
+    def poll(self) -> Optional[LogBatch]:
+        """Пачка, если истекла max_latency"""
+        if self._batch is not None and self.time_until_flush() == 0:
+            return self.flush(FLUSH_LATENCY)
+        return None
+
+    def flush(self, reason: str = FLUSH_SHUTDOWN) -> Optional[LogBatch]:
+        """Закрытие текущей пачки"""
+        batch, self._batch = self._batch, None
+        if batch is None:
+            return None
+        batch.write(self.format.footer, records=0)
+        if self.checkpoint:
+            batch.set_commit(self.checkpoint())
+
+        self.flush_reasons[reason] += 1
+        self.batches += 1
+        self.records += batch.count
+        self.bytes += batch.size
+        return batch
+
+    def discard(self):
+        """Сброс незакрытой пачки (источник будет перечитан после отката)"""
+        if self._batch is not None:
+            self._batch.close()
+            self._batch = None
+
+    def stats(self) -> Dict:
+        """Размеры пачек и причины их отправки"""
+        return {
+            'batches': self.batches,
+            'records': self.records,
+            'bytes': self.bytes,
+            'avg_records': self.records / self.batches if self.batches else 0.0,
+            'avg_bytes': self.bytes / self.batches if self.batches else 0.0,
+            'flush_reasons': dict(self.flush_reasons),
+        }
+
+def drain_ready(batchers: List[AdaptiveBatcher]) -> List[LogBatch]:
+    """Пачки всех нарезчиков, у которых истекла задержка"""
+    return [batch for batch in (batcher.poll() for batcher in batchers) if batch]
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Префикс времени clamd/freshclam (LogTime yes): "Mon Jan 15 10:30:45 2024 -> ..."
+_TIME_PREFIX_RE = re.compile(r'(?P<time>[A-Z][a-z]{2} [A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2} \d{4}) -> (?P<body>.*)')
+
+# "/path/file: Eicar-Signature FOUND" или с ExtendedDetectionInfo "...: Sig(md5:size) FOUND"
+_FOUND_RE = re.compile(r'(?P<path>.+): (?P<virus>[^\s(]+)(?:\((?P<info>[^)]*)\))? FOUND')
+
+# freshclam: "daily.cld updated (version: ...)" / "daily.cvd database is up-to-date (version: ...)"
+_DB_STATUS_RE = re.compile(
+    r'(?P<database>[\w.-]+\.c[lv]d) (?P<status>updated|database is up[- ]to[- ]date) '
+    r'\(version: (?P<version>\d+), sigs: (?P<sigs>\d+), f-level: (?P<flevel>\d+), builder: (?P<builder>[^)]*)\)'
+)
+
+# clamd: "Database correctly reloaded (8697766 signatures)"
+_DB_RELOAD_RE = re.compile(r'Database correctly reloaded \((?P<sigs>\d+) signatures\)')
+
+# Заголовок freshclam без LogTime: "ClamAV update process started at Mon Jan 15 10:30:45 2024"
+_UPDATE_STARTED_RE = re.compile(r'ClamAV update process started at (?P<time>.+)')
+
+# "ERROR: ...", "WARNING: ...", "LibClamAV Error: ...", "LibClamAV Warning: ..."
+_PROBLEM_RE = re.compile(r'(?:LibClamAV )?(?P<level>ERROR|Error|WARNING|Warning): ?(?P<message>.*)')
+
+# Итоги clamscan
+_SUMMARY_START_RE = re.compile(r'-+ SCAN SUMMARY -+')
+_SUMMARY_FIELD_RE = re.compile(r'(?P<key>[A-Za-z ]+): (?P<value>.*)')
+
+# Поля итогов clamscan -> ключи события, числовые поля приводятся к int
+_SUMMARY_FIELDS = {
+    'Known viruses': ('known_viruses', int),
+    'Engine version': ('engine_version', str),
+    'Scanned directories': ('scanned_directories', int),
+    'Scanned files': ('scanned_files', int),
+    'Infected files': ('infected_files', int),
+    'Total errors': ('total_errors', int),
+    'Data scanned': ('data_scanned', str),
+    'Data read': ('data_read', str),
+    'Time': ('time', str),
+    'Start Date': ('start_date', str),
+    'End Date': ('end_date', str),
+}
+
+@lru_cache(maxsize=1024)
+def _parse_log_time(value: str) -> Optional[str]:
+    """Время clamd/freshclam в ISO формате"""
+    try:
+        return datetime.strptime(value, '%a %b %d %H:%M:%S %Y').isoformat()
+    except ValueError:
+        return None
+
+def _parse_summary_date(value: str) -> Optional[str]:
+    """Дата из итогов clamscan ("2024:01:15 10:30:45") в ISO формате"""
+    try:
+        return datetime.strptime(value, '%Y:%m:%d %H:%M:%S').isoformat()
+    except ValueError:
+        return None
+
+class ClamAVLogParser:
+    """
+    Потоковый разбор логов clamd, freshclam и clamscan в типизированные события
+
+    Типы событий: detection, database_update, scan_summary, error.
+    Строки без полезной информации (SelfCheck, разделители и т.п.) пропускаются.
+    Состояние (время последней метки, незакрытые итоги) переносится между
+    вызовами feed(), поэтому один разборщик используется на весь файл.
+    """
+
+    def __init__(self, source: str = 'clamav'):
+        self.source = source
+        # Время последней строки с меткой - для строк без собственного времени
+        self.last_time: Optional[str] = None
+        self._summary: Optional[Dict] = None
+
+    def _event(self, event_type: str, level: str, message: str, data: Dict,
+               timestamp: Optional[str]) -> Dict:
+        data['source'] = self.source
+        return {
+            "timestamp": timestamp or self.last_time or datetime.now().isoformat(),
+            "system": "clamav",
+            "event_type": event_type,
+            "level": level,
+            "message": message,
+            "data": data
+        }
+
+    def _finish_summary(self) -> Dict:
+        """Формирование события итогов сканирования"""
+        data, self._summary = self._summary, None
+        timestamp = _parse_summary_date(data.get('end_date', '')) or _parse_summary_date(data.get('start_date', ''))
+        infected = data.get('infected_files', 0)
+        message = f"Scan completed: {data.get('scanned_files', 0)} files scanned, {infected} infected"
+        return self._event('scan_summary', 'WARNING' if infected else 'INFO', message, data, timestamp)
+
+    def feed(self, line: str) -> List[Dict]:
+        """Разбор одной строки; возвращает 0, 1 или 2 события"""
+        events = []
+        line = line.strip()
+
+        if self._summary is not None:
+            match = _SUMMARY_FIELD_RE.fullmatch(line)
+            field = _SUMMARY_FIELDS.get(match.group('key')) if match else None
+            if field:
+                key, cast = field
+                value = match.group('value').strip()
+                try:
+                    self._summary[key] = cast(value)
+                except ValueError:
+                    self._summary[key] = value
+                if key == 'end_date':
+                    # Последнее поле итогов clamscan
+                    events.append(self._finish_summary())
+                return events
+            events.append(self._finish_summary())
+
+        if not line:
+            return events
+
+        timestamp = None
+        match = _TIME_PREFIX_RE.fullmatch(line)
+        if match:
+            timestamp = _parse_log_time(match.group('time'))
+            if timestamp:
+                self.last_time = timestamp
+            line = match.group('body')
+
+        match = _FOUND_RE.fullmatch(line)
+        if match:
+            path, virus = match.group('path'), match.group('virus')
+            data = {"path": path, "virus": virus}
+            if match.group('info'):
+                data["detection_info"] = match.group('info')
+            events.append(self._event('detection', 'CRITICAL', f"Malware detected: {virus} in {path}", data, timestamp))
+            return events
+
+        match = _DB_STATUS_RE.fullmatch(line)
+        if match:
+            database = match.group('database')
+            updated = match.group('status') == 'updated'
+            data = {
+                "database": database,
+                "version": int(match.group('version')),
+                "signatures": int(match.group('sigs')),
+                "f_level": int(match.group('flevel')),
+                "builder": match.group('builder'),
+                "status": 'updated' if updated else 'up-to-date'
+            }
+            if updated:
+                message = f"Database {database} updated to version {data['version']}"
+            else:
+                message = f"Database {database} is up to date (version {data['version']})"
+            events.append(self._event('database_update', 'INFO', message, data, timestamp))
+            return events
+
+        match = _DB_RELOAD_RE.fullmatch(line)
+        if match:
+            data = {"signatures": int(match.group('sigs')), "status": 'reloaded'}
+            events.append(self._event('database_update', 'INFO',
+                                      f"Database reloaded ({data['signatures']} signatures)", data, timestamp))
+            return events
+
+        match = _UPDATE_STARTED_RE.fullmatch(line)
+        if match:
+            # Время для строк freshclam без собственной метки
+            started = _parse_log_time(match.group('time').strip())
+            if started:
+                self.last_time = started
+            return events
+
+        if _SUMMARY_START_RE.fullmatch(line):
+            self._summary = {}
+            return events
+
+        match = _PROBLEM_RE.fullmatch(line)
+        if match:
+            level = 'ERROR' if match.group('level').upper() == 'ERROR' else 'WARNING'
+            events.append(self._event('error', level, match.group('message'), {}, timestamp))
+
+        return events
+
+    @property
+    def pending(self) -> bool:
+        """Итоги сканирования начаты, но еще не закрыты"""
+        return self._summary is not None
+
+    def reset(self):
+        """Сброс незакрытых итогов (источник перечитывается с курсора)"""
+        self._summary = None
+
+    def flush(self) -> List[Dict]:
+        """Завершение потока: отдает незакрытые итоги сканирования"""
+        if self._summary is not None:
+            return [self._finish_summary()]
+        return []
+
+    def iter_events(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Генератор событий из потока строк"""
+        for line in lines:
+            yield from self.feed(line)
+        yield from self.flush()
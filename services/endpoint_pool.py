@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import re
+import threading
+import time
+from typing import Optional, Callable, Dict, List
+
+# Политики выбора сервера анализа
+POLICIES = ('round_robin', 'least_outstanding', 'failover', 'broadcast')
+
+def parse_endpoints(value) -> List[str]:
+    """Список URL из строки через запятую/пробел/перевод строки или из списка"""
+    if isinstance(value, str):
+        value = re.split(r'[\s,;]+', value)
+    return [url.strip() for url in value if url and url.strip()]
+
+class EndpointState:
+    """Состояние одного сервера анализа"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.outstanding = 0
+        self.successes = 0
+        self.failures = 0
+        self.last_probe: Optional[float] = None
+
+    def as_dict(self) -> Dict:
+        return {
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'successes': self.successes,
+            'failures': self.failures,
+        }
+
+class EndpointPool:
+    """
+    Набор серверов анализа с политикой выбора
+
+    Политики:
+        round_robin - по очереди;
+        least_outstanding - сервер с наименьшим числом текущих запросов;
+        failover - первый здоровый по порядку списка (основной/резервные);
+        broadcast - копия пачки на каждый сервер, включая нездоровые.
+
+    Сервер помечается нездоровым после неудачной отправки или проверки
+    probe(url) и возвращается в работу после успешной фоновой проверки.
+    Если нездоровы все, используются все - лучше попытаться, чем стоять.
+    Фоновые проверки запускает start() и останавливает stop().
+    """
+
+    def __init__(self, urls: List[str], policy: str = 'round_robin',
+                 probe: Optional[Callable[[str], bool]] = None, probe_interval: float = 30.0,
+                 log_callback: Optional[Callable] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Неизвестная политика выбора сервера: {policy}")
+        urls = parse_endpoints(urls)
+        if not urls:
+            raise ValueError("Не задан ни один URL сервера")
+
+        self.policy = policy
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.log_callback = log_callback
+        self.endpoints = [EndpointState(url) for url in dict.fromkeys(urls)]
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def log(self, message: str):
+        """Логирование сообщений"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def candidates(self) -> List[str]:
+        """
+        Серверы в порядке попыток для очередной пачки
+
+        Для broadcast - все серверы (пачка доставлена, только если ее приняли
+        все), для остальных политик - выбранный сервер первым, затем прочие
+        здоровые как запасные на случай его отказа.
+        """
+        with self._lock:
+            if self.policy == 'broadcast':
+                return [e.url for e in self.endpoints]
+            healthy = [e for e in self.endpoints if e.healthy] or list(self.endpoints)
+
+            if self.policy == 'round_robin':
+                start = self._next % len(healthy)
+                self._next += 1
+                ordered = healthy[start:] + healthy[:start]
+            elif self.policy == 'least_outstanding':
+                ordered = sorted(healthy, key=lambda e: e.outstanding)
+            else:
+                ordered = healthy
+            return [e.url for e in ordered]
+
+    def _get(self, url: str) -> Optional[EndpointState]:
+        for endpoint in self.endpoints:
+            if endpoint.url == url:
+                return endpoint
+        return None
+
+    def begin(self, url: str):
+        """Учет начатого запроса к серверу"""
+        with self._lock:
+            endpoint = self._get(url)
+            if endpoint:
+                endpoint.outstanding += 1
+
+    def finish(self, url: str, success: bool):
+        """Учет завершенного запроса и пассивная проверка здоровья"""
+        with self._lock:
+            endpoint = self._get(url)
+            if not endpoint:
+                return
+            endpoint.outstanding -= 1
+            if success:
+                endpoint.successes += 1
+                return
+            endpoint.failures += 1
+            became_unhealthy = endpoint.healthy
+            endpoint.healthy = False
+        if became_unhealthy:
+            self.log(f"⚠️ Сервер {url} помечен недоступным")
+
+    def probe_all(self):
+        """Проверка всех серверов функцией probe"""
+        if self.probe is None:
+            return
+        for endpoint in list(self.endpoints):
+            try:
+                healthy = bool(self.probe(endpoint.url))
+            except Exception:
+                healthy = False
+            with self._lock:
+                changed = endpoint.healthy != healthy
+                endpoint.healthy = healthy
+                endpoint.last_probe = time.time()
+            if changed:
+                self.log(f"{'✅' if healthy else '⚠️'} Сервер {endpoint.url} "
+                         f"{'снова доступен' if healthy else 'не отвечает на проверку'}")
+
+    def start(self):
+        """Запуск фоновых проверок здоровья"""
+        if self.probe is None or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._probe_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановка фоновых проверок"""
+        self._stop.set()
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.probe_interval):
+            self.probe_all()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Состояние и счетчики по серверам"""
+        with self._lock:
+            return {endpoint.url: endpoint.as_dict() for endpoint in self.endpoints}
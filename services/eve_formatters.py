@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+import string
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Формат форматтера: (entry, formatted_time) -> текст записи или None
+Formatter = Callable[[dict, str], Optional[str]]
+
+_EMPTY: Dict[str, Any] = {}
+
+# Преобразование типа DNS запроса в читаемый вид
+DNS_TYPE_MAP = {
+    '1': 'A', '2': 'NS', '5': 'CNAME', '6': 'SOA',
+    '12': 'PTR', '15': 'MX', '16': 'TXT', '28': 'AAAA'
+}
+
+def compile_template(template: str, fields: Dict[str, Tuple]) -> Formatter:
+    """
+    Компиляция форматтера из шаблона
+
+    Шаблон задается в синтаксисе str.format с именованными полями ({timestamp} -
+    время события). Один раз при регистрации он компилируется в функцию с
+    f-строкой (как это делает collections.namedtuple), поэтому на каждую
+    запись приходится по одному dict.get на секцию и на поле и ни одного
+    разбора шаблона.
+
+    Пример:
+        compile_template("[SSH {timestamp}]\\nКлиент: {client}", {
+            'client': ('ssh', 'client', {}, lambda v: v.get('software_version', '')),
+        })
+
+    Args:
+        template: шаблон с именованными полями
+        fields: имя -> (секция или None, ключ, значение по умолчанию[, преобразование])
+    """
+    namespace = {'_EMPTY': _EMPTY}
+    sections = {}
+    parts = []
+    for index, (literal, name, spec, conversion) in enumerate(string.Formatter().parse(template)):
+        parts.append(literal.replace('{', '{{').replace('}', '}}'))
+        if name is None:
+            continue
+
+        if name == 'timestamp':
+            expr = 'timestamp'
+        else:
+            section, key, default, *rest = fields[name]
+            namespace[f'_k{index}'] = key
+            namespace[f'_d{index}'] = default
+            if section is None:
+                source = 'entry'
+            else:
+                if section not in sections:
+                    sections[section] = f's{len(sections)}'
+                    namespace[f'_s{sections[section]}'] = section
+                source = sections[section]
+            expr = f"{source}.get(_k{index}, _d{index})"
+            if rest:
+                namespace[f'_t{index}'] = rest[0]
+                expr = f"_t{index}({expr})"
+
+        conversion = f"!{conversion}" if conversion else ''
+        spec = f":{spec}" if spec else ''
+        parts.append(f"{{{expr}{conversion}{spec}}}")
+
+    body = [f"    {var} = entry.get(_s{var}, _EMPTY)" for var in sections.values()]
+    body.append(f"    return f{''.join(parts)!r}")
+    source = "def render(entry, timestamp):\n" + "\n".join(body)
+    exec(source, namespace)
+    return namespace['render']
+
+def _upper(value) -> str:
+    return value.upper()
+
+def _dns_type(value) -> str:
+    return DNS_TYPE_MAP.get(str(value), str(value))
+
+format_alert = compile_template(
+    "[ALERT {timestamp}]\n"
+    "Сигнатура: {signature}\n"
+    "От: {src_ip}:{src_port} -> К: {dest_ip}:{dest_port}\n"
+    "Протокол: {proto} | Категория: {category} | Важность: {severity}",
+    {
+        'signature': ('alert', 'signature', 'Unknown alert'),
+        'category': ('alert', 'category', ''),
+        'severity': ('alert', 'severity', 3),
+        'src_ip': (None, 'src_ip', 'unknown'),
+        'src_port': (None, 'src_port', ''),
+        'dest_ip': (None, 'dest_ip', 'unknown'),
+        'dest_port': (None, 'dest_port', ''),
+        'proto': (None, 'proto', '', _upper),
+    }
+)
+
+format_http = compile_template(
+    "[HTTP {timestamp}]\n"
+    "Запрос: {method} {hostname}{url}\n"
+    "Статус: {status} | Размер: {length} байт\n"
+    "Источник: {src_ip}",
+    {
+        'hostname': ('http', 'hostname', 'unknown host'),
+        'method': ('http', 'http_method', 'unknown method'),
+        'url': ('http', 'url', '/'),
+        'status': ('http', 'status', 'unknown status'),
+        'length': ('http', 'length', 0),
+        'src_ip': (None, 'src_ip', 'unknown'),
+    }
+)
+
+format_dns = compile_template(
+    "[DNS {timestamp}]\n"
+    "Запрос: {query_type} для {query}\n"
+    "Код ответа: {rcode}\n"
+    "Клиент: {src_ip}",
+    {
+        'query': ('dns', 'rrname', 'unknown query'),
+        'query_type': ('dns', 'rrtype', 'unknown type', _dns_type),
+        'rcode': ('dns', 'rcode', 'UNKNOWN'),
+        'src_ip': (None, 'src_ip', 'unknown'),
+    }
+)
+
+_format_tls_base = compile_template(
+    "[TLS {timestamp}]\n"
+    "SNI: {sni}\n"
+    "Сертификат: {subject}\n"
+    "Клиент: {src_ip} -> Сервер: {dest_ip}",
+    {
+        'sni': ('tls', 'sni', ''),
+        'subject': ('tls', 'subject', ''),
+        'src_ip': (None, 'src_ip', 'unknown'),
+        'dest_ip': (None, 'dest_ip', 'unknown'),
+    }
+)
+
+def format_tls(entry: dict, timestamp: str) -> str:
+    """Форматирует TLS события"""
+    text = _format_tls_base(entry, timestamp)
+    version = entry.get('tls', _EMPTY).get('version', '')
+    if version:
+        text += f"\nВерсия TLS: {version}"
+    return text
+
+format_fileinfo = compile_template(
+    "[FILE {timestamp}]\n"
+    "Файл: {filename}\n"
+    "Размер: {size} байт | Тип: {file_type}\n"
+    "Передача: {src_ip} -> {dest_ip}",
+    {
+        'filename': ('fileinfo', 'filename', 'unknown'),
+        'size': ('fileinfo', 'size', 0),
+        'file_type': ('fileinfo', 'magic', 'unknown type'),
+        'src_ip': (None, 'src_ip', 'unknown'),
+        'dest_ip': (None, 'dest_ip', 'unknown'),
+    }
+)
+
+_format_flow_base = compile_template(
+    "[FLOW {timestamp}]\n"
+    "Поток: {src_ip}:{src_port} -> {dest_ip}:{dest_port}\n"
+    "Протокол: {proto}",
+    {
+        'src_ip': (None, 'src_ip', 'unknown'),
+        'src_port': (None, 'src_port', ''),
+        'dest_ip': (None, 'dest_ip', 'unknown'),
+        'dest_port': (None, 'dest_port', ''),
+        'proto': (None, 'proto', '', _upper),
+    }
+)
+
+def format_flow(entry: dict, timestamp: str) -> str:
+    """Форматирует flow события"""
+    text = _format_flow_base(entry, timestamp)
+
+    # Добавляем информацию о состоянии потока
+    flow = entry.get('flow')
+    if flow:
+        state = flow.get('state', '')
+        reason = flow.get('reason', '')
+        if state:
+            text += f"\nСостояние: {state}"
+        if reason:
+            text += f"\nПричина завершения: {reason}"
+
+    return text
+
+def format_stats(entry: dict, timestamp: str) -> str:
+    """Форматирует статистику"""
+    stats = entry.get('stats', _EMPTY)
+
+    lines = [f"[STATS {timestamp}]"]
+
+    # Основная статистика
+    if 'uptime' in stats:
+        lines.append(f"Время работы: {stats['uptime']} сек")
+
+    # Статистика захвата
+    capture = stats.get('capture')
+    if capture:
+        kernel_packets = capture.get('kernel_packets', 0)
+        kernel_drops = capture.get('kernel_drops', 0)
+        errors = capture.get('errors', 0)
+        lines.append(f"Пакеты: {kernel_packets:,} | Потери: {kernel_drops} | Ошибки: {errors}")
+
+    # Статистика детекта
+    detect = stats.get('detect')
+    if detect:
+        lines.append(f"Обнаружено алертов: {detect.get('alert', 0)}")
+
+    return '\n'.join(lines)
+
+def format_generic(entry: dict, timestamp: str) -> str:
+    """Форматирует неизвестные типы событий"""
+    event_type = entry.get('event_type', 'unknown')
+
+    lines = [f"[{event_type.upper()} {timestamp}]"]
+
+    # Добавляем основные поля, которые есть в большинстве событий
+    src_ip = entry.get('src_ip')
+    dest_ip = entry.get('dest_ip')
+
+    if src_ip and dest_ip:
+        lines.append(f"От: {src_ip} -> К: {dest_ip}")
+
+    # Для неизвестных типов просто показываем тип события
+    lines.append(f"Тип события: {event_type}")
+
+    return '\n'.join(lines)
+
+# Реестр форматтеров: event_type -> форматтер
+FORMATTERS: Dict[str, Formatter] = {
+    'alert': format_alert,
+    'http': format_http,
+    'dns': format_dns,
+    'tls': format_tls,
+    'fileinfo': format_fileinfo,
+    'flow': format_flow,
+    'stats': format_stats,
+}
+
+def register_formatter(event_type: str, formatter: Formatter):
+    """
+    Регистрация форматтера для типа события (smtp, ssh, anomaly, netflow, krb5 ...)
+
+    Форматтер получает запись eve.json и отформатированное время и возвращает
+    текст записи (None - запись пропускается). LogConverter.convert_parallel
+    запускает шарды через fork, поэтому регистрация до ее запуска действует
+    и в дочерних процессах.
+    """
+    FORMATTERS[event_type] = formatter
+
+def unregister_formatter(event_type: str):
+    """Удаление форматтера, тип события снова обрабатывается format_generic"""
+    FORMATTERS.pop(event_type, None)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+import os
+import json
+import base64
+from pathlib import Path
+from typing import Optional, Callable, Iterator, List
+
+# Сколько байт первой строки хранить в курсоре для опознания файла
+FINGERPRINT_BYTES = 256
+
+class EveTailer:
+    """Инкрементальное чтение eve.json с курсором, сохраняемым на диске"""
+
+    def __init__(self, path: str = "/var/log/suricata/eve.json",
+                 cursor_file: Optional[str] = None,
+                 log_callback: Optional[Callable] = None):
+        self.path = path
+        self.cursor_file = cursor_file or str(Path.home() / '.system_agent_eve_cursor.json')
+        self.log_callback = log_callback
+        self.cursor = self.load_cursor()
+        self.committed = dict(self.cursor)
+
+    def log(self, message: str):
+        """Логирование сообщений"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def load_cursor(self) -> dict:
+        """Загрузка курсора (inode, смещение, незавершенная строка, начало файла)"""
+        try:
+            with open(self.cursor_file, 'r') as f:
+                data = json.load(f)
+            if data.get('path') == self.path:
+                return {
+                    'inode': data.get('inode'),
+                    'offset': int(data.get('offset', 0)),
+                    'partial': base64.b64decode(data.get('partial', '')),
+                    'fingerprint': base64.b64decode(data.get('fingerprint', ''))
+                }
+        except:
+            pass
+        return self._empty_cursor()
+
+    @staticmethod
+    def _empty_cursor(inode: Optional[int] = None) -> dict:
+        return {'inode': inode, 'offset': 0, 'partial': b'', 'fingerprint': b''}
+
+    def snapshot(self) -> dict:
+        """Копия текущего курсора для отложенного commit()"""
+        return dict(self.cursor)
+
+    def commit(self, cursor: Optional[dict] = None):
+        """
+        Атомарное сохранение курсора после успешной обработки пачки
+
+        Args:
+            cursor: снимок из snapshot() на конце пачки (None - текущий курсор);
+                    нужен, когда следующие пачки уже прочитаны, но не отправлены
+        """
+        cursor = dict(cursor or self.cursor)
+        data = {
+            'path': self.path,
+            'inode': cursor['inode'],
+            'offset': cursor['offset'],
+            'partial': base64.b64encode(cursor['partial']).decode('ascii'),
+            'fingerprint': base64.b64encode(cursor.get('fingerprint', b'')).decode('ascii')
+        }
+        tmp_file = f"{self.cursor_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.cursor_file)
+        self.committed = cursor
+
+    def rollback(self):
+        """Возврат к последнему сохраненному курсору (пачка не обработана)"""
+        self.cursor = dict(self.committed)
+
+    def reset(self):
+        """Сброс курсора на начало файла"""
+        self.cursor = self._empty_cursor()
+
+    def _rotated_candidates(self) -> List[str]:
+        """Возможные имена файла после ротации (eve.json.1, eve.json-20240101 ...)"""
+        directory = os.path.dirname(self.path) or '.'
+        base = os.path.basename(self.path)
+        candidates = [f"{self.path}.1"]
+        try:
+            for name in sorted(os.listdir(directory)):
+                full_path = os.path.join(directory, name)
+                if name.startswith(base) and name != base and full_path not in candidates:
+                    candidates.append(full_path)
+        except OSError:
+            pass
+        return candidates
+
+    def _find_rotated(self, inode: int) -> Optional[str]:
+        """Поиск переименованного файла с inode из курсора"""
+        for candidate in self._rotated_candidates():
+            try:
+                if os.stat(candidate).st_ino == inode:
+                    return candidate
+            except OSError:
+                continue
+        return None
+
+    def _first_line(self, path: str) -> bytes:
+        """Начало первой строки файла (b'' - строка еще не дописана)"""
+        try:
+            with open(path, 'rb') as f:
+                line = f.readline(FINGERPRINT_BYTES)
+        except OSError:
+            return b''
+        if line.endswith(b'\n') or len(line) == FINGERPRINT_BYTES:
+            return line
+        return b''
+
+    def _starts_with(self, path: str, prefix: bytes) -> bool:
+        """Начинается ли файл с prefix"""
+        try:
+            with open(path, 'rb') as f:
+                return f.read(len(prefix)) == prefix
+        except OSError:
+            return False
+
+    def _read_from(self, path: str) -> Iterator[bytes]:
+        """Чтение полных строк начиная с позиции курсора"""
+        with open(path, 'rb') as f:
+            f.seek(self.cursor['offset'])
+            for raw in f:
+                self.cursor['offset'] += len(raw)
+                if not raw.endswith(b'\n'):
+                    # Строка еще дописывается - запоминаем хвост
+                    self.cursor['partial'] += raw
+                    break
+                line = self.cursor['partial'] + raw
+                self.cursor['partial'] = b''
+                yield line.rstrip(b'\r\n')
+
+    def read_new_lines(self) -> Iterator[bytes]:
+        """Генератор новых строк с момента последнего сохраненного курсора"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+
+        inode = self.cursor['inode']
+
+        if inode is not None and (st is None or st.st_ino != inode):
+            # Файл переименован logrotate - дочитываем старый файл
+            rotated = self._find_rotated(inode)
+            if rotated:
+                self.log(f"🔄 Обнаружена ротация {self.path}, дочитываем {rotated}")
+                yield from self._read_from(rotated)
+            else:
+                self.log(f"⚠️ Ротированный файл не найден, начинаем {self.path} с начала")
+            self.cursor = self._empty_cursor(st.st_ino if st else None)
+        elif st is not None and st.st_size < self.cursor['offset']:
+            # copytruncate: файл обрезан на месте
+            self.log(f"🔄 Файл {self.path} был усечен, читаем с начала")
+            self.cursor = self._empty_cursor(st.st_ino)
+        elif (st is not None and self.cursor.get('fingerprint')
+              and not self._starts_with(self.path, self.cursor['fingerprint'])):
+            # Файл усечен и успел дорасти до прежнего смещения (или заменен
+            # с тем же inode) - начало файла не совпадает с запомненным
+            self.log(f"🔄 Файл {self.path} был перезаписан, читаем с начала")
+            self.cursor = self._empty_cursor(st.st_ino)
+
+        if st is None:
+            return
+
+        self.cursor['inode'] = st.st_ino
+        if not self.cursor.get('fingerprint'):
+            self.cursor['fingerprint'] = self._first_line(self.path)
+        yield from self._read_from(self.path)
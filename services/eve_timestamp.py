@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import re
+from datetime import datetime
+from functools import lru_cache
+
+# Suricata пишет время в фиксированном виде: 2024-01-15T10:30:45.123456+0000
+_PREFIX_RE = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})')
+_SUFFIX_RE = re.compile(r'(?:\.([0-9]{1,6}))?(?:Z|[+-](?:[01][0-9]|2[0-3]):?[0-5][0-9])?')
+
+# Подряд идущие записи почти всегда попадают в одну секунду,
+# поэтому даже небольшого кэша хватает с большим запасом
+PREFIX_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=PREFIX_CACHE_SIZE)
+def _format_prefix(key: str):
+    """Форматирование даты и времени до секунды (None - формат не распознан)"""
+    match = _PREFIX_RE.fullmatch(key)
+    if not match:
+        return None
+    year, month, day, hour, minute, second = map(int, match.groups())
+    if year < 1000:
+        return None
+    try:
+        datetime(year, month, day, hour, minute, second)
+    except ValueError:
+        return None
+    return f"{day:02d}/{month:02d}/{year}-{hour:02d}:{minute:02d}:{second:02d}"
+
+def format_timestamp_slow(timestamp) -> str:
+    """Общий разбор через datetime для нестандартных значений"""
+    try:
+        if timestamp:
+            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            return dt.strftime('%d/%m/%Y-%H:%M:%S.%f')[:-3]
+        return 'unknown time'
+    except:
+        return timestamp
+
+def format_timestamp(timestamp) -> str:
+    """
+    Форматирование времени события в вид 15/01/2024-10:30:45.123
+
+    Префикс до секунды берется из ограниченного кэша, заново форматируются
+    только миллисекунды. Все, что не похоже на формат Suricata, уходит в
+    format_timestamp_slow с тем же результатом, что и раньше.
+    """
+    if timestamp and type(timestamp) is str:
+        prefix = _format_prefix(timestamp[:19])
+        if prefix is not None:
+            match = _SUFFIX_RE.fullmatch(timestamp, 19)
+            if match:
+                fraction = match.group(1)
+                if fraction:
+                    return f"{prefix}.{(fraction + '00')[:3]}"
+                return f"{prefix}.000"
+    return format_timestamp_slow(timestamp)
+
+def cache_info():
+    """Статистика кэша префиксов (попадания/промахи)"""
+    return _format_prefix.cache_info()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+import socket
+import threading
+import time
+import psutil
+from typing import Optional, Callable, Dict, Set, Tuple
+from urllib.parse import urlparse
+
+try:
+    import netifaces
+except ImportError:
+    netifaces = None
+
+class HostIdentity:
+    """
+    IP адрес и имя хоста агента
+
+    IP для запроса к серверу - адрес, с которого ядро отправляет ему пакеты:
+    адрес UDP сокета после connect() к серверу, пакеты при этом не
+    отправляются. Адреса кэшируются по серверам, поэтому чередование
+    серверов не вызывает пересчетов. Без сервера или пока его маршрут
+    неизвестен берется первый IPv4 поднятого не-loopback интерфейса. Имена
+    серверов резолвятся только в фоновом потоке, поэтому get() не ждет DNS
+    и никогда не блокирует отправку. Значения обновляются фоновым потоком
+    раз в ttl секунд и при изменении интерфейсов.
+    """
+
+    def __init__(self, log_callback: Optional[Callable] = None, ttl: float = 300.0,
+                 check_interval: float = 30.0):
+        self.log_callback = log_callback
+        self.ttl = ttl
+        self.check_interval = check_interval
+
+        self._identity: Optional[Tuple[str, str]] = None
+        # (хост, порт) сервера -> исходящий адрес (None - маршрут не определен)
+        self._routes: Dict[Tuple[str, int], Optional[str]] = {}
+        # Имена серверов, ожидающие разрешения в фоновом потоке
+        self._pending: Set[Tuple[str, int]] = set()
+        self._signature = None
+        self._updated_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def log(self, message: str):
+        """Логирование сообщений"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def get(self, url: Optional[str] = None) -> Tuple[str, str]:
+        """
+        (client_ip, hostname) из кэша; первый вызов вычисляет значение локально
+
+        Args:
+            url: сервер, для которого нужен исходящий адрес (None - адрес интерфейса)
+        """
+        identity = self._identity
+        if identity is None:
+            identity = self.refresh()
+        self.start()
+        if url:
+            ip = self._route(url)
+            if ip:
+                return ip, identity[1]
+        return identity
+
+    @staticmethod
+    def _target(url: str) -> Optional[Tuple[str, int]]:
+        parsed = urlparse(url)
+        if not parsed.hostname:
+            return None
+        try:
+            port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        except ValueError:
+            port = 80
+        return parsed.hostname, port
+
+    def _route(self, url: str) -> Optional[str]:
+        """Исходящий адрес к серверу из кэша; IP адрес сервера считается сразу"""
+        target = self._target(url)
+        if target is None:
+            return None
+        with self._lock:
+            if target in self._routes:
+                return self._routes[target]
+            if target in self._pending:
+                return None
+        ip = self._route_ip(target, resolve=False)
+        with self._lock:
+            if ip is not None or self._is_numeric(target[0]):
+                self._routes[target] = ip
+                return ip
+            # Имя сервера - резолвим в фоновом потоке
+            self._pending.add(target)
+        self._wake.set()
+        return None
+
+    def refresh(self) -> Tuple[str, str]:
+        """Пересчет IP интерфейса и имени хоста; маршруты к серверам пересчитываются заново"""
+        signature = self._interfaces_signature()
+        identity = (self._detect_ip(), self._detect_hostname())
+        with self._lock:
+            if self._identity is not None and identity != self._identity:
+                self.log(f"🔄 Идентификация хоста изменилась: {identity[0]} ({identity[1]})")
+            self._identity = identity
+            # Маршруты могли измениться вместе с интерфейсами
+            self._pending.update(self._routes)
+            self._routes.clear()
+            self._signature = signature
+            self._updated_at = time.monotonic()
+        if self._pending:
+            self._wake.set()
+        return identity
+
+    def start(self):
+        """Запуск фонового потока, следящего за интерфейсами"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Остановка фонового потока"""
+        self._stop.set()
+        self._wake.set()
+
+    def _watch(self):
+        while True:
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                expired = time.monotonic() - self._updated_at > self.ttl
+                if expired or self._interfaces_signature() != self._signature:
+                    self.refresh()
+                self._resolve_pending()
+            except Exception as e:
+                self.log(f"⚠️ Ошибка обновления идентификации хоста: {e}")
+
+    def _resolve_pending(self):
+        """Маршруты к серверам, заданным именем (DNS запрос только здесь)"""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        for target in pending:
+            ip = self._route_ip(target, resolve=True)
+            with self._lock:
+                self._routes[target] = ip
+
+    def _interfaces_signature(self):
+        """Снимок адресов и состояний интерфейсов для обнаружения изменений"""
+        try:
+            stats = psutil.net_if_stats()
+            return tuple(sorted(
+                (name, stats[name].isup if name in stats else False,
+                 tuple(sorted(addr.address for addr in addrs if addr.family == socket.AF_INET)))
+                for name, addrs in psutil.net_if_addrs().items()
+            ))
+        except Exception:
+            return None
+
+    @staticmethod
+    def _is_numeric(host: str) -> bool:
+        try:
+            socket.inet_aton(host)
+        except OSError:
+            return False
+        return True
+
+    def _route_ip(self, target: Tuple[str, int], resolve: bool) -> Optional[str]:
+        """Исходящий адрес к серверу (connect() UDP сокета не отправляет пакетов)"""
+        # Без resolve принимается только IP адрес, имя не резолвится
+        flags = 0 if resolve else socket.AI_NUMERICHOST
+        try:
+            family, kind, proto, _, address = socket.getaddrinfo(
+                target[0], target[1], socket.AF_INET, socket.SOCK_DGRAM, 0, flags)[0]
+            with socket.socket(family, kind, proto) as sock:
+                sock.connect(address)
+                ip = sock.getsockname()[0]
+        except (OSError, IndexError):
+            return None
+        return ip if ip != '0.0.0.0' else None
+
+    def _detect_ip(self) -> str:
+        """Первый IPv4 адрес поднятого не-loopback интерфейса"""
+        try:
+            stats = psutil.net_if_stats()
+            for name, addrs in psutil.net_if_addrs().items():
+                if name in stats and not stats[name].isup:
+                    continue
+                for addr in addrs:
+                    if addr.family == socket.AF_INET and not addr.address.startswith('127.'):
+                        return addr.address
+        except Exception:
+            pass
+
+        if netifaces is not None:
+            try:
+                for name in netifaces.interfaces():
+                    for addr in netifaces.ifaddresses(name).get(netifaces.AF_INET, []):
+                        if not addr.get('addr', '127.').startswith('127.'):
+                            return addr['addr']
+            except Exception:
+                pass
+
+        return "unknown"
+
+    def _detect_hostname(self) -> str:
+        try:
+            return socket.gethostname()
+        except OSError:
+            return "unknown"
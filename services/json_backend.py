@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import os
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Порядок предпочтения: самый быстрый из установленных
+BACKEND_PRIORITY = ['orjson', 'msgspec', 'json']
+
+# Принудительный выбор бэкенда через окружение
+BACKEND_ENV = 'SYSTEM_AGENT_JSON_BACKEND'
+
+class JsonDecoder:
+    """Декодер JSON строк eve.json, принимающий bytes без промежуточного decode()"""
+
+    def __init__(self, name: str, loads: Callable[[bytes], object], errors: Tuple[type, ...]):
+        self.name = name
+        self.loads = loads
+        # Исключения, означающие некорректную строку (строка пропускается)
+        self.errors = errors
+
+    def __repr__(self):
+        return f"JsonDecoder({self.name!r})"
+
+def _load_orjson() -> Optional[JsonDecoder]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return JsonDecoder('orjson', orjson.loads, (orjson.JSONDecodeError, ValueError))
+
+def _load_msgspec() -> Optional[JsonDecoder]:
+    try:
+        import msgspec
+    except ImportError:
+        return None
+    return JsonDecoder('msgspec', msgspec.json.Decoder().decode, (msgspec.DecodeError, ValueError))
+
+def _load_json() -> Optional[JsonDecoder]:
+    # json.loads принимает bytes напрямую, UnicodeDecodeError - подкласс ValueError
+    return JsonDecoder('json', json.loads, (ValueError,))
+
+_LOADERS = {
+    'orjson': _load_orjson,
+    'msgspec': _load_msgspec,
+    'json': _load_json,
+}
+
+_cache: Dict[str, Optional[JsonDecoder]] = {}
+
+def _load(name: str) -> Optional[JsonDecoder]:
+    if name not in _cache:
+        _cache[name] = _LOADERS[name]()
+    return _cache[name]
+
+def available_backends() -> List[str]:
+    """Список установленных бэкендов в порядке предпочтения"""
+    return [name for name in BACKEND_PRIORITY if _load(name) is not None]
+
+def get_decoder(name: Optional[str] = None, log_callback: Optional[Callable] = None) -> JsonDecoder:
+    """
+    Получение декодера JSON
+
+    Args:
+        name: 'orjson', 'msgspec' или 'json'; None - значение из
+              SYSTEM_AGENT_JSON_BACKEND или самый быстрый установленный.
+              Если запрошенный бэкенд неизвестен или не установлен,
+              используется stdlib json.
+        log_callback: куда сообщить о неизвестном бэкенде (None - без сообщения)
+    """
+    name = name or os.environ.get(BACKEND_ENV)
+    if name:
+        if name not in _LOADERS:
+            # Опечатка в окружении не должна останавливать сбор логов
+            message = f"⚠️ Неизвестный JSON бэкенд {name}, используется json"
+            if log_callback:
+                log_callback(message)
+            return _load('json')
+        return _load(name) or _load('json')
+
+    for candidate in BACKEND_PRIORITY:
+        decoder = _load(candidate)
+        if decoder is not None:
+            return decoder
+    return _load('json')
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import tempfile
+from typing import BinaryIO, Callable, Optional
+
+# Объем пачки, который держится в памяти; больше - сброс во временный файл
+DEFAULT_MEMORY_BUDGET = 8 * 1024 * 1024
+
+class LogBatch:
+    """
+    Пачка логов для отправки без промежуточных файлов
+
+    Записи накапливаются в SpooledTemporaryFile: пока пачка меньше
+    memory_budget, она целиком живет в памяти, и только большие пачки
+    сбрасываются на диск. Источник записей (например, курсор EveTailer)
+    подтверждается через commit() после успешной отправки или возвращается
+    через rollback() при ошибке.
+    """
+
+    def __init__(self, filename: str, source: str, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 on_commit: Optional[Callable] = None, on_rollback: Optional[Callable] = None):
+        # Имя файла в multipart запросе (на диске не создается)
+        self.filename = filename
+        self.source = source
+        self.count = 0
+        self.size = 0
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=memory_budget)
+        self._on_commit = on_commit
+        self._on_rollback = on_rollback
+
+    @property
+    def spilled(self) -> bool:
+        """Пачка превысила бюджет памяти и сброшена во временный файл"""
+        return bool(getattr(self._buffer, '_rolled', False))
+
+    def write(self, data: bytes, records: int = 1):
+        self._buffer.write(data)
+        self.size += len(data)
+        self.count += records
+
+    def open(self) -> BinaryIO:
+        """Файловый объект пачки, перемотанный в начало (можно читать повторно)"""
+        self._buffer.seek(0)
+        return self._buffer
+
+    def set_commit(self, on_commit: Callable):
+        """Установка подтверждения источника, известного только после заполнения пачки"""
+        self._on_commit = on_commit
+
+    def commit(self):
+        """Подтверждение источника после успешной отправки"""
+        if self._on_commit:
+            self._on_commit()
+        self._on_commit = self._on_rollback = None
+
+    def rollback(self):
+        """Возврат источника к последнему подтвержденному состоянию"""
+        if self._on_rollback:
+            self._on_rollback()
+        self._on_commit = self._on_rollback = None
+
+    def close(self):
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Неподтвержденная пачка при выходе считается неотправленной
+        self.rollback()
+        self.close()
@@ -3,14 +3,40 @@ import json
 import os
 import random
 import psutil
+from functools import partial
 from datetime import datetime
+from pathlib import Path
 from typing import List, Dict, Optional, Callable
+from .eve_tailer import EveTailer
+from .tail_reader import tail_lines
+from .clamav_parser import ClamAVLogParser
+from .log_batch import LogBatch, DEFAULT_MEMORY_BUDGET
+from .batcher import AdaptiveBatcher, TEXT_FORMAT, JSON_FORMAT, drain_ready
+
+# Логи clamd и freshclam
+CLAMAV_LOGS = ("/var/log/clamav/clamav.log", "/var/log/clamav/freshclam.log")
 
 class LogCollector:
     """Класс для сбора и генерации логов"""
     
-    def __init__(self, log_callback: Optional[Callable] = None):
+    def __init__(self, log_callback: Optional[Callable] = None, tail_count: int = 5):
         self.log_callback = log_callback
+        # Сколько последних строк брать из каждого файла логов
+        self.tail_count = tail_count
+        self.eve_tailer = EveTailer("/var/log/suricata/eve.json", log_callback=log_callback)
+        # Логи ClamAV читаются с сохраненного курсора, как eve.json
+        self.clamav_tailers = [
+            EveTailer(path, str(Path.home() / f".system_agent_{Path(path).stem}_cursor.json"),
+                      log_callback=log_callback)
+            for path in CLAMAV_LOGS
+        ]
+        # Разборщик на каждый файл: время последней метки и итоги clamscan,
+        # разорванные между чтениями, переносятся в следующий цикл
+        self.clamav_parsers = [ClamAVLogParser(os.path.basename(path)) for path in CLAMAV_LOGS]
+        # Тот же формат, что json.dump(logs, f, indent=2, ensure_ascii=False)
+        self._json_encoder = json.JSONEncoder(indent=2, ensure_ascii=False)
+        self.batchers: List[AdaptiveBatcher] = []
+        self.configure_batching()
     
     def log(self, message: str):
         """Логирование сообщений"""
@@ -47,67 +73,151 @@ class LogCollector:
             self.log(f"Ошибка создания тестового файла: {e}")
             return None
     
-    def collect_real_logs(self, selected_systems: List[str], logs_per_file: int = 10) -> Optional[str]:
-        """Сбор реальных логов с системы"""
+    def configure_batching(self, max_bytes: int = 1024 * 1024, max_records: int = 5000,
+                           max_latency: float = 5.0, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        """Настройка нарезки записей на пачки (см. AdaptiveBatcher)"""
+        for batcher in self.batchers:
+            batcher.discard()
+        # Курсор eve.json подтверждается на момент закрытия каждой пачки
+        self.eve_batcher = AdaptiveBatcher('suricata_logs', 'suricata', TEXT_FORMAT,
+                                           max_bytes, max_records, max_latency, memory_budget,
+                                           checkpoint=lambda: partial(self.eve_tailer.commit, self.eve_tailer.snapshot()),
+                                           rollback=lambda: self.eve_tailer.rollback())
+        # Курсоры ClamAV подтверждаются так же, на момент закрытия пачки
+        self.json_batcher = AdaptiveBatcher('system_logs', 'system', JSON_FORMAT,
+                                            max_bytes, max_records, max_latency, memory_budget,
+                                            checkpoint=lambda: partial(self._commit_clamav, self._clamav_snapshots()),
+                                            rollback=self._rollback_clamav)
+        self.batchers = [self.eve_batcher, self.json_batcher]
+    
+    def collect_batches(self, selected_systems: List[str],
+                        event_types: Optional[List[str]] = None) -> List[LogBatch]:
+        """
+        Сбор новых записей в пачки (без промежуточных файлов)
+        
+        Returns:
+            Закрытые пачки: заполненные по объему/числу записей и те, у которых
+            истекла задержка. Незаполненная пачка ждет следующего вызова.
+        """
+        # Сначала пачки с истекшей задержкой - пока курсор источника не сдвинулся
+        batches = self.poll_batches()
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Если выбран только suricata, конвертируем напрямую в текст
-            if selected_systems == ['suricata']:
-                suricata_file = "/var/log/suricata/eve.json"
-                if os.path.exists(suricata_file):
-                    from .log_converter import LogConverter
-                    converter = LogConverter(self.log_callback)
-                    converted_file = converter.convert_eve_to_text(suricata_file)
-                    if converted_file:
-                        self.log(f"✅ Сконвертирован файл Suricata: {converted_file}")
-                        return converted_file
-            
-            # Стандартный сбор логов
-            filename = f"/tmp/system_logs_{timestamp}.json"
-            
-            logs = []
-            
-            # Сбор системных логов
-            if 'system' in selected_systems:
-                system_log = {
-                    "timestamp": datetime.now().isoformat(),
-                    "system": "system",
-                    "level": "INFO",
-                    "message": "System status snapshot",
-                    "data": {
-                        "cpu_percent": psutil.cpu_percent(),
-                        "memory_percent": psutil.virtual_memory().percent,
-                        "disk_usage": psutil.disk_usage('/').percent,
-                        "boot_time": datetime.fromtimestamp(psutil.boot_time()).isoformat()
-                    }
-                }
-                logs.append(system_log)
-            
-            # Сбор логов Suricata если доступны
-            if 'suricata' in selected_systems:
-                suricata_logs = self._get_suricata_logs()
-                logs.extend(suricata_logs)
-            
-            # Сбор логов ClamAV если доступны
-            if 'clamav' in selected_systems:
-                clamav_logs = self._get_clamav_logs()
-                logs.extend(clamav_logs)
-            
-            # Добавляем случайные логи если нужно больше
-            while len(logs) < logs_per_file:
-                log_entry = self._generate_random_log(selected_systems)
-                logs.append(log_entry)
-            
-            # Сохраняем файл
-            with open(filename, 'w') as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
-            
-            return filename
+            if selected_systems == ['suricata'] and os.path.exists(self.eve_tailer.path):
+                from .log_converter import LogConverter
+                converter = LogConverter(self.log_callback)
+                new_records = 0
+                settled = self.eve_tailer.cursor == self.eve_tailer.committed
+                for record in converter.iter_formatted_lines(self.eve_tailer.read_new_lines(), event_types):
+                    new_records += 1
+                    batch = self.eve_batcher.add((record + '\n\n').encode('utf-8'))
+                    if batch:
+                        batches.append(batch)
+                pending_eve = any(batch.source == self.eve_batcher.source for batch in batches)
+                if settled and not new_records and not pending_eve and self.eve_batcher.time_until_flush() is None:
+                    # Все прочитанные строки отфильтрованы, а прочитанное ранее уже
+                    # подтверждено. Если записи попали в пачки, курсор подтверждается
+                    # только после fsync очереди (checkpoint пачки -> on_durable)
+                    self.eve_tailer.commit()
+                if new_records:
+                    self.log(f"✅ Прочитано {new_records} новых событий Suricata")
+            else:
+                before = self._clamav_snapshots()
+                for log_entry in self._gather_logs(selected_systems):
+                    batch = self.json_batcher.add(self._encode_record(log_entry))
+                    if batch:
+                        batches.append(batch)
+                pending_json = any(batch.source == self.json_batcher.source for batch in batches)
+                settled = all(tailer.committed == cursor for tailer, cursor in zip(self.clamav_tailers, before))
+                # Строки незакрытых итогов еще не стали событием - курсор не сдвигаем
+                summary_open = any(parser.pending for parser in self.clamav_parsers)
+                if settled and not summary_open and not pending_json and self.json_batcher.time_until_flush() is None:
+                    # Строки ClamAV без событий (SelfCheck и т.п.) считаются обработанными,
+                    # если все прочитанное ранее уже подтверждено
+                    self._commit_clamav(self._clamav_snapshots())
+            return batches
             
         except Exception as e:
             self.log(f"Ошибка сбора логов: {e}")
-            return None
+            # Перечитаем источник с последнего подтвержденного места
+            for batch in batches:
+                batch.close()
+            self.discard_pending()
+            self.eve_tailer.rollback()
+            self._rollback_clamav()
+            return []
+    
+    def _clamav_snapshots(self) -> List[dict]:
+        return [tailer.snapshot() for tailer in self.clamav_tailers]
+    
+    def _commit_clamav(self, cursors: List[dict]):
+        """Сохранение курсоров ClamAV (неизменившиеся не перезаписываются)"""
+        for tailer, cursor in zip(self.clamav_tailers, cursors):
+            if cursor != tailer.committed:
+                tailer.commit(cursor)
+    
+    def _rollback_clamav(self):
+        for tailer, parser in zip(self.clamav_tailers, self.clamav_parsers):
+            tailer.rollback()
+            parser.reset()
+    
+    def _encode_record(self, log_entry: Dict) -> bytes:
+        """Элемент JSON массива с отступом, как в json.dump(logs, indent=2)"""
+        text = self._json_encoder.encode(log_entry)
+        return ('  ' + text.replace('\n', '\n  ')).encode('utf-8')
+    
+    def poll_batches(self) -> List[LogBatch]:
+        """Пачки, у которых истекла максимальная задержка"""
+        return drain_ready(self.batchers)
+    
+    def flush_batches(self) -> List[LogBatch]:
+        """Закрытие всех незаполненных пачек (остановка отправки)"""
+        return [batch for batch in (batcher.flush() for batcher in self.batchers) if batch]
+    
+    def discard_pending(self):
+        """Сброс незакрытых пачек"""
+        for batcher in self.batchers:
+            batcher.discard()
+    
+    def time_until_flush(self) -> Optional[float]:
+        """Секунд до ближайшей отправки по задержке (None - ожидающих записей нет)"""
+        waits = [w for w in (batcher.time_until_flush() for batcher in self.batchers) if w is not None]
+        return min(waits) if waits else None
+    
+    def batch_stats(self) -> Dict[str, Dict]:
+        """Статистика пачек по источникам"""
+        return {batcher.source: batcher.stats() for batcher in self.batchers}
+    
+    def _gather_logs(self, selected_systems: List[str]) -> List[Dict]:
+        """Сбор записей по выбранным системам"""
+        logs = []
+        
+        # Сбор системных логов
+        if 'system' in selected_systems:
+            system_log = {
+                "timestamp": datetime.now().isoformat(),
+                "system": "system",
+                "level": "INFO",
+                "message": "System status snapshot",
+                "data": {
+                    "cpu_percent": psutil.cpu_percent(),
+                    "memory_percent": psutil.virtual_memory().percent,
+                    "disk_usage": psutil.disk_usage('/').percent,
+                    "boot_time": datetime.fromtimestamp(psutil.boot_time()).isoformat()
+                }
+            }
+            logs.append(system_log)
+        
+        # Сбор логов Suricata если доступны
+        if 'suricata' in selected_systems:
+            suricata_logs = self._get_suricata_logs()
+            logs.extend(suricata_logs)
+        
+        # Сбор логов ClamAV если доступны
+        if 'clamav' in selected_systems:
+            clamav_logs = self._get_clamav_logs()
+            logs.extend(clamav_logs)
+        
+        return logs
     
     def _get_suricata_logs(self) -> List[Dict]:
         """Получение логов Suricata"""
@@ -120,8 +230,7 @@ class LogCollector:
         for log_file in suricata_files:
             if os.path.exists(log_file):
                 try:
-                    with open(log_file, 'r') as f:
-                        lines = f.readlines()[-5:]  # Последние 5 строк
+                    lines = tail_lines(log_file, self.tail_count)
                     
                     for line in lines:
                         if line.strip():
@@ -140,96 +249,16 @@ class LogCollector:
         return logs
     
     def _get_clamav_logs(self) -> List[Dict]:
-        """Получение логов ClamAV"""
+        """Новые типизированные события ClamAV (обнаружения, обновления баз, ошибки)"""
         logs = []
-        clamav_files = [
-            "/var/log/clamav/clamav.log",
-            "/var/log/clamav/freshclam.log"
-        ]
-        
-        for log_file in clamav_files:
-            if os.path.exists(log_file):
-                try:
-                    with open(log_file, 'r') as f:
-                        lines = f.readlines()[-5:]  # Последние 5 строк
-                    
-                    for line in lines:
-                        if line.strip():
-                            clamav_log = {
-                                "timestamp": datetime.now().isoformat(),
-                                "system": "clamav",
-                                "level": "INFO",
-                                "message": f"ClamAV log entry",
-                                "raw_data": line.strip()
-                            }
-                            logs.append(clamav_log)
-                            
-                except Exception as e:
-                    self.log(f"Ошибка чтения {log_file}: {e}")
         
-        # Если файлов логов нет, генерируем тестовые логи ClamAV
-        if not logs:
-            clamav_log = {
-                "timestamp": datetime.now().isoformat(),
-                "system": "clamav",
-                "level": "INFO",
-                "message": "ClamAV antivirus running",
-                "data": {
-                    "database_version": "2024.01.01",
-                    "scanned_files": random.randint(100, 1000),
-                    "infected_files": 0
-                }
-            }
-            logs.append(clamav_log)
+        for tailer, parser in zip(self.clamav_tailers, self.clamav_parsers):
+            try:
+                # Только строки после курсора; ротация и усечение как у eve.json
+                for line in tailer.read_new_lines():
+                    logs.extend(parser.feed(line.decode('utf-8', errors='replace')))
+                
+            except Exception as e:
+                self.log(f"Ошибка чтения {tailer.path}: {e}")
         
         return logs
-    
-    def _generate_random_log(self, systems: List[str]) -> Dict:
-        """Генерация случайного лога"""
-        system = random.choice(systems) if systems else "system"
-        levels = ["INFO", "WARNING", "ERROR", "DEBUG"]
-        
-        messages = {
-            "suricata": [
-                "Network traffic anomaly detected",
-                "Signature match found",
-                "Protocol violation",
-                "Port scan detected"
-            ],
-            "clamav": [
-                "Virus database updated",
-                "Scan completed successfully",
-                "Suspicious file detected",
-                "Heuristic analysis alert"
-            ],
-            "system": [
-                "System performance normal",
-                "High memory usage detected",
-                "CPU load increased",
-                "Disk space warning"
-            ],
-            "auth": [
-                "User login successful",
-                "Failed authentication attempt",
-                "Password changed",
-                "New user session started"
-            ],
-            "network": [
-                "Network interface status changed",
-                "Connection established",
-                "Packet loss detected",
-                "Bandwidth usage high"
-            ]
-        }
-        
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "system": system,
-            "level": random.choice(levels),
-            "message": random.choice(messages.get(system, ["System event"])),
-            "data": {
-                "event_id": random.randint(1000, 9999),
-                "source_ip": f"192.168.1.{random.randint(1, 255)}",
-                "value": random.randint(1, 100)
-            }
-        }
@@ -1,27 +1,116 @@
 #!/usr/bin/env python3
 import os
-import json
+import re
+import shutil
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Optional, Callable
+from typing import Optional, Callable, Iterable, Iterator, List, Tuple, Collection
+from .eve_formatters import FORMATTERS, format_generic, register_formatter, unregister_formatter
+from .eve_timestamp import format_timestamp
+from .json_backend import get_decoder
+
+# Файлы меньше этого размера быстрее конвертировать в одном процессе
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+# Шардов больше, чем процессов, чтобы неравномерные куски не простаивали
+SHARDS_PER_WORKER = 4
+
+def split_ranges(input_file: str, shards: int) -> List[Tuple[int, int]]:
+    """Разбиение файла на диапазоны байт, выровненные по границам строк"""
+    size = os.path.getsize(input_file)
+    shards = max(1, min(shards, size // 4096 or 1))
+    bounds = [0]
+    with open(input_file, 'rb') as f:
+        for i in range(1, shards):
+            f.seek(max(size * i // shards, bounds[-1]))
+            f.readline()  # Дочитываем до конца текущей строки
+            pos = min(f.tell(), size)
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def iter_range_lines(f, start: int, end: int) -> Iterator[bytes]:
+    """Строки файла в диапазоне байт [start, end)"""
+    f.seek(start)
+    pos = start
+    for line in f:
+        if pos >= end:
+            break
+        pos += len(line)
+        yield line
+
+# Первое поле event_type в строке eve.json (Suricata пишет его до вложенных объектов)
+_EVENT_TYPE_RE = re.compile(rb'"event_type"\s*:\s*"([^"]*)"')
+
+def make_event_filter(event_types: Collection[str]) -> Callable[[bytes], bool]:
+    """
+    Дешевый байтовый префильтр строк по типу события
+    
+    Отбрасывает строку без разбора JSON, если ее event_type не входит в
+    список. Строки, в которых поле не найдено, пропускаются дальше - решение
+    по ним принимается после разбора.
+    """
+    wanted = frozenset(t.encode('utf-8') for t in event_types)
+    search = _EVENT_TYPE_RE.search
+    
+    def accept(line: bytes) -> bool:
+        match = search(line)
+        return match is None or match.group(1) in wanted
+    
+    return accept
+
+def _convert_shard(input_file: str, start: int, end: int, part_file: str,
+                   event_types: Optional[Collection[str]] = None,
+                   json_backend: Optional[str] = None,
+                   formatters: Optional[dict] = None) -> int:
+    """
+    Конвертация одного шарда (выполняется в дочернем процессе)
+    
+    formatters - реестр форматтеров родителя, если процесс запущен не через
+    fork и не унаследовал его регистрации
+    """
+    if formatters is not None:
+        FORMATTERS.clear()
+        FORMATTERS.update(formatters)
+    converter = LogConverter(json_backend=json_backend)
+    with open(input_file, 'rb') as f:
+        records = converter.iter_formatted_lines(iter_range_lines(f, start, end), event_types)
+        return converter.write_records(records, part_file)
 
 class LogConverter:
     """Класс для конвертации логов Suricata в текстовый формат"""
     
-    def __init__(self, log_callback: Optional[Callable] = None):
+    # Регистрация форматтеров для дополнительных типов событий
+    register_formatter = staticmethod(register_formatter)
+    unregister_formatter = staticmethod(unregister_formatter)
+    
+    def __init__(self, log_callback: Optional[Callable] = None, json_backend: Optional[str] = None):
         self.log_callback = log_callback
+        self.last_count = 0
+        # orjson/msgspec если установлены, иначе stdlib json
+        self.decoder = get_decoder(json_backend, log_callback)
     
     def log(self, message: str):
         """Логирование сообщений"""
         if self.log_callback:
             self.log_callback(message)
     
-    def convert_eve_to_text(self, input_file: str, output_file: Optional[str] = None) -> Optional[str]:
+    def convert_eve_to_text(self, input_file: str, output_file: Optional[str] = None,
+                            workers: Optional[int] = 1,
+                            event_types: Optional[Collection[str]] = None) -> Optional[str]:
         """
         Преобразует eve.json в читаемый текстовый формат
         
+        Конвертация потоковая: записи читаются, разбираются и пишутся по одной,
+        поэтому потребление памяти не зависит от размера входного файла.
+        
         Args:
             input_file: путь к eve.json
             output_file: путь для сохранения (если None - создается временный файл)
+            workers: число процессов (None - по числу ядер, 1 - без параллелизма)
+            event_types: конвертировать только эти типы событий (None - все)
         """
         if not os.path.exists(input_file):
             self.log(f"❌ Файл не найден: {input_file}")
@@ -33,251 +122,138 @@ class LogConverter:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 output_file = f"/tmp/suricata_logs_{timestamp}.txt"
             
-            # Чтение входного файла
-            with open(input_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            results = []
-            
-            for line in lines:
-                try:
-                    # Парсим JSON строку
-                    entry = json.loads(line.strip())
-                    
-                    # Форматируем запись в текстовый вид
-                    text_entry = self.format_entry_as_text(entry)
-                    if text_entry:
-                        results.append(text_entry)
-                        
-                except json.JSONDecodeError:
-                    continue  # Пропускаем некорректные JSON строки
-                except Exception as e:
-                    self.log(f"Ошибка обработки строки: {e}")
-                    continue
+            if workers is None:
+                workers = os.cpu_count() or 1
             
-            # Сохраняем результаты
-            with open(output_file, 'w', encoding='utf-8') as f:
-                for result in results:
-                    f.write(result + '\n\n')  # Двойной перенос между записями
+            if workers > 1 and os.path.getsize(input_file) >= PARALLEL_MIN_BYTES:
+                count = self.convert_parallel(input_file, output_file, workers, event_types)
+            else:
+                records = self.iter_formatted_records(input_file, event_types)
+                count = self.write_records(records, output_file)
             
-            self.log(f"✅ Конвертировано {len(results)} записей в файл: {output_file}")
+            self.log(f"✅ Конвертировано {count} записей в файл: {output_file}")
             return output_file
             
         except Exception as e:
             self.log(f"❌ Ошибка конвертации: {e}")
             return None
     
-    def format_entry_as_text(self, entry):
-        """Форматирует запись eve.json в читаемый текст"""
+    def convert_parallel(self, input_file: str, output_file: str, workers: int,
+                         event_types: Optional[Collection[str]] = None) -> int:
+        """
+        Параллельная конвертация по шардам в пуле процессов
         
-        # Базовые поля
-        timestamp = entry.get('timestamp', '')
-        event_type = entry.get('event_type', 'unknown')
+        Каждый шард пишется в свой временный файл, затем части склеиваются
+        в исходном порядке, поэтому порядок записей сохраняется. Процессы
+        запускаются через fork и наследуют форматтеры из register_formatter();
+        где fork недоступен, реестр передается в шарды (форматтеры должны
+        сериализоваться pickle).
+        """
+        ranges = split_ranges(input_file, workers * SHARDS_PER_WORKER)
+        self.log(f"⚙️ Параллельная конвертация: {len(ranges)} шардов, процессов: {workers}, JSON: {self.decoder.name}")
         
-        # Форматируем timestamp
+        parts_dir = tempfile.mkdtemp(prefix='suricata_shards_')
         try:
-            if timestamp:
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                formatted_time = dt.strftime('%d/%m/%Y-%H:%M:%S.%f')[:-3]
+            part_files = [os.path.join(parts_dir, f"part_{i:05d}.txt") for i in range(len(ranges))]
+            if 'fork' in multiprocessing.get_all_start_methods():
+                context, formatters = multiprocessing.get_context('fork'), None
             else:
-                formatted_time = 'unknown time'
-        except:
-            formatted_time = timestamp
-        
-        # Обрабатываем разные типы событий
-        if event_type == 'alert':
-            return self.format_alert_text(entry, formatted_time)
-        elif event_type == 'http':
-            return self.format_http_text(entry, formatted_time)
-        elif event_type == 'dns':
-            return self.format_dns_text(entry, formatted_time)
-        elif event_type == 'tls':
-            return self.format_tls_text(entry, formatted_time)
-        elif event_type == 'fileinfo':
-            return self.format_fileinfo_text(entry, formatted_time)
-        elif event_type == 'flow':
-            return self.format_flow_text(entry, formatted_time)
-        elif event_type == 'stats':
-            return self.format_stats_text(entry, formatted_time)
-        else:
-            return self.format_generic_text(entry, formatted_time)
-
-    def format_alert_text(self, entry, timestamp):
-        """Форматирует алерт"""
-        alert = entry.get('alert', {})
-        signature = alert.get('signature', 'Unknown alert')
-        category = alert.get('category', '')
-        severity = alert.get('severity', 3)
-        
-        src_ip = entry.get('src_ip', 'unknown')
-        src_port = entry.get('src_port', '')
-        dest_ip = entry.get('dest_ip', 'unknown')
-        dest_port = entry.get('dest_port', '')
-        proto = entry.get('proto', '').upper()
-        
-        lines = [
-            f"[ALERT {timestamp}]",
-            f"Сигнатура: {signature}",
-            f"От: {src_ip}:{src_port} -> К: {dest_ip}:{dest_port}",
-            f"Протокол: {proto} | Категория: {category} | Важность: {severity}"
-        ]
-        
-        return '\n'.join(lines)
-
-    def format_http_text(self, entry, timestamp):
-        """Форматирует HTTP события"""
-        http = entry.get('http', {})
-        hostname = http.get('hostname', 'unknown host')
-        method = http.get('http_method', 'unknown method')
-        url = http.get('url', '/')
-        status = http.get('status', 'unknown status')
-        length = http.get('length', 0)
-        
-        src_ip = entry.get('src_ip', 'unknown')
-        
-        lines = [
-            f"[HTTP {timestamp}]",
-            f"Запрос: {method} {hostname}{url}",
-            f"Статус: {status} | Размер: {length} байт",
-            f"Источник: {src_ip}"
-        ]
-        
-        return '\n'.join(lines)
-
-    def format_dns_text(self, entry, timestamp):
-        """Форматирует DNS события"""
-        dns = entry.get('dns', {})
-        query = dns.get('rrname', 'unknown query')
-        query_type = dns.get('rrtype', 'unknown type')
-        rcode = dns.get('rcode', 'UNKNOWN')
-        
-        src_ip = entry.get('src_ip', 'unknown')
-        
-        # Преобразуем тип запроса в читаемый вид
-        type_map = {
-            '1': 'A', '2': 'NS', '5': 'CNAME', '6': 'SOA', 
-            '12': 'PTR', '15': 'MX', '16': 'TXT', '28': 'AAAA'
-        }
-        query_type_str = type_map.get(str(query_type), str(query_type))
-        
-        lines = [
-            f"[DNS {timestamp}]",
-            f"Запрос: {query_type_str} для {query}",
-            f"Код ответа: {rcode}",
-            f"Клиент: {src_ip}"
-        ]
-        
-        return '\n'.join(lines)
-
-    def format_tls_text(self, entry, timestamp):
-        """Форматирует TLS события"""
-        tls = entry.get('tls', {})
-        sni = tls.get('sni', '')
-        subject = tls.get('subject', '')
-        version = tls.get('version', '')
-        
-        src_ip = entry.get('src_ip', 'unknown')
-        dest_ip = entry.get('dest_ip', 'unknown')
-        
-        lines = [
-            f"[TLS {timestamp}]",
-            f"SNI: {sni}",
-            f"Сертификат: {subject}",
-            f"Клиент: {src_ip} -> Сервер: {dest_ip}"
-        ]
-        
-        if version:
-            lines.append(f"Версия TLS: {version}")
-        
-        return '\n'.join(lines)
-
-    def format_fileinfo_text(self, entry, timestamp):
-        """Форматирует информацию о файлах"""
-        fileinfo = entry.get('fileinfo', {})
-        filename = fileinfo.get('filename', 'unknown')
-        size = fileinfo.get('size', 0)
-        file_type = fileinfo.get('magic', 'unknown type')
-        
-        src_ip = entry.get('src_ip', 'unknown')
-        dest_ip = entry.get('dest_ip', 'unknown')
-        
-        lines = [
-            f"[FILE {timestamp}]",
-            f"Файл: {filename}",
-            f"Размер: {size} байт | Тип: {file_type}",
-            f"Передача: {src_ip} -> {dest_ip}"
-        ]
-        
-        return '\n'.join(lines)
-
-    def format_flow_text(self, entry, timestamp):
-        """Форматирует flow события"""
-        flow = entry.get('flow', {})
-        
-        src_ip = entry.get('src_ip', 'unknown')
-        src_port = entry.get('src_port', '')
-        dest_ip = entry.get('dest_ip', 'unknown')
-        dest_port = entry.get('dest_port', '')
-        proto = entry.get('proto', '').upper()
-        
-        lines = [
-            f"[FLOW {timestamp}]",
-            f"Поток: {src_ip}:{src_port} -> {dest_ip}:{dest_port}",
-            f"Протокол: {proto}"
-        ]
-        
-        # Добавляем информацию о состоянии потока
-        if flow:
-            state = flow.get('state', '')
-            reason = flow.get('reason', '')
-            if state:
-                lines.append(f"Состояние: {state}")
-            if reason:
-                lines.append(f"Причина завершения: {reason}")
-        
-        return '\n'.join(lines)
-
-    def format_stats_text(self, entry, timestamp):
-        """Форматирует статистику"""
-        stats = entry.get('stats', {})
-        
-        lines = [f"[STATS {timestamp}]"]
-        
-        # Основная статистика
-        if 'uptime' in stats:
-            lines.append(f"Время работы: {stats['uptime']} сек")
-        
-        # Статистика захвата
-        capture = stats.get('capture', {})
-        if capture:
-            kernel_packets = capture.get('kernel_packets', 0)
-            kernel_drops = capture.get('kernel_drops', 0)
-            errors = capture.get('errors', 0)
+                context, formatters = multiprocessing.get_context(), dict(FORMATTERS)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                counts = list(executor.map(
+                    _convert_shard,
+                    [input_file] * len(ranges),
+                    [start for start, _ in ranges],
+                    [end for _, end in ranges],
+                    part_files,
+                    [event_types] * len(ranges),
+                    [self.decoder.name] * len(ranges),
+                    [formatters] * len(ranges)
+                ))
             
-            lines.append(f"Пакеты: {kernel_packets:,} | Потери: {kernel_drops} | Ошибки: {errors}")
+            with open(output_file, 'wb') as out:
+                for part_file in part_files:
+                    with open(part_file, 'rb') as part:
+                        shutil.copyfileobj(part, out)
+            
+            return sum(counts)
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+    
+    def write_records(self, records: Iterable[str], output_file: str) -> int:
+        """Потоковая запись отформатированных записей, возвращает их количество"""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(record + '\n\n')  # Двойной перенос между записями
+                count += 1
+        return count
+    
+    def iter_entries(self, input_file: str,
+                     event_types: Optional[Collection[str]] = None) -> Iterator[dict]:
+        """Генератор разобранных записей eve.json (по одной строке за раз)"""
+        with open(input_file, 'rb') as f:
+            yield from self.iter_decoded(f, event_types)
+    
+    def iter_decoded(self, lines: Iterable[bytes],
+                     event_types: Optional[Collection[str]] = None) -> Iterator[dict]:
+        """
+        Разбор произвольного потока строк eve.json
         
-        # Статистика детекта
-        detect = stats.get('detect', {})
-        if detect:
-            alerts = detect.get('alert', 0)
-            lines.append(f"Обнаружено алертов: {alerts}")
+        Если задан event_types, неподходящие строки отсекаются байтовым
+        префильтром до json.loads.
+        """
+        if event_types is not None:
+            wanted = frozenset(event_types)
+            accept = make_event_filter(wanted)
+        
+        loads = self.decoder.loads
+        errors = self.decoder.errors
+        
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if event_types is not None and not accept(line):
+                continue
+            try:
+                entry = loads(line)
+            except errors:
+                continue  # Пропускаем некорректные JSON строки
+            if event_types is not None and (not isinstance(entry, dict)
+                                            or entry.get('event_type', 'unknown') not in wanted):
+                continue
+            yield entry
+    
+    def iter_formatted_records(self, input_file: str,
+                               event_types: Optional[Collection[str]] = None) -> Iterator[str]:
+        """Генератор текстовых записей без промежуточного файла"""
+        with open(input_file, 'rb') as f:
+            yield from self.iter_formatted_lines(f, event_types)
+    
+    def iter_formatted_lines(self, lines: Iterable[bytes],
+                             event_types: Optional[Collection[str]] = None) -> Iterator[str]:
+        """Генератор текстовых записей из потока строк eve.json"""
+        for entry in self.iter_decoded(lines, event_types):
+            try:
+                # Форматируем запись в текстовый вид
+                text_entry = self.format_entry_as_text(entry)
+                if text_entry:
+                    yield text_entry
+            except Exception as e:
+                self.log(f"Ошибка обработки строки: {e}")
+                continue
+    
+    def format_entry_as_text(self, entry):
+        """Форматирует запись eve.json в читаемый текст"""
         
-        return '\n'.join(lines)
-
-    def format_generic_text(self, entry, timestamp):
-        """Форматирует неизвестные типы событий"""
+        # Базовые поля
+        timestamp = entry.get('timestamp', '')
         event_type = entry.get('event_type', 'unknown')
         
-        lines = [f"[{event_type.upper()} {timestamp}]"]
-        
-        # Добавляем основные поля, которые есть в большинстве событий
-        src_ip = entry.get('src_ip')
-        dest_ip = entry.get('dest_ip')
-        
-        if src_ip and dest_ip:
-            lines.append(f"От: {src_ip} -> К: {dest_ip}")
-        
-        # Для неизвестных типов просто показываем тип события
-        lines.append(f"Тип события: {event_type}")
+        # Форматируем timestamp (быстрый путь с кэшем для формата Suricata)
+        formatted_time = format_timestamp(timestamp)
         
-        return '\n'.join(lines)
+        # Выбираем форматтер по типу события из реестра
+        formatter = FORMATTERS.get(event_type, format_generic)
+        return formatter(entry, formatted_time)
@@ -1,16 +1,31 @@
 #!/usr/bin/env python3
+import time
+import threading
 from .log_converter import LogConverter
 from .log_sender import LogSender
 from .log_collector import LogCollector
+from .log_watcher import LogWatcher, LOG_DIRECTORIES, LOG_FILE_PREFIXES
+from .log_batch import DEFAULT_MEMORY_BUDGET
+from .upload_engine import AsyncUploadEngine
+from .endpoint_pool import parse_endpoints
+from .spool_queue import SpoolQueue
+from .scheduler import PipelineScheduler
 
 class LogManager:
     """Основной менеджер для управления отправкой логов"""
     
-    def __init__(self, log_callback=None):
-        self.sender = LogSender(log_callback)
+    def __init__(self, log_callback=None, pool_size: int = 4, idle_timeout: float = 60.0):
+        # Один отправитель (и его keep-alive сессии) на все время работы
+        self.sender = LogSender(log_callback, pool_size=pool_size, idle_timeout=idle_timeout)
         self.collector = LogCollector(log_callback)
         self.is_sending = False
+        # Отправка запущена и еще не завершила очистку (очередь, отправки в полете)
+        self._active = False
+        self.watcher = None
         self.log_callback = log_callback
+        self.scheduler = PipelineScheduler(log_callback)
+        # Сбор и нарезка пачек (collect/flush) не должны пересекаться
+        self._lock = threading.Lock()
     
     def log(self, message: str):
         """Логирование сообщений"""
@@ -18,78 +33,234 @@ class LogManager:
             self.log_callback(message)
     
     def start_log_sending(self, config: dict, progress_callback=None):
-        """Запуск автоматической отправки логов"""
-        if self.is_sending:
+        """
+        Запуск автоматической отправки логов
+        
+        Работа разбита на именованные конвейеры планировщика:
+            collect - сбор в очередь по интервалу (или по событиям watch);
+            watch - ожидание изменений логов (режим event_driven);
+            flush - отправка незаполненных пачек по истечении их задержки;
+            send - передача пачек из очереди в отправку.
+        Между запусками конвейеры спят на событиях, остановка мгновенная.
+        """
+        if self.is_sending or self._active:
             self.log("Отправка уже запущена")
             return False
         
         self.is_sending = True
+        self._active = True
+        self.sender.resume()
         
-        def sending_thread():
-            file_count = config.get('file_count', 1)
-            interval = config.get('send_interval', 60)
-            logs_per_file = config.get('logs_per_file', 10)
-            selected_systems = config.get('selected_systems', [])
-            endpoint_url = config.get('endpoint_url', '')
-            
-            self.log(f"Запуск отправки {file_count} файлов")
+        file_count = config.get('file_count', 1)
+        interval = config.get('send_interval', 60)
+        selected_systems = config.get('selected_systems', [])
+        event_types = config.get('event_types') or None
+        memory_budget = config.get('memory_budget', DEFAULT_MEMORY_BUDGET)
+        try:
+            # Один или несколько серверов анализа через запятую
+            self.sender.set_endpoints(config.get('endpoint_url', ''), config.get('endpoint_policy', 'round_robin'))
+        except ValueError as e:
+            self.log(f"❌ {e}")
+            self.is_sending = self._active = False
+            return False
+        self.collector.tail_count = config.get('tail_lines', self.collector.tail_count)
+        if 'compression' in config:
+            self.sender.compression = config['compression'] or None
+            self.sender.compression_level = config.get('compression_level')
+        # Пачка уходит по первому из порогов: объем, число записей или задержка
+        self.collector.configure_batching(config.get('batch_max_bytes', 1024 * 1024),
+                                          config.get('batch_max_records', 5000),
+                                          config.get('batch_max_latency', 5.0), memory_budget)
+        
+        # До max_in_flight отправок одновременно
+        engine = AsyncUploadEngine(self.sender, config.get('max_in_flight', 4), self.log_callback)
+        # Собранные пачки сначала попадают в очередь на диске и переживают сбои и перезапуски
+        spool = SpoolQueue(config.get('spool_dir'), self.log_callback)
+        
+        # Режим событий: ждем роста/ротации логов вместо фиксированного интервала
+        directories = [LOG_DIRECTORIES[s] for s in selected_systems if s in LOG_DIRECTORIES]
+        if config.get('event_driven') and directories:
+            self.watcher = LogWatcher(directories, self.log_callback, name_prefixes=LOG_FILE_PREFIXES)
+            self.log(f"👁 Отправка по событиям ({self.watcher.mode}): {', '.join(self.watcher.directories)}")
+        
+        def collect(run: int):
+            self.log(f"Отправка файла {run + 1}/{file_count}...")
+            with self._lock:
+                # Собираем пачки в очередь; курсор источника сохраняется после fsync очереди
+                self._spool_batches(spool, self.collector.collect_batches(selected_systems, event_types))
+            self.scheduler.trigger('send')
+            self.scheduler.trigger('flush')  # Пересчет задержки незаполненной пачки
+            if progress_callback:
+                progress_callback(run + 1, file_count)
+        
+        def flush(run: int):
+            with self._lock:
+                self._spool_batches(spool, self.collector.poll_batches())
+            self.scheduler.trigger('send')
+        
+        retry_at = 0.0
+        
+        def send(run: int):
+            nonlocal retry_at
+            # После неудачи очередь повторяется не раньше, чем сервер может подняться
+            backoff = retry_at - time.monotonic()
+            if backoff > 0:
+                engine.acquire(0)  # Подтверждаем завершившиеся отправки
+                return backoff
+            rewinds = spool.rewinds
+            # Завершение каждой отправки будит конвейер: подтверждение и следующая пачка
+            self._send_spooled(spool, engine, memory_budget, block=False, wait_slots=True,
+                               on_done=lambda _future: self.scheduler.trigger('send'))
+            if spool.rewinds != rewinds:
+                retry_at = time.monotonic() + self.sender.reset_timeout
+                return self.sender.reset_timeout
+            return None
+        
+        watcher = self.watcher
+        
+        def watch(run: int):
+            if watcher.wait():
+                self.scheduler.trigger('collect')
+                return 0
+            # Пустой результат без таймаута - watcher закрыт
+            return False
+        
+        def on_wait(run: int, delay: float):
+            if progress_callback:
+                progress_callback(run, file_count, int(delay))
+        
+        def finish(_pipeline):
+            # Конвейер collect завершен (все запуски сделаны или остановка)
+            for name in ('watch', 'flush', 'send'):
+                self.scheduler.cancel(name)
+            if self.watcher:
+                self.watcher.close()
+            for name in ('watch', 'flush', 'send'):
+                pipeline = self.scheduler.get(name)
+                if pipeline:
+                    pipeline.join()
             
-            for i in range(file_count):
-                if not self.is_sending:
-                    break
-                
-                self.log(f"Отправка файла {i+1}/{file_count}...")
-                
-                # Создаем и отправляем файл
-                log_file = self.collector.collect_real_logs(selected_systems, logs_per_file)
-                if log_file:
-                    # Для Suricata автоматически конвертируем в текст
-                    convert_suricata = 'suricata' in selected_systems
-                    success = self.sender.send_file_improved(log_file, endpoint_url, convert_suricata)
-                    
-                    # Очищаем временный файл
-                    try:
-                        import os
-                        os.remove(log_file)
-                    except:
-                        pass
-                
-                # Обновляем прогресс
-                if progress_callback:
-                    progress_callback(i + 1, file_count)
-                
-                # Ждем перед следующей отправкой
-                if i < file_count - 1 and self.is_sending:
-                    import time
-                    for sec in range(interval):
-                        if not self.is_sending:
-                            break
-                        time.sleep(1)
-                        if progress_callback:
-                            progress_callback(i + 1, file_count, interval - sec)
+            with self._lock:
+                self._spool_batches(spool, self.collector.flush_batches())
+            spool.sync()
+            if self.is_sending:
+                # Дочищаем очередь; при отказе сервера остаток уйдет при следующем запуске
+                self._send_spooled(spool, engine, memory_budget, block=True)
+            engine.close()
+            spool.close()
+            self._log_stats(engine)
+            self._log_retry_metrics()
+            # Сессии, фоновые проверки серверов и поток идентификации хоста;
+            # тест соединения и следующий запуск создадут их заново
+            self.sender.close()
+            self.watcher = None
             
             self.is_sending = False
+            self._active = False
             self.log("Автоматическая отправка завершена")
             if progress_callback:
                 progress_callback(file_count, file_count, 0, completed=True)
         
-        import threading
-        thread = threading.Thread(target=sending_thread, daemon=True)
-        thread.start()
+        self.log(f"Запуск отправки {file_count} файлов")
+        self.scheduler.add('send', send)
+        self.scheduler.add('flush', flush, interval=self.collector.time_until_flush, first_delay=None)
+        if self.watcher:
+            self.scheduler.add('watch', watch)
+            self.scheduler.add('collect', collect, max_runs=file_count, on_finish=finish)
+        else:
+            self.scheduler.add('collect', collect, interval=interval, max_runs=file_count,
+                               on_wait=on_wait, on_finish=finish)
         return True
     
+    def _log_stats(self, engine: AsyncUploadEngine):
+        """Итоговая статистика отправки"""
+        stats = engine.stats()
+        if 'latency_avg' in stats:
+            self.log(f"⏱ Задержка отправки: среднее {stats['latency_avg']:.2f} сек, "
+                     f"p95 {stats['latency_p95']:.2f} сек, максимум {stats['latency_max']:.2f} сек")
+        for source, batch_stats in self.collector.batch_stats().items():
+            if batch_stats['batches']:
+                self.log(f"📦 Пачки {source}: {batch_stats['batches']}, в среднем {batch_stats['avg_records']:.0f} записей / "
+                         f"{batch_stats['avg_bytes']:.0f} байт, причины: {batch_stats['flush_reasons']}")
+    
+    def _log_retry_metrics(self):
+        """Счетчики повторов и предохранителей отправителя (с запуска агента)"""
+        metrics = self.sender.get_metrics()
+        self.log(f"🔁 Запросов: {metrics['requests']}, успешно: {metrics['successes']}, "
+                 f"неудач: {metrics['failures']}, повторов: {metrics['retries']}, "
+                 f"размыканий предохранителя: {metrics['trips']}, "
+                 f"отклонено предохранителем: {metrics['short_circuited']}")
+        open_breakers = [key for key, state in metrics.get('breakers', {}).items() if state != 'closed']
+        if open_breakers:
+            self.log(f"⛔ Предохранитель не замкнут: {', '.join(open_breakers)}")
+    
+    def _spool_batches(self, spool: SpoolQueue, batches):
+        """Запись закрытых пачек в очередь"""
+        failed = False
+        for batch in batches:
+            if not failed:
+                try:
+                    spool.put(batch, on_durable=batch.commit)
+                except OSError as e:
+                    self.log(f"❌ Ошибка записи в очередь: {e}")
+                    # Эта и следующие пачки будут собраны заново после отката источника
+                    batch.rollback()
+                    self.collector.discard_pending()
+                    failed = True
+            batch.close()
+    
+    def _send_spooled(self, spool: SpoolQueue, engine: AsyncUploadEngine, memory_budget: int,
+                      block: bool, wait_slots: bool = False, on_done=None):
+        """
+        Передача пачек из очереди в отправку
+        
+        Без wait_slots - только на свободные места, с wait_slots - до
+        опустошения очереди, ожидая освобождения мест; block дополнительно
+        дожидается завершения всех отправок. Остановка при откате очереди
+        (неудачной отправке), чтобы не повторять одну и ту же пачку без паузы.
+        on_done вызывается по завершении каждой отправки (в потоке отправки).
+        """
+        rewinds = spool.rewinds
+        wait = block or wait_slots
+        while self.is_sending and engine.acquire(None if wait else 0):
+            if spool.rewinds != rewinds:
+                break
+            batch = spool.get_batch(memory_budget)
+            if batch is None:
+                break
+            future = engine.submit(batch)
+            if on_done:
+                future.add_done_callback(on_done)
+        if block:
+            engine.drain()
+    
     def stop_log_sending(self):
         """Остановка отправки логов"""
         self.is_sending = False
+        self.sender.interrupt()
+        self.scheduler.cancel()
+        if self.watcher:
+            self.watcher.close()
+        self._stop_endpoint_probes()
         self.log("Остановка отправки...")
     
+    def _stop_endpoint_probes(self):
+        """Остановка фоновых проверок серверов анализа"""
+        if self.sender.endpoints is not None:
+            self.sender.endpoints.stop()
+    
     def send_test_file(self, endpoint_url: str, logs_per_file: int = 10) -> bool:
-        """Отправка тестового файла"""
+        """Отправка тестового файла (на каждый сервер, если их несколько)"""
         self.log("Создание и отправка тестового файла...")
+        if not self._active:
+            # Остановка предыдущей отправки не должна обрывать повторы теста
+            self.sender.resume()
         
         test_file = self.collector.create_test_log_file(logs_per_file)
         if test_file:
-            success = self.sender.send_file_improved(test_file, endpoint_url)
+            success = True
+            for url in parse_endpoints(endpoint_url):
+                success = self.sender.send_file_improved(test_file, url) and success
             # Удаляем временный файл
             try:
                 import os
@@ -100,10 +271,16 @@ class LogManager:
         return False
     
     def test_connection(self, endpoint_url: str) -> bool:
-        """Тестирование соединения с сервером"""
-        return self.sender.test_server_connection(endpoint_url)
+        """Тестирование соединения с сервером (со всеми, если их несколько)"""
+        urls = parse_endpoints(endpoint_url)
+        results = {url: self.sender.test_server_connection(url) for url in urls}
+        if len(urls) > 1:
+            for url, ok in results.items():
+                self.log(f"{'✅' if ok else '❌'} {url}")
+        return bool(results) and all(results.values())
     
-    def convert_suricata_logs(self, input_file: str, output_file: str = None) -> str:
+    def convert_suricata_logs(self, input_file: str, output_file: str = None, workers: int = 1,
+                              event_types: list = None) -> str:
         """Прямая конвертация файла Suricata"""
         converter = LogConverter(self.log_callback)
-        return converter.convert_eve_to_text(input_file, output_file)
+        return converter.convert_eve_to_text(input_file, output_file, workers=workers, event_types=event_types)
@@ -1,15 +1,51 @@
 #!/usr/bin/env python3
 import os
+import time
+import threading
 import requests
-import subprocess
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict, BinaryIO
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from .host_identity import HostIdentity
+from .upload_compression import CompressionStats, multipart_upload, available_algorithms
+from .log_batch import LogBatch
+from .retry_policy import RetryPolicy, CircuitBreaker, RetryMetrics
+from .endpoint_pool import EndpointPool
+
+USER_AGENT = 'SystemSecurityAgent/1.0'
 
 class LogSender:
     """Класс для отправки логов на сервер"""
     
-    def __init__(self, log_callback: Optional[Callable] = None):
+    def __init__(self, log_callback: Optional[Callable] = None, pool_size: int = 4,
+                 idle_timeout: float = 60.0, compression: Optional[str] = None,
+                 compression_level: Optional[int] = None, retry_policy: Optional[RetryPolicy] = None,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
         self.log_callback = log_callback
+        # Повторы при сетевых ошибках и 429/5xx, предохранитель на каждый endpoint
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.metrics = RetryMetrics()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._interrupted = threading.Event()
+        # Набор серверов анализа (set_endpoints)
+        self.endpoints: Optional[EndpointPool] = None
+        # Потоковое сжатие файла при отправке: None, 'gzip' или 'zstd'
+        self.compression = compression
+        self.compression_level = compression_level
+        # Keep-alive сессии по endpoint'ам (схема + хост + порт)
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[str, requests.Session] = {}
+        self._last_used: Dict[str, float] = {}
+        # Число запросов, выполняющихся на сессии сейчас
+        self._in_use: Dict[str, int] = {}
+        self._sessions_lock = threading.Lock()
+        # IP и имя хоста определяются локально и кэшируются, без запроса на каждую отправку
+        self.identity = HostIdentity(log_callback)
         
     def log(self, message: str):
         """Логирование сообщений"""
@@ -18,6 +54,89 @@ class LogSender:
         else:
             print(f"{datetime.now().strftime('%H:%M:%S')} - {message}")
     
+    @contextmanager
+    def use_session(self, url: str):
+        """
+        Keep-alive сессия с пулом соединений для endpoint'а на время запроса
+        
+        Сессия, простаивавшая дольше idle_timeout, закрывается и создается
+        заново, чтобы не держать сокеты, которые сервер уже мог закрыть.
+        Сессия, на которой идут запросы других потоков, не закрывается.
+        """
+        key = self._endpoint_key(url)
+        
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            idle = time.monotonic() - self._last_used.get(key, 0.0)
+            if session is not None and not self._in_use.get(key) and idle > self.idle_timeout:
+                session.close()
+                session = None
+            
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = USER_AGENT
+                self._sessions[key] = session
+            
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        
+        try:
+            yield session
+        finally:
+            with self._sessions_lock:
+                self._in_use[key] -= 1
+                # Простой считается с окончания последнего запроса
+                self._last_used[key] = time.monotonic()
+    
+    @staticmethod
+    def _endpoint_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+    
+    def get_breaker(self, url: str) -> CircuitBreaker:
+        """Предохранитель endpoint'а"""
+        key = self._endpoint_key(url)
+        with self._sessions_lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[key] = breaker
+            return breaker
+    
+    def get_metrics(self) -> dict:
+        """Счетчики отправок и состояние предохранителей по endpoint'ам"""
+        metrics = self.metrics.as_dict()
+        with self._sessions_lock:
+            metrics['breakers'] = {key: breaker.state for key, breaker in self._breakers.items()}
+        return metrics
+    
+    def interrupt(self):
+        """Прерывание ожидания между повторами (остановка отправки)"""
+        self._interrupted.set()
+    
+    def resume(self):
+        """
+        Сброс прерывания перед новым запуском отправки
+        
+        Вызывается один раз на запуск, а не на каждую отправку: иначе новая
+        отправка стирала бы остановку, которую ждут параллельные повторы.
+        """
+        self._interrupted.clear()
+    
+    def close(self):
+        """Закрытие всех сессий и их соединений"""
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._last_used.clear()
+        self.interrupt()
+        self.identity.stop()
+        if self.endpoints is not None:
+            self.endpoints.stop()
+    
     def send_file_improved(self, file_path: str, url: str, convert_suricata: bool = True) -> bool:
         """Улучшенная отправка файла с возможностью конвертации"""
         if not os.path.exists(file_path):
@@ -27,7 +146,9 @@ class LogSender:
         try:
             # Если это файл Suricata и нужно конвертировать
             final_file_path = file_path
-            if convert_suricata and ('suricata' in file_path.lower() or 'eve.json' in file_path):
+            # Уже сконвертированный текст (suricata_logs_*.txt) повторно не обрабатываем
+            is_eve_json = file_path.endswith('.json') and ('suricata' in file_path.lower() or 'eve.json' in file_path)
+            if convert_suricata and is_eve_json:
                 from .log_converter import LogConverter
                 converter = LogConverter(self.log_callback)
                 self.log("🔄 Конвертация Suricata логов в текстовый формат...")
@@ -38,100 +159,173 @@ class LogSender:
                 else:
                     self.log("⚠️ Не удалось конвертировать файл, отправляем оригинал")
         
-            # Получаем дополнительные параметры
-            client_ip = self._get_client_ip()
-            hostname = self._get_hostname()
             source = self._detect_log_source(file_path)
-        
-            # Отправка файла с дополнительными параметрами
             with open(final_file_path, 'rb') as f:
-                files = {
-                    'file': (os.path.basename(final_file_path), f, 'text/plain'),
-                    'client_ip': (None, client_ip),
-                    'hostname': (None, hostname),
-                    'source': (None, source)
-                }
-                headers = {'User-Agent': 'SystemSecurityAgent/1.0'}
-            
-                response = requests.post(url, files=files, headers=headers, timeout=300)
+                success = self._upload(f, final_file_path, source, url)
             
-                if response.status_code in [200, 201]:
-                    self.log(f"✅ Файл {os.path.basename(final_file_path)} отправлен")
-                    self.log(f"   📝 Параметры: client_ip={client_ip}, hostname={hostname}, source={source}")
-                
-                    # Удаляем временный сконвертированный файл если он создавался
-                    if final_file_path != file_path and os.path.exists(final_file_path):
-                        os.remove(final_file_path)
-                
-                    return True
-                else:
-                    self.log(f"❌ HTTP {response.status_code}: {response.text[:100]}")
-                    return False
+            # Удаляем временный сконвертированный файл если он создавался
+            if final_file_path != file_path and os.path.exists(final_file_path):
+                os.remove(final_file_path)
+            return success
                     
-        except requests.exceptions.RequestException as e:
-            self.log(f"❌ Ошибка сети: {e}")
-            return self._send_file_curl_fallback(file_path, url)
         except Exception as e:
             self.log(f"❌ Неожиданная ошибка: {e}")
             return False
     
-    def _send_file_curl_fallback(self, file_path: str, url: str) -> bool:
-        """Fallback метод отправки через curl"""
-        try:
-            client_ip = self._get_client_ip()
-            hostname = self._get_hostname()
-            source = self._detect_log_source(file_path)
-
-            command = [
-                'curl', '-v', '-X', 'POST', 
-                '-F', f'file=@{file_path}',
-                '-F', f'client_ip={client_ip}',
-                '-F', f'hostname={hostname}',
-                '-F', f'source={source}',
-                '--connect-timeout', '30', 
-                '--max-time', '300', 
-                url
-            ]
-
-            result = subprocess.run(command, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                self.log("✅ Файл отправлен (через curl)")
+    def set_endpoints(self, urls, policy: str = 'round_robin', probe_interval: float = 30.0) -> EndpointPool:
+        """
+        Настройка набора серверов анализа для send_batch() без явного url
+        
+        Args:
+            urls: список URL или строка через запятую
+            policy: round_robin, least_outstanding, failover или broadcast
+            probe_interval: период фоновой проверки серверов (сек)
+        """
+        if self.endpoints is not None:
+            self.endpoints.stop()
+        self.endpoints = EndpointPool(urls, policy, self.test_server_connection, probe_interval, self.log_callback)
+        # Фоновые проверки нужны только когда есть из чего выбирать
+        if len(self.endpoints.urls) > 1:
+            self.endpoints.start()
+        return self.endpoints
+    
+    def send_batch(self, batch: LogBatch, url: Optional[str] = None) -> bool:
+        """
+        Отправка пачки из памяти без промежуточных файлов
+        
+        Без url пачка уходит на серверы из set_endpoints() по их политике:
+        при отказе выбранного сервера пробуются остальные. Для broadcast
+        пачка отправляется на каждый сервер и считается доставленной, только
+        если ее приняли все; при повторе неудачной пачки серверы, уже
+        принявшие ее, получат копию еще раз. Подтверждение источника пачки
+        (commit/rollback) остается за вызывающим.
+        """
+        if url is not None:
+            return self._send_batch_to(batch, url)
+        if self.endpoints is None:
+            self.log("❌ Не задан URL сервера")
+            return False
+        
+        pool = self.endpoints
+        broadcast = pool.policy == 'broadcast'
+        # Для broadcast - все приняли, для остальных - хотя бы один
+        delivered = broadcast
+        for candidate in pool.candidates():
+            pool.begin(candidate)
+            success = self._send_batch_to(batch, candidate)
+            pool.finish(candidate, success)
+            if broadcast:
+                delivered = delivered and success
+            elif success:
                 return True
-            else:
-                self.log(f"❌ Ошибка curl: {result.stderr}")
-                return False
-                
+        return delivered
+    
+    def _send_batch_to(self, batch: LogBatch, url: str) -> bool:
+        try:
+            return self._upload(batch.open(), batch.filename, batch.source, url)
         except Exception as e:
-            self.log(f"❌ Ошибка curl fallback: {e}")
+            self.log(f"❌ Неожиданная ошибка: {e}")
             return False
-
-    def _get_client_ip(self) -> str:
-        """Получает IP адрес клиента"""
-        try:
-            # Пробуем получить внешний IP
-            response = requests.get('https://api.ipify.org', timeout=5)
-            if response.status_code == 200:
-                return response.text.strip()
-        except:
-            pass
     
-        # Fallback: получаем локальный IP
-        try:
-            import socket
-            hostname = socket.gethostname()
-            local_ip = socket.gethostbyname(hostname)
-            return local_ip
-        except:
-            return "unknown"
+    def _upload(self, fileobj: BinaryIO, filename: str, source: str, url: str) -> bool:
+        """
+        Отправка с повторами по RetryPolicy и учетом предохранителя endpoint'а
+        
+        Повторяются ошибки соединения, таймауты и ответы 429/5xx; остальные
+        ошибки и ответы окончательны. Тело каждой попытки читается заново с
+        исходной позиции.
+        """
+        policy = self.retry_policy
+        breaker = self.get_breaker(url)
+        start = fileobj.tell()
+        
+        for attempt in range(1, policy.max_attempts + 1):
+            if not breaker.allow():
+                self.metrics.inc('short_circuited')
+                self.log(f"⛔ Сервер {self._endpoint_key(url)} недоступен, "
+                         f"повтор через {breaker.remaining():.0f} сек")
+                return False
+            
+            self.metrics.inc('requests')
+            if attempt > 1:
+                self.metrics.inc('retries')
+            fileobj.seek(start)
+            response = None
+            try:
+                response = self._post_file(fileobj, filename, source, url)
+            except requests.exceptions.RequestException as e:
+                error = f"ошибка сети: {e}"
+                if not policy.should_retry_error(e):
+                    # Ошибка в самом запросе (URL, схема, заголовки) - повтор не поможет
+                    breaker.release()
+                    self.metrics.inc('failures')
+                    self.log(f"❌ Не удалось отправить {os.path.basename(filename)}: {e}")
+                    return False
+            except BaseException:
+                # Ошибка до ответа сервера (чтение тела, сжатие): пробная попытка
+                # полуоткрытого предохранителя не должна остаться занятой
+                breaker.release()
+                raise
+            else:
+                if response.status_code in [200, 201]:
+                    breaker.record_success()
+                    self.metrics.inc('successes')
+                    return True
+                error = f"HTTP {response.status_code}: {response.text[:100]}"
+                if not policy.should_retry(response.status_code):
+                    # Сервер жив и ответил окончательно - повтор не поможет
+                    breaker.record_success()
+                    self.metrics.inc('failures')
+                    self.log(f"❌ {error}")
+                    return False
+            
+            if breaker.record_failure():
+                self.metrics.inc('trips')
+                self.log(f"⛔ Предохранитель {self._endpoint_key(url)} разомкнут на {breaker.reset_timeout:.0f} сек")
+                break
+            
+            if attempt == policy.max_attempts:
+                break
+            delay = policy.delay(attempt, response)
+            self.log(f"⚠️ Попытка {attempt}/{policy.max_attempts}: {error}, повтор через {delay:.1f} сек")
+            if self._interrupted.wait(delay):
+                break
+        
+        self.metrics.inc('failures')
+        self.log(f"❌ Не удалось отправить {os.path.basename(filename)}: {error}")
+        return False
+    
+    def _post_file(self, fileobj: BinaryIO, filename: str, source: str, url: str) -> requests.Response:
+        """Одна потоковая отправка содержимого с дополнительными параметрами"""
+        client_ip = self._get_client_ip(url)
+        hostname = self._get_hostname()
+        
+        algorithm = self.compression
+        if algorithm and algorithm not in available_algorithms():
+            self.log(f"⚠️ Сжатие {algorithm} недоступно, используется gzip")
+            algorithm = 'gzip'
+        stats = CompressionStats(algorithm) if algorithm else None
+        
+        fields = {'client_ip': client_ip, 'hostname': hostname, 'source': source}
+        body, headers = multipart_upload(fileobj, filename, fields, algorithm,
+                                         self.compression_level, stats)
+        with self.use_session(url) as session:
+            response = session.post(url, data=body, headers=headers, timeout=300)
+        
+        if response.status_code in [200, 201]:
+            self.log(f"✅ Файл {os.path.basename(filename)} отправлен")
+            if stats:
+                self.log(f"   {stats.report()}")
+            self.log(f"   📝 Параметры: client_ip={client_ip}, hostname={hostname}, source={source}")
+        return response
+    
+    def _get_client_ip(self, url: Optional[str] = None) -> str:
+        """IP адрес клиента (исходящий адрес к url) из кэша идентификации хоста"""
+        return self.identity.get(url)[0]
 
     def _get_hostname(self) -> str:
-        """Получает имя хоста"""
-        try:
-            import socket
-            return socket.gethostname()
-        except:
-            return "unknown"
+        """Имя хоста из кэша идентификации хоста"""
+        return self.identity.get()[1]
 
     def _detect_log_source(self, file_path: str) -> str:
         """Определяет источник лога на основе имени файла"""
@@ -154,7 +348,8 @@ class LogSender:
         """Тестирование соединения с сервером"""
         try:
             test_url = url.replace('/api/analyze_file', '')
-            response = requests.get(test_url, timeout=10)
+            with self.use_session(test_url) as session:
+                response = session.get(test_url, timeout=10)
             return response.status_code == 200
         except:
             return False
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from typing import Optional, Callable, Dict, Iterable, Set, Tuple
+
+# Флаги inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+# Рост файла и ротация (rename/create/delete)
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Каталоги логов по системам
+LOG_DIRECTORIES = {
+    'suricata': '/var/log/suricata',
+    'clamav': '/var/log/clamav',
+}
+
+# Файлы, изменения которых будят конвейер (префиксы, чтобы ловить eve.json.1 и т.п.)
+LOG_FILE_PREFIXES = ('eve.json', 'fast.log', 'clamav.log', 'freshclam.log')
+
+def _load_libc():
+    """libc с функциями inotify или None (не Linux / нет поддержки)"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class LogWatcher:
+    """
+    Ожидание изменений в каталогах логов через inotify
+
+    Поток спит в select() до роста или ротации файла, поэтому на простаивающем
+    хосте CPU не расходуется. Без inotify (не Linux, исчерпан лимит watch'ей)
+    используется опрос os.stat с интервалом poll_interval. Каталог, которого
+    еще нет или который удален/перемещен, проверяется с тем же интервалом, и
+    watch добавляется заново, когда каталог появится.
+    """
+
+    def __init__(self, directories: Iterable[str], log_callback: Optional[Callable] = None,
+                 poll_interval: float = 2.0, debounce: float = 0.2,
+                 name_prefixes: Optional[Tuple[str, ...]] = None):
+        self.directories = list(dict.fromkeys(directories))
+        self.log_callback = log_callback
+        # Учитываются только файлы с этими префиксами (None - все файлы)
+        self.name_prefixes = tuple(name_prefixes) if name_prefixes else None
+        self.poll_interval = poll_interval
+        # Пауза после первого события, чтобы собрать пачку записей целиком
+        self.debounce = debounce
+
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._waiting = False
+        self._wake_r, self._wake_w = os.pipe()
+        self._fd = None
+        self._libc = None
+        self._watches: Dict[int, str] = {}
+        # Каталоги без watch'а: еще не созданы или удалены/перемещены
+        self._missing: Set[str] = set()
+        self._snapshot: Dict[str, Tuple[int, int, float]] = {}
+
+        self._init_inotify()
+        if self._fd is None:
+            self._snapshot = self._scan()
+
+    @property
+    def mode(self) -> str:
+        """Текущий режим: 'inotify' или 'polling'"""
+        return 'inotify' if self._fd is not None else 'polling'
+
+    def log(self, message: str):
+        """Логирование сообщений"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def _init_inotify(self):
+        """Инициализация inotify и добавление watch'ей на каталоги"""
+        libc = _load_libc()
+        if libc is None:
+            self.log("⚠️ inotify недоступен, используется опрос файлов")
+            return
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            self.log(f"⚠️ inotify_init1: {os.strerror(ctypes.get_errno())}, используется опрос файлов")
+            return
+
+        self._libc = libc
+        for directory in self.directories:
+            error = self._add_watch(fd, directory)
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                self._missing.add(directory)
+            elif error:
+                self.log(f"⚠️ inotify_add_watch {directory}: {os.strerror(error)}, используется опрос файлов")
+                os.close(fd)
+                self._watches.clear()
+                self._missing.clear()
+                return
+
+        self._fd = fd
+
+    def _add_watch(self, fd: int, directory: str) -> int:
+        """Добавление watch'а на каталог; возвращает errno (0 - успешно)"""
+        wd = self._libc.inotify_add_watch(fd, directory.encode(), WATCH_MASK)
+        if wd < 0:
+            return ctypes.get_errno()
+        self._watches[wd] = directory
+        return 0
+
+    def _drop_watch(self, wd: int):
+        """Каталог удален или перемещен: ждем его появления по прежнему пути"""
+        directory = self._watches.pop(wd, None)
+        if directory:
+            # После перемещения watch следит за каталогом по новому пути - снимаем его
+            self._libc.inotify_rm_watch(self._fd, wd)
+            self._missing.add(directory)
+            self.log(f"⚠️ Каталог {directory} удален или перемещен, ожидаем его появления")
+
+    def _rewatch(self) -> Set[str]:
+        """Повторное добавление watch'ей на появившиеся каталоги"""
+        restored = set()
+        for directory in list(self._missing):
+            if self._add_watch(self._fd, directory) == 0:
+                self._missing.discard(directory)
+                restored.add(directory)
+                self.log(f"👁 Каталог {directory} появился, отслеживание возобновлено")
+        return restored
+
+    def _scan(self) -> Dict[str, Tuple[int, int, float]]:
+        """Снимок (inode, размер, mtime) файлов для режима опроса"""
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not self._is_relevant(entry.name):
+                            continue
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (st.st_ino, st.st_size, st.st_mtime)
+            except OSError:
+                continue
+        return snapshot
+
+    def _is_relevant(self, name: str) -> bool:
+        return self.name_prefixes is None or name.startswith(self.name_prefixes)
+
+    def _read_events(self) -> Set[str]:
+        """Чтение накопившихся событий inotify"""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+                offset += length
+                directory = self._watches.get(wd)
+                if not directory:
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # Сам каталог удален или перемещен, watch больше не работает
+                    self._drop_watch(wd)
+                    changed.add(directory)
+                elif not name:
+                    changed.add(directory)
+                elif self._is_relevant(name):
+                    changed.add(os.path.join(directory, name))
+        return changed
+
+    def _wait_inotify(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._missing:
+                # Новый каталог мог появиться уже с файлами логов
+                restored = self._rewatch()
+                if restored:
+                    return restored
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+            if self._missing:
+                # Отсутствующие каталоги проверяются с интервалом опроса
+                remaining = self.poll_interval if remaining is None else min(remaining, self.poll_interval)
+
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [], remaining)
+            if self._wake_r in readable or self._closed.is_set():
+                return set()
+            if not readable:
+                continue
+
+            changed = self._read_events()
+            if not changed:
+                continue  # Изменились неинтересные файлы (stats.log и т.п.)
+
+            if self.debounce:
+                # Собираем остаток пачки, но не дольше debounce
+                readable, _, _ = select.select([self._fd, self._wake_r], [], [], self.debounce)
+                if self._fd in readable:
+                    changed |= self._read_events()
+            return changed
+
+    def _wait_polling(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._closed.is_set():
+            snapshot = self._scan()
+            changed = {path for path in set(snapshot) | set(self._snapshot)
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+            wait = self.poll_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    break
+            self._closed.wait(wait)
+        return set()
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Ожидание изменений
+
+        Returns:
+            Множество измененных путей; пустое - истек таймаут или watcher закрыт
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return set()
+            self._waiting = True
+
+        try:
+            if not self.directories:
+                self._closed.wait(timeout)
+                return set()
+            if self._fd is not None:
+                return self._wait_inotify(timeout)
+            return self._wait_polling(timeout)
+        finally:
+            with self._lock:
+                self._waiting = False
+                if self._closed.is_set():
+                    self._release()
+
+    def close(self):
+        """Закрытие watcher'а, прерывает текущий wait()"""
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            if self._waiting:
+                # Дескрипторы закроет сам ожидающий поток после пробуждения
+                os.write(self._wake_w, b'x')
+            else:
+                self._release()
+
+    def _release(self):
+        """Освобождение дескрипторов inotify и pipe пробуждения"""
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd = self._wake_r = self._wake_w = None
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from requests.exceptions import ConnectionError, Timeout
+
+# Ответы сервера, после которых имеет смысл повторить запрос
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Сетевые ошибки, после которых имеет смысл повторить запрос; ошибки в самом
+# запросе (InvalidURL, MissingSchema, InvalidSchema, InvalidHeader) окончательны
+RETRY_EXCEPTIONS = (ConnectionError, Timeout)
+
+class RetryPolicy:
+    """
+    Экспоненциальная задержка между попытками со случайным разбросом
+
+    Разброс (jitter) разводит повторы нескольких агентов во времени, чтобы
+    поднявшийся сервер не получил их все одновременно. Retry-After из ответа
+    сервера имеет приоритет над расчетной задержкой.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 60.0,
+                 multiplier: float = 2.0, jitter: float = 0.5, retry_statuses=RETRY_STATUSES,
+                 retry_exceptions=RETRY_EXCEPTIONS):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        # Доля задержки, которая выбирается случайно (0 - без разброса)
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+
+    def should_retry(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+
+    def should_retry_error(self, error: Exception) -> bool:
+        return isinstance(error, self.retry_exceptions)
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед повтором после attempt-й неудачной попытки (с 1)"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def retry_after(self, response) -> Optional[float]:
+        """Значение Retry-After в секундах (число или HTTP дата) или None"""
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+    def delay(self, attempt: int, response=None) -> float:
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return self.backoff(attempt)
+
+class CircuitBreaker:
+    """
+    Предохранитель для одного endpoint'а
+
+    После failure_threshold неудач подряд цепь размыкается (open) и запросы
+    не отправляются reset_timeout секунд. Затем пропускается одна пробная
+    попытка (half_open): успех замыкает цепь, неудача снова размыкает.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.trips = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def remaining(self) -> float:
+        """Сколько секунд цепь еще будет разомкнута"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос сейчас"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            # half_open: одна пробная попытка за раз
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def release(self):
+        """Снятие пробной попытки без учета результата (запрос не дошел до сервера)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Учет неудачи; True - цепь только что разомкнулась"""
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                tripped = self._state != self.OPEN
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                if tripped:
+                    self.trips += 1
+                return tripped
+            return False
+
+class RetryMetrics:
+    """Счетчики отправок, повторов и срабатываний предохранителя"""
+
+    FIELDS = ('requests', 'successes', 'failures', 'retries', 'trips', 'short_circuited')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.FIELDS, 0)
+
+    def inc(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
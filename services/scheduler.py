@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import time
+import threading
+from typing import Optional, Callable, Dict, Union
+
+class Pipeline:
+    """
+    Именованный конвейер: функция, выполняемая по собственному расписанию
+
+    Поток конвейера спит на threading.Event до следующего запуска, поэтому
+    между запусками пробуждений нет, а cancel() и trigger() срабатывают сразу.
+
+    interval - пауза между запусками в секундах или функция, возвращающая
+    ее (None - ждать trigger()). Функция конвейера может вернуть число -
+    паузу до следующего запуска вместо interval - или False, чтобы завершить
+    конвейер.
+    """
+
+    def __init__(self, name: str, func: Callable[[int], object],
+                 interval: Union[float, Callable[[], Optional[float]], None] = None,
+                 first_delay: float = 0.0, max_runs: Optional[int] = None,
+                 on_wait: Optional[Callable[[int, float], None]] = None,
+                 on_finish: Optional[Callable[['Pipeline'], None]] = None,
+                 log_callback: Optional[Callable] = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.first_delay = first_delay
+        self.max_runs = max_runs
+        # Уведомление о начале ожидания (номер запуска, секунд до следующего)
+        self.on_wait = on_wait
+        self.on_finish = on_finish
+        self.log_callback = log_callback
+
+        self.runs = 0
+        self.next_run_at: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def log(self, message: str):
+        """Логирование сообщений"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Немедленная остановка (текущий запуск функции дорабатывает)"""
+        self._cancelled.set()
+        self._wake.set()
+
+    def trigger(self):
+        """Внеочередной запуск без ожидания паузы"""
+        self._wake.set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def seconds_until_next(self) -> Optional[float]:
+        if self.next_run_at is None:
+            return None
+        return max(0.0, self.next_run_at - time.monotonic())
+
+    def _delay(self, result) -> Optional[float]:
+        if isinstance(result, (int, float)) and not isinstance(result, bool):
+            return result
+        interval = self.interval() if callable(self.interval) else self.interval
+        return interval
+
+    def _wait(self, delay: Optional[float]) -> bool:
+        """Ожидание следующего запуска; False - конвейер отменен"""
+        if delay is not None and delay <= 0:
+            return not self.cancelled
+        self.next_run_at = None if delay is None else time.monotonic() + delay
+        if self.on_wait and delay is not None:
+            self.on_wait(self.runs, delay)
+        self._wake.wait(delay)
+        self._wake.clear()
+        self.next_run_at = None
+        return not self.cancelled
+
+    def _run(self):
+        try:
+            if not self._wait(self.first_delay):
+                return
+            while not self.cancelled:
+                result = self.func(self.runs)
+                self.runs += 1
+                if result is False or (self.max_runs is not None and self.runs >= self.max_runs):
+                    break
+                if not self._wait(self._delay(result)):
+                    break
+        except Exception as e:
+            self.log(f"❌ Ошибка конвейера {self.name}: {e}")
+        finally:
+            self.next_run_at = None
+            if self.on_finish:
+                self.on_finish(self)
+
+class PipelineScheduler:
+    """Набор именованных конвейеров с независимыми расписаниями"""
+
+    def __init__(self, log_callback: Optional[Callable] = None):
+        self.log_callback = log_callback
+        self._pipelines: Dict[str, Pipeline] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def add(self, name: str, func: Callable[[int], object], **options) -> Pipeline:
+        """
+        Запуск конвейера name (параметры - как у Pipeline)
+
+        Raises:
+            ValueError: конвейер с таким именем уже работает
+        """
+        user_finish = options.pop('on_finish', None)
+
+        def on_finish(pipeline: Pipeline):
+            with self._lock:
+                if self._pipelines.get(pipeline.name) is pipeline:
+                    del self._pipelines[pipeline.name]
+                self._idle.notify_all()
+            if user_finish:
+                user_finish(pipeline)
+
+        with self._lock:
+            current = self._pipelines.get(name)
+            if current is not None and current.alive:
+                raise ValueError(f"Конвейер {name} уже запущен")
+            pipeline = Pipeline(name, func, on_finish=on_finish,
+                                log_callback=options.pop('log_callback', self.log_callback), **options)
+            self._pipelines[name] = pipeline
+        pipeline.start()
+        return pipeline
+
+    def get(self, name: str) -> Optional[Pipeline]:
+        with self._lock:
+            return self._pipelines.get(name)
+
+    def is_running(self, name: Optional[str] = None) -> bool:
+        """Работает ли конвейер name (None - хотя бы один)"""
+        with self._lock:
+            if name is None:
+                return bool(self._pipelines)
+            return name in self._pipelines
+
+    def names(self):
+        with self._lock:
+            return list(self._pipelines)
+
+    def trigger(self, name: str):
+        pipeline = self.get(name)
+        if pipeline:
+            pipeline.trigger()
+
+    def cancel(self, name: Optional[str] = None):
+        """Отмена конвейера name (None - всех)"""
+        with self._lock:
+            pipelines = list(self._pipelines.values()) if name is None else \
+                [p for p in (self._pipelines.get(name),) if p]
+        for pipeline in pipelines:
+            pipeline.cancel()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание завершения всех конвейеров"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pipelines, timeout)
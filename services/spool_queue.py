@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import zlib
+import struct
+import threading
+from pathlib import Path
+from typing import Optional, Callable, Dict, List, Tuple
+from .log_batch import LogBatch, DEFAULT_MEMORY_BUDGET
+
+# Заголовок записи: длина полезной нагрузки и ее CRC32
+_RECORD_HEADER = struct.Struct('<II')
+
+# Размер блока копирования пачки в сегмент и обратно
+_COPY_CHUNK = 64 * 1024
+
+_SEGMENT_PREFIX = 'segment-'
+_SEGMENT_SUFFIX = '.log'
+
+class SpoolQueue:
+    """
+    Надежная очередь пачек на диске между сбором и отправкой
+
+    Пачки дописываются в сегменты (append-only) записями
+    [длина][crc32][метаданные JSON]\\n[данные]. Позиция подтвержденного
+    чтения хранится в ack.json; полностью подтвержденные сегменты удаляются.
+    fsync выполняется пачками - по объему записанного или по времени, а
+    колбэки on_durable (например, сохранение курсора eve.json) вызываются
+    только после fsync, поэтому после сбоя данные есть либо в очереди, либо
+    в исходном логе.
+
+    При превышении max_bytes или max_age удаляются самые старые сегменты,
+    даже неподтвержденные - очередь не должна заполнить диск.
+    """
+
+    def __init__(self, directory: Optional[str] = None, log_callback: Optional[Callable] = None,
+                 segment_size: int = 8 * 1024 * 1024, max_bytes: int = 512 * 1024 * 1024,
+                 max_age: float = 7 * 24 * 3600, fsync_bytes: int = 1024 * 1024,
+                 fsync_interval: float = 1.0):
+        self.directory = directory or str(Path.home() / '.system_agent_spool')
+        self.log_callback = log_callback
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fsync_bytes = fsync_bytes
+        self.fsync_interval = fsync_interval
+
+        self.counters = {'appended': 0, 'acked': 0, 'evicted_segments': 0, 'corrupted': 0}
+        # Число откатов чтения - по нему отправитель видит, что очередь вернулась назад
+        self.rewinds = 0
+
+        self._lock = threading.RLock()
+        self._writer = None
+        self._write_segment = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._on_durable: List[Callable] = []
+
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._ack = self._load_ack()
+        self._read = self._ack
+        self._open_writer()
+
+    def log(self, message: str):
+        """Логирование сообщений"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    # --- сегменты ---
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{_SEGMENT_PREFIX}{segment:016d}{_SEGMENT_SUFFIX}")
+
+    def _segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+                try:
+                    segments.append(int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(segments)
+
+    def _valid_length(self, path: str) -> int:
+        """Длина сегмента до первой неполной или поврежденной записи"""
+        offset = 0
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    return offset
+                length, crc = _RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    return offset
+                offset += _RECORD_HEADER.size + length
+
+    def _open_writer(self):
+        """Продолжение последнего сегмента (с обрезкой недописанного хвоста) или новый"""
+        segments = self._segments()
+        if segments:
+            segment = segments[-1]
+            path = self._segment_path(segment)
+            valid = self._valid_length(path)
+            if valid < os.path.getsize(path):
+                self.log(f"⚠️ Обрезан недописанный хвост очереди {os.path.basename(path)}")
+                with open(path, 'r+b') as f:
+                    f.truncate(valid)
+                    os.fsync(f.fileno())
+        else:
+            segment = max(self._ack[0], 1)
+        self._write_segment = segment
+        self._writer = open(self._segment_path(segment), 'ab')
+
+    def _rotate(self):
+        self._sync()
+        self._writer.close()
+        self._write_segment += 1
+        self._writer = open(self._segment_path(self._write_segment), 'ab')
+        self._fsync_directory()
+
+    def _fsync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # --- подтверждения ---
+
+    def _load_ack(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, 'ack.json'), 'r') as f:
+                data = json.load(f)
+            return int(data['segment']), int(data['offset'])
+        except (OSError, ValueError, KeyError, TypeError):
+            segments = self._segments()
+            return (segments[0] if segments else 1), 0
+
+    def _save_ack(self):
+        path = os.path.join(self.directory, 'ack.json')
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'segment': self._ack[0], 'offset': self._ack[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+
+    def ack(self, position: Tuple[int, int]):
+        """Подтверждение всех записей до position (конец отправленной пачки)"""
+        with self._lock:
+            if position <= self._ack:
+                return
+            self._ack = position
+            self._save_ack()
+            self.counters['acked'] += 1
+            for segment in self._segments():
+                if segment >= position[0] or segment == self._write_segment:
+                    break
+                os.remove(self._segment_path(segment))
+
+    def rewind(self):
+        """Возврат чтения к последней подтвержденной записи (пачка не отправлена)"""
+        with self._lock:
+            self._read = self._ack
+            self.rewinds += 1
+
+    # --- запись ---
+
+    def put(self, batch: LogBatch, on_durable: Optional[Callable] = None):
+        """
+        Запись пачки в очередь
+
+        Args:
+            batch: пачка (содержимое копируется, пачку закрывает вызывающий)
+            on_durable: вызывается после fsync записи (подтверждение источника)
+        """
+        meta = json.dumps({'filename': batch.filename, 'source': batch.source,
+                           'count': batch.count}).encode() + b'\n'
+        with self._lock:
+            crc = zlib.crc32(meta)
+            source = batch.open()
+            while True:
+                chunk = source.read(_COPY_CHUNK)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+
+            if self._writer.tell() and self._writer.tell() + batch.size > self.segment_size:
+                self._rotate()
+
+            self._writer.write(_RECORD_HEADER.pack(len(meta) + batch.size, crc))
+            self._writer.write(meta)
+            source = batch.open()
+            while True:
+                chunk = source.read(_COPY_CHUNK)
+                if not chunk:
+                    break
+                self._writer.write(chunk)
+            self._writer.flush()
+
+            self.counters['appended'] += 1
+            self._unsynced += _RECORD_HEADER.size + len(meta) + batch.size
+            if on_durable:
+                self._on_durable.append(on_durable)
+            if self._unsynced >= self.fsync_bytes or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+            self._enforce_caps()
+
+    def _sync(self):
+        if self._unsynced:
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        callbacks, self._on_durable = self._on_durable, []
+        for callback in callbacks:
+            callback()
+
+    def sync(self):
+        """Принудительный fsync и вызов отложенных on_durable"""
+        with self._lock:
+            self._sync()
+
+    def _enforce_caps(self):
+        """Вытеснение самых старых сегментов при превышении объема или возраста"""
+        now = time.time()
+        segments = self._segments()
+        sizes = {segment: os.path.getsize(self._segment_path(segment)) for segment in segments}
+        total = sum(sizes.values())
+
+        for segment in segments:
+            if segment == self._write_segment:
+                break
+            too_big = total > self.max_bytes
+            too_old = now - os.path.getmtime(self._segment_path(segment)) > self.max_age
+            if not (too_big or too_old):
+                break
+            os.remove(self._segment_path(segment))
+            total -= sizes[segment]
+            self.counters['evicted_segments'] += 1
+            self.log(f"🗑 Из очереди вытеснен сегмент {segment} ({sizes[segment]} байт, "
+                     f"{'превышен объем' if too_big else 'превышен возраст'})")
+            if self._ack[0] <= segment:
+                self._ack = (segment + 1, 0)
+                self._save_ack()
+            if self._read[0] <= segment:
+                self._read = (segment + 1, 0)
+
+    # --- чтение ---
+
+    def get_batch(self, memory_budget: int = DEFAULT_MEMORY_BUDGET) -> Optional[LogBatch]:
+        """
+        Следующая неотправленная пачка или None, если очередь пуста
+
+        batch.commit() подтверждает запись в очереди, batch.rollback()
+        возвращает чтение к последней подтвержденной записи.
+        """
+        with self._lock:
+            while True:
+                segment, offset = self._read
+                if segment > self._write_segment:
+                    return None
+                path = self._segment_path(segment)
+                if not os.path.exists(path):
+                    if segment >= self._write_segment:
+                        return None
+                    self._read = (segment + 1, 0)
+                    continue
+
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    header = f.read(_RECORD_HEADER.size)
+                    if len(header) < _RECORD_HEADER.size:
+                        if segment == self._write_segment:
+                            return None
+                        self._read = (segment + 1, 0)  # Сегмент дочитан
+                        continue
+
+                    length, crc = _RECORD_HEADER.unpack(header)
+                    meta = f.readline()
+                    try:
+                        info = json.loads(meta)
+                    except ValueError:
+                        info = None
+                    if info is None or len(meta) > length:
+                        self._skip_corrupted(segment)
+                        continue
+
+                    batch = LogBatch(info.get('filename', 'spool.log'), info.get('source', 'user file'),
+                                     memory_budget, on_rollback=self.rewind)
+                    crc_check = zlib.crc32(meta)
+                    remaining = length - len(meta)
+                    while remaining:
+                        chunk = f.read(min(_COPY_CHUNK, remaining))
+                        if not chunk:
+                            break
+                        crc_check = zlib.crc32(chunk, crc_check)
+                        batch.write(chunk, records=0)
+                        remaining -= len(chunk)
+
+                if remaining or crc_check != crc:
+                    batch.close()
+                    self._skip_corrupted(segment)
+                    continue
+
+                batch.count = info.get('count', 0)
+                end = (segment, offset + _RECORD_HEADER.size + length)
+                batch.set_commit(lambda: self.ack(end))
+                self._read = end
+                return batch
+
+    def _skip_corrupted(self, segment: int):
+        """Пропуск остатка сегмента после поврежденной записи"""
+        self.counters['corrupted'] += 1
+        self.log(f"⚠️ Поврежденная запись в сегменте очереди {segment}, остаток сегмента пропущен")
+        if segment == self._write_segment:
+            # Новые записи пойдут в следующий сегмент
+            self._rotate()
+        self._read = (segment + 1, 0)
+
+    # --- состояние ---
+
+    def pending_bytes(self) -> int:
+        """Объем неподтвержденных данных на диске (приблизительно, с заголовками)"""
+        with self._lock:
+            total = 0
+            for segment in self._segments():
+                if segment < self._ack[0]:
+                    continue
+                size = os.path.getsize(self._segment_path(segment))
+                total += size - self._ack[1] if segment == self._ack[0] else size
+            return max(total, 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats['pending_bytes'] = self.pending_bytes()
+            stats['segments'] = len(self._segments())
+            return stats
+
+    def close(self):
+        """fsync и закрытие текущего сегмента"""
+        with self._lock:
+            if self._writer is not None:
+                self._sync()
+                self._writer.close()
+                self._writer = None
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import os
+from typing import List, Optional, Union
+
+# Размер блока при чтении файла с конца
+TAIL_BLOCK_SIZE = 8192
+
+def tail_lines(path: str, count: int = 10, encoding: Optional[str] = 'utf-8',
+               block_size: int = TAIL_BLOCK_SIZE) -> List[Union[str, bytes]]:
+    """
+    Последние count строк файла без чтения его целиком
+
+    Файл читается блоками с конца, пока не наберется нужное число строк,
+    поэтому стоимость зависит от count и длины строк, а не от размера файла.
+
+    Args:
+        path: путь к файлу
+        count: количество строк
+        encoding: кодировка строк (None - вернуть bytes)
+        block_size: размер блока чтения
+    """
+    if count <= 0:
+        return []
+
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+
+        # Последний перевод строки в конце файла строку не начинает
+        while position > 0 and data.count(b'\n') <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+
+    if not data:
+        return []
+    if data.endswith(b'\n'):
+        data = data[:-1]
+    lines = data.split(b'\n')[-count:]
+    if encoding is None:
+        return lines
+    return [line.decode(encoding, errors='replace') for line in lines]
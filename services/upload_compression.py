@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+import os
+import uuid
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Размер блока чтения файла при потоковом сжатии
+CHUNK_SIZE = 64 * 1024
+
+# Уровни по умолчанию: компромисс между CPU агента и размером на канале
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+
+# Допустимые уровни каждого алгоритма
+LEVEL_RANGES = {'gzip': (1, 9), 'zstd': (1, 19)}
+
+# Расширение имени файла для сжатой части
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+class CompressionStats:
+    """Счетчики исходных и сжатых байт одной отправки"""
+
+    def __init__(self, algorithm: str):
+        self.algorithm = algorithm
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.raw_bytes - self.compressed_bytes
+
+    @property
+    def ratio(self) -> float:
+        """Во сколько раз уменьшился размер"""
+        return self.raw_bytes / self.compressed_bytes if self.compressed_bytes else 0.0
+
+    def report(self) -> str:
+        saved = self.saved_bytes / self.raw_bytes * 100 if self.raw_bytes else 0.0
+        return (f"📦 Сжатие {self.algorithm}: {self.raw_bytes} → {self.compressed_bytes} байт, "
+                f"сэкономлено {self.saved_bytes} байт ({saved:.1f}%, x{self.ratio:.1f})")
+
+def available_algorithms() -> List[str]:
+    """Доступные алгоритмы сжатия (zstd - только при установленном zstandard)"""
+    algorithms = ['gzip']
+    if zstandard is not None:
+        algorithms.append('zstd')
+    return algorithms
+
+def clamp_level(algorithm: str, level: Optional[int]) -> int:
+    """Уровень сжатия в диапазоне алгоритма (None - уровень по умолчанию)"""
+    if level is None:
+        return DEFAULT_LEVELS[algorithm]
+    low, high = LEVEL_RANGES[algorithm]
+    return max(low, min(int(level), high))
+
+def _compressor(algorithm: str, level: Optional[int]):
+    """Объект с методами compress(data) и flush()"""
+    if algorithm not in LEVEL_RANGES:
+        raise ValueError(f"Неизвестный алгоритм сжатия: {algorithm}")
+    level = clamp_level(algorithm, level)
+    if algorithm == 'gzip':
+        # wbits=31: формат gzip (заголовок и CRC), а не «сырой» zlib
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if algorithm == 'zstd':
+        if zstandard is None:
+            raise ValueError("Сжатие zstd требует пакет zstandard")
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    raise ValueError(f"Неизвестный алгоритм сжатия: {algorithm}")
+
+def iter_compressed(fileobj: BinaryIO, algorithm: str, level: Optional[int] = None,
+                    stats: Optional[CompressionStats] = None,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Генератор сжатых блоков файла без промежуточного файла на диске"""
+    compressor = _compressor(algorithm, level)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        data = compressor.compress(chunk)
+        if stats:
+            stats.raw_bytes += len(chunk)
+        if data:
+            if stats:
+                stats.compressed_bytes += len(data)
+            yield data
+    data = compressor.flush()
+    if stats:
+        stats.compressed_bytes += len(data)
+    if data:
+        yield data
+
+def iter_chunks(fileobj: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Генератор блоков файла без сжатия"""
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def multipart_upload(fileobj: BinaryIO, filename: str, fields: Dict[str, str],
+                     algorithm: Optional[str] = None, level: Optional[int] = None,
+                     stats: Optional[CompressionStats] = None,
+                     content_type: str = 'text/plain') -> Tuple[Iterator[bytes], Dict[str, str]]:
+    """
+    Потоковое multipart/form-data тело с частью file
+
+    Тело отдается генератором, поэтому requests отправляет его
+    chunked-кодированием прямо в сокет, не собирая запрос в памяти.
+    При заданном algorithm сжимается только содержимое файла: текстовые
+    поля остаются читаемыми для сервера, а алгоритм передается полем
+    content_encoding и заголовком Content-Encoding самой части.
+
+    Returns:
+        (генератор тела, заголовки запроса)
+    """
+    if algorithm is not None and algorithm not in available_algorithms():
+        raise ValueError(f"Алгоритм сжатия недоступен: {algorithm}")
+    boundary = uuid.uuid4().hex
+    filename = os.path.basename(filename)
+    part_headers = f'Content-Type: {content_type}\r\n'
+    if algorithm is not None:
+        fields = dict(fields, content_encoding=algorithm)
+        filename += EXTENSIONS[algorithm]
+        part_headers += f'Content-Encoding: {algorithm}\r\n'
+
+    def body() -> Iterator[bytes]:
+        for name, value in fields.items():
+            yield (f'--{boundary}\r\n'
+                   f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                   f'{value}\r\n').encode()
+        yield (f'--{boundary}\r\n'
+               f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+               f'{part_headers}\r\n').encode()
+        if algorithm is not None:
+            yield from iter_compressed(fileobj, algorithm, level, stats)
+        else:
+            yield from iter_chunks(fileobj)
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+    headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    return body(), headers
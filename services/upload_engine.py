@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Callable, Deque, Dict, List, Tuple
+from .log_batch import LogBatch
+
+# Сколько последних задержек хранить для статистики
+LATENCY_WINDOW = 1000
+
+class AsyncUploadEngine:
+    """
+    Параллельная отправка пачек с ограничением числа запросов в полете
+
+    Запросы выполняются корутинами в отдельном потоке с циклом asyncio;
+    блокирующий LogSender вызывается в пуле из max_in_flight потоков, число
+    одновременных отправок ограничено asyncio.Semaphore. Производитель
+    вызывает acquire() перед сбором пачки и блокируется, пока все места
+    заняты (обратное давление).
+
+    Пачки подтверждаются (commit/rollback) строго в порядке отправки и в
+    потоке производителя, поэтому курсор источника не может уйти дальше
+    неотправленных данных. После неудачи источник откатывается, а пачки,
+    прочитанные до отката, отбрасываются без подтверждения - их данные будут
+    прочитаны и отправлены повторно.
+    """
+
+    def __init__(self, sender, max_in_flight: int = 4, log_callback: Optional[Callable] = None):
+        self.sender = sender
+        self.max_in_flight = max(1, max_in_flight)
+        self.log_callback = log_callback
+        # Завершенные, но еще не подтвержденные пачки тоже держат память
+        self.max_pending = self.max_in_flight * 4
+        # Пул соединений сессии не должен быть узким местом
+        sender.pool_size = max(sender.pool_size, self.max_in_flight)
+
+        self._pending: Deque[Tuple[int, LogBatch, Future]] = deque()
+        self._running = 0
+        self._seq = 0
+        self._discard_upto = -1
+        self._cond = threading.Condition()
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'discarded': 0}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def log(self, message: str):
+        """Логирование сообщений"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def start(self):
+        """Запуск потока с циклом asyncio"""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(self.max_in_flight, thread_name_prefix='upload')
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            ready.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    async def _upload(self, batch: LogBatch, url: Optional[str]) -> bool:
+        async with self._slots:
+            started = time.monotonic()
+            try:
+                success = await self._loop.run_in_executor(self._executor, self.sender.send_batch, batch, url)
+            except Exception as e:
+                self.log(f"❌ Ошибка отправки {batch.filename}: {e}")
+                success = False
+            latency = time.monotonic() - started
+            self._latencies.append(latency)
+            self.log(f"⏱ {batch.filename}: {latency:.2f} сек ({'успех' if success else 'ошибка'})")
+            return success
+
+    def _on_done(self, _future: Future):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def _settle(self):
+        """Подтверждение завершенных пачек в порядке отправки (под self._cond)"""
+        while self._pending and self._pending[0][2].done():
+            seq, batch, future = self._pending.popleft()
+            success = not future.cancelled() and future.exception() is None and future.result()
+            try:
+                if seq <= self._discard_upto:
+                    # Прочитана до отката источника - данные уйдут повторно
+                    self._counters['discarded'] += 1
+                elif success:
+                    self._counters['succeeded'] += 1
+                    batch.commit()
+                else:
+                    self._counters['failed'] += 1
+                    batch.rollback()
+                    self._discard_upto = self._seq
+            finally:
+                batch.close()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ожидание свободного места перед сбором следующей пачки
+
+        Returns:
+            False - место не освободилось за timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._settle()
+                if self._running < self.max_in_flight and len(self._pending) < self.max_pending:
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+    def submit(self, batch: LogBatch, url: Optional[str] = None) -> Future:
+        """
+        Постановка пачки в отправку (без ожидания; место резервирует acquire())
+
+        url=None - отправка на серверы, настроенные через sender.set_endpoints()
+        """
+        self.start()
+        with self._cond:
+            self._seq += 1
+            self._running += 1
+            self._counters['submitted'] += 1
+            future = asyncio.run_coroutine_threadsafe(self._upload(batch, url), self._loop)
+            self._pending.append((self._seq, batch, future))
+        future.add_done_callback(self._on_done)
+        return future
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание завершения и подтверждения всех отправок"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._settle()
+                if not self._pending:
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+    @property
+    def in_flight(self) -> int:
+        return self._running
+
+    def stats(self) -> Dict[str, float]:
+        """Счетчики и задержки запросов (среднее, p50, p95, максимум) в секундах"""
+        with self._cond:
+            stats = dict(self._counters)
+            latencies: List[float] = sorted(self._latencies)
+        if latencies:
+            stats['latency_avg'] = sum(latencies) / len(latencies)
+            stats['latency_p50'] = latencies[len(latencies) // 2]
+            stats['latency_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            stats['latency_max'] = latencies[-1]
+        return stats
+
+    def close(self, timeout: Optional[float] = None):
+        """Завершение отправок и остановка цикла asyncio"""
+        self.drain(timeout)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._executor.shutdown(wait=False)
+        self._loop = self._thread = self._executor = None
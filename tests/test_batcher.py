@@ -0,0 +1,142 @@
+import json
+from functools import partial
+import pytest
+from services import batcher as batcher_module
+from services.batcher import AdaptiveBatcher, JSON_FORMAT, drain_ready
+from services.eve_tailer import EveTailer
+from services.log_collector import LogCollector
+
+class Source:
+    """Источник с курсором: checkpoint фиксирует позицию на закрытии пачки"""
+
+    def __init__(self):
+        self.position = 0
+        self.committed = []
+        self.rollbacks = 0
+
+    def checkpoint(self):
+        return partial(self.committed.append, self.position)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+def make_batcher(source=None, **kwargs):
+    if source is not None:
+        kwargs.update(checkpoint=source.checkpoint, rollback=source.rollback)
+    return AdaptiveBatcher('test', 'test', **kwargs)
+
+def test_flush_on_max_records():
+    batcher = make_batcher(max_records=3, max_bytes=1 << 20)
+    assert batcher.add(b'a') is None
+    assert batcher.add(b'b') is None
+    batch = batcher.add(b'c')
+    assert batch.count == 3
+    assert batch.open().read() == b'abc'
+    assert batcher.flush_reasons == {'max_records': 1}
+    assert batcher.time_until_flush() is None
+
+def test_flush_on_max_bytes():
+    batcher = make_batcher(max_records=1000, max_bytes=10)
+    assert batcher.add(b'12345') is None
+    batch = batcher.add(b'67890')
+    assert batch.size == 10
+    assert batcher.flush_reasons == {'max_bytes': 1}
+
+def test_flush_on_max_latency(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(batcher_module.time, 'monotonic', lambda: now[0])
+    batcher = make_batcher(max_latency=5.0)
+    batcher.add(b'a')
+    assert batcher.time_until_flush() == 5.0
+    assert batcher.poll() is None
+
+    now[0] += 5.0
+    batch, = drain_ready([batcher])
+    assert batch.count == 1
+    assert batcher.flush_reasons == {'max_latency': 1}
+
+def test_small_stream_is_not_padded():
+    batcher = make_batcher(max_records=100)
+    batcher.add(b'only')
+    batch = batcher.flush()
+    assert batch.count == 1
+    assert batch.open().read() == b'only'
+    assert batcher.flush() is None
+
+def test_json_batch_is_valid_array():
+    batcher = make_batcher(batch_format=JSON_FORMAT, max_records=2)
+    batcher.add(b'{"a": 1}')
+    batch = batcher.add(b'{"b": 2}')
+    assert json.loads(batch.open().read()) == [{"a": 1}, {"b": 2}]
+
+def test_checkpoint_is_taken_when_batch_closes():
+    source = Source()
+    batcher = make_batcher(source, max_records=2)
+    source.position = 1
+    batcher.add(b'a')
+    source.position = 2
+    first = batcher.add(b'b')
+    # Источник читается дальше, пока первая пачка еще не отправлена
+    source.position = 3
+    batcher.add(b'c')
+    source.position = 4
+    second = batcher.add(b'd')
+
+    second.commit()
+    first.commit()
+    assert source.committed == [4, 2]
+
+def test_rollback_does_not_commit():
+    source = Source()
+    batcher = make_batcher(source, max_records=1)
+    batch = batcher.add(b'a')
+    batch.rollback()
+    batch.commit()
+    assert source.committed == []
+    assert source.rollbacks == 1
+
+def eve_line(event_type):
+    return json.dumps({'timestamp': '2024-01-15T10:30:00.000000+0000', 'event_type': event_type,
+                       'src_ip': '10.0.0.1', 'dest_ip': '8.8.8.8'}) + '\n'
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    collector = LogCollector()
+    collector.eve_tailer = EveTailer(str(tmp_path / 'eve.json'), str(tmp_path / 'cursor.json'))
+    collector.configure_batching(max_records=1)
+    return collector
+
+def append(collector, *lines):
+    with open(collector.eve_tailer.path, 'a') as f:
+        f.writelines(lines)
+
+def collect(collector):
+    return collector.collect_batches(['suricata'], ['alert'])
+
+def test_collector_commits_cursor_only_through_batch(collector):
+    append(collector, eve_line('alert'), eve_line('dns'))
+    batch, = collect(collector)
+    assert collector.eve_tailer.committed['offset'] == 0
+
+    # Курсор на конце пачки, а не на конце прочитанного
+    batch.commit()
+    assert collector.eve_tailer.committed['offset'] == len(eve_line('alert'))
+
+def test_filtered_read_does_not_skip_batch_in_flight(collector):
+    append(collector, eve_line('alert'))
+    batch, = collect(collector)
+    # Прочитаны только отфильтрованные строки, пачка еще не в очереди
+    append(collector, eve_line('dns'))
+    assert collect(collector) == []
+    assert collector.eve_tailer.committed['offset'] == 0
+
+    # Ошибка записи пачки: источник перечитывается с начала
+    batch.rollback()
+    batch, = collect(collector)
+    assert batch.count == 1
+
+def test_filtered_read_is_committed_when_settled(collector):
+    append(collector, eve_line('dns'), eve_line('flow'))
+    assert collect(collector) == []
+    assert collector.eve_tailer.committed['offset'] == collector.eve_tailer.cursor['offset'] > 0
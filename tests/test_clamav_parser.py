@@ -0,0 +1,103 @@
+import json
+import os
+import pytest
+from services.clamav_parser import ClamAVLogParser
+from services.eve_tailer import EveTailer
+from services.log_collector import LogCollector
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'scripts_clamav', 'clamv_log.txt')
+
+SUMMARY = [
+    '----------- SCAN SUMMARY -----------\n',
+    'Known viruses: 8697766\n',
+    'Engine version: 1.0.7\n',
+    'Scanned directories: 1\n',
+    'Scanned files: 12\n',
+    'Infected files: 1\n',
+    'Total errors: 0\n',
+    'Data scanned: 0.01 MB\n',
+    'Data read: 0.01 MB (ratio 1.00:1)\n',
+    'Time: 0.004 sec (0 m 0 s)\n',
+    'Start Date: 2024:01:15 10:30:40\n',
+    'End Date:   2024:01:15 10:30:45\n',
+]
+
+def parse(lines):
+    return list(ClamAVLogParser('test.log').iter_events(lines))
+
+def test_detection_with_log_time():
+    event, = parse(['Mon Jan 15 10:30:45 2024 -> /tmp/eicar.com: Eicar-Signature FOUND\n'])
+    assert event['event_type'] == 'detection'
+    assert event['level'] == 'CRITICAL'
+    assert event['timestamp'] == '2024-01-15T10:30:45'
+    assert event['data'] == {'path': '/tmp/eicar.com', 'virus': 'Eicar-Signature', 'source': 'test.log'}
+
+def test_database_status_and_reload():
+    updated, reloaded = parse([
+        'daily.cld updated (version: 27160, sigs: 2051234, f-level: 90, builder: raynman)\n',
+        'SelfCheck: Database status OK.\n',
+        'Database correctly reloaded (8697766 signatures)\n',
+    ])
+    assert updated['data']['status'] == 'updated'
+    assert updated['data']['version'] == 27160
+    assert reloaded['data'] == {'signatures': 8697766, 'status': 'reloaded', 'source': 'test.log'}
+
+def test_line_without_time_uses_last_time():
+    _, error = parse([
+        'Mon Jan 15 10:30:45 2024 -> /tmp/a: Sig FOUND\n',
+        'LibClamAV Error: cli_scanxz: decompress failed\n',
+    ])
+    assert error['level'] == 'ERROR'
+    assert error['timestamp'] == '2024-01-15T10:30:45'
+
+def test_update_header_seeds_time():
+    with open(SAMPLE, errors='replace') as f:
+        events = parse(f)
+    assert len(events) == 7
+    assert {event['timestamp'] for event in events} == {'2025-10-17T12:04:27'}
+    assert sum(event['event_type'] == 'database_update' for event in events) == 3
+
+def test_summary_closes_on_end_date():
+    event, = parse(SUMMARY)
+    assert event['event_type'] == 'scan_summary'
+    assert event['level'] == 'WARNING'
+    assert event['timestamp'] == '2024-01-15T10:30:45'
+    assert event['data']['scanned_files'] == 12
+    assert event['data']['data_read'] == '0.01 MB (ratio 1.00:1)'
+
+def test_summary_split_between_feeds():
+    parser = ClamAVLogParser()
+    events = [event for line in SUMMARY[:5] for event in parser.feed(line)]
+    assert events == [] and parser.pending
+    events = [event for line in SUMMARY[5:] for event in parser.feed(line)]
+    assert len(events) == 1 and not parser.pending
+    assert events[0]['data']['known_viruses'] == 8697766
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    collector = LogCollector()
+    path = tmp_path / 'clamav.log'
+    path.touch()
+    collector.clamav_tailers = [EveTailer(str(path), str(tmp_path / 'clamav_cursor.json'))]
+    collector.clamav_parsers = [ClamAVLogParser('clamav.log')]
+    collector.configure_batching(max_records=1)
+    return collector
+
+def collect(collector, *lines):
+    with open(collector.clamav_tailers[0].path, 'a') as f:
+        f.writelines(lines)
+    return collector.collect_batches(['clamav'])
+
+def test_collector_keeps_parser_between_reads(collector):
+    assert collect(collector, 'Mon Jan 15 10:30:00 2024 -> SelfCheck: Database status OK.\n',
+                   *SUMMARY[:4]) == []
+    # Незакрытые итоги не подтверждают курсор
+    assert collector.clamav_tailers[0].committed['offset'] == 0
+
+    batch, = collect(collector, *SUMMARY[4:])
+    event, = json.loads(batch.open().read())
+    assert event['event_type'] == 'scan_summary'
+    assert event['data']['known_viruses'] == 8697766
+    assert event['data']['scanned_files'] == 12
@@ -0,0 +1,58 @@
+import sys
+import time
+import pytest
+from core.command_runner import CommandRunner, Step
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+def test_output_is_streamed_and_stderr_tail_kept():
+    output = []
+    result = CommandRunner(output.append).run([
+        Step('echo', python("import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"))
+    ])['echo']
+    assert result.returncode == 3 and not result.ok
+    assert '[echo] out' in output and '[echo] err' in output
+    assert result.stderr == 'err'
+    assert result.lines == 2
+
+def test_step_timeout_terminates_process():
+    started = time.monotonic()
+    result = CommandRunner().run([Step('sleep', python("import time; time.sleep(30)"), timeout=0.3)])['sleep']
+    assert result.timed_out and not result.ok
+    assert time.monotonic() - started < 5
+
+def test_process_ignoring_sigterm_is_killed():
+    ignore_term = python("import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+                         "print('ready', flush=True); time.sleep(30)")
+    started = time.monotonic()
+    result = CommandRunner(kill_grace=0.2).run([Step('stubborn', ignore_term, timeout=0.5)])['stubborn']
+    assert result.timed_out
+    assert time.monotonic() - started < 5
+
+def test_total_timeout_skips_steps_not_started():
+    runner = CommandRunner(total_timeout=0.3, kill_grace=0.2)
+    results = runner.run([
+        Step('slow', python("import time; time.sleep(30)")),
+        Step('after', python("pass"), depends_on=['slow']),
+    ])
+    assert results['slow'].timed_out
+    assert results['after'].skipped
+
+def test_failed_dependency_skips_and_independent_steps_overlap():
+    started = time.monotonic()
+    results = CommandRunner().run([
+        Step('fail', python("import sys; sys.exit(1)")),
+        Step('skipped', python("pass"), depends_on=['fail']),
+        Step('a', python("import time; time.sleep(0.5)")),
+        Step('b', python("import time; time.sleep(0.5)")),
+    ])
+    assert results['skipped'].skipped and results['skipped'].returncode is None
+    assert results['a'].ok and results['b'].ok
+    assert time.monotonic() - started < 0.95
+
+def test_missing_command_and_unknown_dependency():
+    result = CommandRunner().run([Step('missing', ['/nonexistent/command'])])['missing']
+    assert result.error and not result.ok
+    with pytest.raises(ValueError):
+        CommandRunner().run([Step('step', python("pass"), depends_on=['unknown'])])
@@ -0,0 +1,69 @@
+import pytest
+from services.endpoint_pool import EndpointPool, parse_endpoints
+
+URLS = ['http://a/upload', 'http://b/upload', 'http://c/upload']
+
+def test_parse_endpoints():
+    assert parse_endpoints('http://a/upload, http://b/upload;http://c/upload\n') == URLS
+    assert parse_endpoints(['http://a/upload', ' ', '']) == ['http://a/upload']
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        EndpointPool(URLS, policy='random')
+    with pytest.raises(ValueError):
+        EndpointPool(' , ')
+
+def test_round_robin_rotates_and_skips_unhealthy():
+    pool = EndpointPool(URLS)
+    assert [pool.candidates()[0] for _ in range(4)] == URLS + URLS[:1]
+
+    pool.begin(URLS[1])
+    pool.finish(URLS[1], success=False)
+    firsts = {pool.candidates()[0] for _ in range(4)}
+    assert firsts == {URLS[0], URLS[2]}
+    assert URLS[1] not in pool.candidates()
+
+def test_least_outstanding_prefers_idle_server():
+    pool = EndpointPool(URLS, policy='least_outstanding')
+    pool.begin(URLS[0])
+    pool.begin(URLS[0])
+    pool.begin(URLS[1])
+    assert pool.candidates() == [URLS[2], URLS[1], URLS[0]]
+
+    pool.finish(URLS[0], success=True)
+    pool.finish(URLS[0], success=True)
+    assert pool.candidates()[0] == URLS[0]
+    assert pool.stats()[URLS[0]]['successes'] == 2
+
+def test_failover_keeps_list_order():
+    pool = EndpointPool(URLS, policy='failover')
+    assert pool.candidates() == URLS
+    pool.begin(URLS[0])
+    pool.finish(URLS[0], success=False)
+    assert pool.candidates() == URLS[1:]
+
+def test_broadcast_includes_unhealthy_servers():
+    pool = EndpointPool(URLS, policy='broadcast')
+    pool.begin(URLS[2])
+    pool.finish(URLS[2], success=False)
+    assert pool.candidates() == URLS
+
+def test_all_unhealthy_falls_back_to_all():
+    pool = EndpointPool(URLS[:2], policy='failover')
+    for url in URLS[:2]:
+        pool.begin(url)
+        pool.finish(url, success=False)
+    assert pool.candidates() == URLS[:2]
+
+def test_probe_returns_server_to_rotation():
+    down = {URLS[1]}
+    messages = []
+    pool = EndpointPool(URLS, policy='failover', probe=lambda url: url not in down,
+                        log_callback=messages.append)
+    pool.probe_all()
+    assert pool.candidates() == [URLS[0], URLS[2]]
+
+    down.clear()
+    pool.probe_all()
+    assert pool.candidates() == URLS
+    assert len(messages) == 2
@@ -0,0 +1,46 @@
+import json
+import pytest
+from services.eve_formatters import FORMATTERS, compile_template, format_generic
+from services.log_converter import LogConverter
+from tests.test_log_converter import SAMPLE, expected_records
+
+def sample_entries():
+    entries = []
+    with open(SAMPLE, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+@pytest.fixture
+def converter():
+    converter = LogConverter()
+    yield converter
+    converter.unregister_formatter('smtp')
+
+def test_registry_matches_reference_formatting(converter):
+    records = [converter.format_entry_as_text(entry) for entry in sample_entries()]
+    assert records == expected_records()
+
+def test_every_builtin_type_is_covered():
+    types = {entry.get('event_type') for entry in sample_entries()}
+    assert set(FORMATTERS) <= types
+
+def test_registered_formatter_replaces_generic(converter):
+    entry = {'timestamp': '2024-01-15T10:30:53.000000+0000', 'event_type': 'smtp',
+             'smtp': {'mail_from': '<a@example.com>'}}
+    converter.register_formatter('smtp', lambda entry, timestamp: f"[SMTP {timestamp}] {entry['smtp']['mail_from']}")
+    assert converter.format_entry_as_text(entry) == '[SMTP 15/01/2024-10:30:53.000] <a@example.com>'
+
+    converter.unregister_formatter('smtp')
+    assert converter.format_entry_as_text(entry) == format_generic(entry, '15/01/2024-10:30:53.000')
+
+def test_compile_template_uses_defaults_and_sections():
+    render = compile_template("[X {timestamp}]\n{name} {port}", {
+        'name': ('app', 'name', 'unknown'),
+        'port': (None, 'port', ''),
+    })
+    assert render({'app': {'name': 'nginx'}, 'port': 80}, 'now') == '[X now]\nnginx 80'
+    assert render({}, 'now') == '[X now]\nunknown '
@@ -0,0 +1,71 @@
+import os
+import pytest
+from services.eve_tailer import EveTailer
+
+@pytest.fixture
+def eve(tmp_path):
+    return tmp_path / 'eve.json'
+
+def make_tailer(eve):
+    return EveTailer(str(eve), str(eve.parent / 'cursor.json'))
+
+def write(path, data, mode='ab'):
+    with open(path, mode) as f:
+        f.write(data)
+
+def read(tailer):
+    return list(tailer.read_new_lines())
+
+def test_reads_only_new_lines(eve):
+    write(eve, b'{"a":1}\n{"a":2}\n')
+    tailer = make_tailer(eve)
+    assert read(tailer) == [b'{"a":1}', b'{"a":2}']
+    assert read(tailer) == []
+    write(eve, b'{"a":3}\n')
+    assert read(tailer) == [b'{"a":3}']
+
+def test_partial_line_waits_for_newline(eve):
+    write(eve, b'{"a":1}\n{"a":')
+    tailer = make_tailer(eve)
+    assert read(tailer) == [b'{"a":1}']
+    write(eve, b'2}\n')
+    assert read(tailer) == [b'{"a":2}']
+
+def test_cursor_survives_restart_after_commit(eve):
+    write(eve, b'{"a":1}\n')
+    tailer = make_tailer(eve)
+    read(tailer)
+    tailer.commit()
+    write(eve, b'{"a":2}\n')
+    assert read(make_tailer(eve)) == [b'{"a":2}']
+
+def test_rollback_rereads_uncommitted_lines(eve):
+    write(eve, b'{"a":1}\n')
+    tailer = make_tailer(eve)
+    read(tailer)
+    tailer.rollback()
+    assert read(tailer) == [b'{"a":1}']
+
+def test_rotation_finishes_old_file_first(eve):
+    write(eve, b'{"a":1}\n')
+    tailer = make_tailer(eve)
+    read(tailer)
+    write(eve, b'{"a":2}\n')
+    os.rename(eve, f"{eve}.1")
+    write(eve, b'{"a":3}\n')
+    assert read(tailer) == [b'{"a":2}', b'{"a":3}']
+
+def test_copytruncate_restarts_from_beginning(eve):
+    write(eve, b'{"a":1}\n{"a":2}\n')
+    tailer = make_tailer(eve)
+    read(tailer)
+    write(eve, b'{"b":1}\n', mode='wb')
+    assert read(tailer) == [b'{"b":1}']
+
+def test_rewritten_file_of_same_size_is_read_again(eve):
+    write(eve, b'{"a":1}\n')
+    tailer = make_tailer(eve)
+    read(tailer)
+    # Усечен и дорос до прежнего смещения между чтениями
+    write(eve, b'{"b":1}\n{"b":2}\n', mode='r+b')
+    assert read(tailer) == [b'{"b":1}', b'{"b":2}']
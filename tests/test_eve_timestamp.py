@@ -0,0 +1,32 @@
+import pytest
+from services import eve_timestamp
+from services.eve_timestamp import format_timestamp, format_timestamp_slow
+
+TIMESTAMPS = [
+    '2024-01-15T10:30:45.123456+0000',
+    '2024-01-15T10:30:45.9+0300',
+    '2024-01-15T10:30:45.000001Z',
+    '2024-01-15T10:30:45+0000',
+    '2024-01-15T10:30:45.123456+05:30',
+    '2024-01-15T10:30:45',
+    '2024-01-15 10:30:45',
+    '2024-02-30T10:30:45.000000+0000',
+    '0999-01-15T10:30:45.000000+0000',
+    '2024-01-15T10:30:45.1234567+0000',
+    '2024-01-15T10:30:45.123456+2400',
+    'garbage',
+    '',
+    None,
+    1705314645,
+]
+
+@pytest.mark.parametrize('timestamp', TIMESTAMPS)
+def test_fast_path_matches_datetime(timestamp):
+    assert format_timestamp(timestamp) == format_timestamp_slow(timestamp)
+
+def test_same_second_hits_prefix_cache():
+    eve_timestamp._format_prefix.cache_clear()
+    assert format_timestamp('2024-01-15T10:30:45.123456+0000') == '15/01/2024-10:30:45.123'
+    assert format_timestamp('2024-01-15T10:30:45.987654+0000') == '15/01/2024-10:30:45.987'
+    info = eve_timestamp.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
@@ -0,0 +1,29 @@
+import os
+from services.log_converter import LogConverter
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+# Эталон - вывод исходного конвертера (readlines + json.loads) для eve_sample.json
+SAMPLE = os.path.join(DATA_DIR, 'eve_sample.json')
+EXPECTED = os.path.join(DATA_DIR, 'eve_sample.txt')
+
+def expected_records():
+    with open(EXPECTED, encoding='utf-8') as f:
+        return f.read().split('\n\n')[:-1]
+
+def test_convert_matches_reference_output(tmp_path):
+    output = str(tmp_path / 'out.txt')
+    messages = []
+    assert LogConverter(messages.append).convert_eve_to_text(SAMPLE, output) == output
+    with open(output, 'rb') as f, open(EXPECTED, 'rb') as reference:
+        assert f.read() == reference.read()
+    assert messages == [f"✅ Конвертировано {len(expected_records())} записей в файл: {output}"]
+
+def test_records_are_streamed_in_file_order():
+    records = LogConverter().iter_formatted_records(SAMPLE)
+    assert iter(records) is records
+    assert list(records) == expected_records()
+
+def test_missing_file(tmp_path):
+    messages = []
+    assert LogConverter(messages.append).convert_eve_to_text(str(tmp_path / 'none.json')) is None
+    assert messages[0].startswith('❌ Файл не найден')
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import pytest
+from requests.exceptions import ConnectionError, InvalidURL, MissingSchema, ReadTimeout
+from services import retry_policy
+from services.retry_policy import CircuitBreaker, RetryPolicy
+
+class Response:
+    def __init__(self, retry_after=None):
+        self.headers = {'Retry-After': retry_after} if retry_after is not None else {}
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry_policy.time, 'monotonic', clock)
+    return clock
+
+def http_date(seconds_from_now):
+    return format_datetime(datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now), usegmt=True)
+
+def test_retry_after_seconds():
+    assert RetryPolicy().retry_after(Response('7')) == 7.0
+
+def test_retry_after_http_date():
+    delay = RetryPolicy().retry_after(Response(http_date(30)))
+    assert 28 <= delay <= 30
+
+def test_retry_after_in_the_past_is_zero():
+    assert RetryPolicy().retry_after(Response(http_date(-60))) == 0.0
+
+@pytest.mark.parametrize('value', [None, '', 'soon', '-5'])
+def test_invalid_retry_after_is_ignored(value):
+    assert RetryPolicy().retry_after(Response(value)) is None
+
+def test_retry_after_overrides_backoff_but_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0, jitter=0.0)
+    assert policy.delay(1, Response('5')) == 5.0
+    assert policy.delay(1, Response('3600')) == 10.0
+    assert policy.delay(3, Response('soon')) == 4.0
+    assert policy.delay(3, None) == 4.0
+
+def test_backoff_grows_exponentially_up_to_max():
+    policy = RetryPolicy(base_delay=1.0, multiplier=2.0, max_delay=5.0, jitter=0.0)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+def test_jitter_only_shortens_delay():
+    policy = RetryPolicy(base_delay=8.0, jitter=0.5)
+    delays = [policy.backoff(1) for _ in range(200)]
+    assert all(4.0 <= delay <= 8.0 for delay in delays)
+
+def test_retryable_statuses_and_errors():
+    policy = RetryPolicy()
+    assert all(policy.should_retry(status) for status in (429, 500, 502, 503, 504))
+    assert not any(policy.should_retry(status) for status in (200, 400, 401, 404, 413))
+    assert policy.should_retry_error(ConnectionError())
+    assert policy.should_retry_error(ReadTimeout())
+    assert not policy.should_retry_error(InvalidURL())
+    assert not policy.should_retry_error(MissingSchema())
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is False
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    assert breaker.record_failure() is True
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 1
+    assert not breaker.allow()
+    assert breaker.remaining() == 30.0
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.record_failure() is False
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    clock.now += 29.9
+    assert not breaker.allow()
+
+    clock.now += 0.1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    assert breaker.record_failure() is True
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+    assert breaker.remaining() == 30.0
+    assert not breaker.allow()
+
+def test_release_frees_half_open_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+@pytest.mark.parametrize('error', [OSError('body read failed'), InvalidURL('bad url')])
+def test_upload_error_before_response_releases_probe(clock, error):
+    import io
+    from services.log_sender import LogSender
+
+    sender = LogSender(None, retry_policy=RetryPolicy(max_attempts=1), failure_threshold=1, reset_timeout=30.0)
+    url = 'http://127.0.0.1:9/api'
+    breaker = sender.get_breaker(url)
+    breaker.record_failure()
+    clock.now += 30
+
+    def post_file(*args):
+        raise error
+
+    sender._post_file = post_file
+    try:
+        sender._upload(io.BytesIO(b'data'), 'batch.txt', 'test', url)
+    except OSError:
+        pass
+    # Следующая пробная попытка не заблокирована навсегда
+    assert breaker.allow()
+    sender.close()
@@ -0,0 +1,70 @@
+import threading
+import time
+import pytest
+from services.scheduler import PipelineScheduler
+
+@pytest.fixture
+def scheduler():
+    scheduler = PipelineScheduler()
+    yield scheduler
+    scheduler.cancel()
+    scheduler.wait_idle(5)
+
+def test_max_runs_and_on_finish(scheduler):
+    runs = []
+    finished = threading.Event()
+    scheduler.add('job', runs.append, interval=0, max_runs=3, on_finish=lambda p: finished.set())
+    assert finished.wait(5)
+    assert runs == [0, 1, 2]
+    assert scheduler.wait_idle(5)
+    assert not scheduler.is_running('job')
+
+def test_trigger_wakes_pipeline_without_interval(scheduler):
+    ran = threading.Semaphore(0)
+    scheduler.add('job', lambda run: ran.release(), first_delay=None)
+    assert not ran.acquire(timeout=0.1)
+    scheduler.trigger('job')
+    assert ran.acquire(timeout=5)
+    assert scheduler.get('job').seconds_until_next() is None
+
+def test_cancel_interrupts_long_interval(scheduler):
+    scheduler.add('job', lambda run: None, interval=3600)
+    started = time.monotonic()
+    scheduler.cancel('job')
+    assert scheduler.wait_idle(5)
+    assert time.monotonic() - started < 1
+
+def test_return_value_controls_schedule(scheduler):
+    delays = []
+    scheduler.add('job', lambda run: 0 if run < 2 else False, interval=3600,
+                  on_wait=lambda run, delay: delays.append(delay))
+    assert scheduler.wait_idle(5)
+    assert scheduler.names() == []
+    # Запуски с возвратом 0 идут подряд без ожидания interval
+    assert delays == []
+
+def test_interval_callable_and_on_wait(scheduler):
+    waits = []
+    scheduler.add('job', lambda run: None, interval=lambda: 3600, max_runs=2,
+                  on_wait=lambda run, delay: waits.append((run, delay)))
+    deadline = time.monotonic() + 5
+    while not waits and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert waits == [(1, 3600)]
+    assert 3590 < scheduler.get('job').seconds_until_next() <= 3600
+
+def test_duplicate_name_is_rejected(scheduler):
+    scheduler.add('job', lambda run: None, interval=3600)
+    with pytest.raises(ValueError):
+        scheduler.add('job', lambda run: None)
+
+def test_error_ends_pipeline_and_is_logged():
+    messages = []
+    scheduler = PipelineScheduler(messages.append)
+
+    def fail(run):
+        raise RuntimeError('boom')
+
+    scheduler.add('job', fail, interval=0)
+    assert scheduler.wait_idle(5)
+    assert messages == ['❌ Ошибка конвейера job: boom']
@@ -0,0 +1,69 @@
+import pytest
+from services.log_converter import LogConverter, split_ranges, iter_range_lines
+from tests.test_log_converter import SAMPLE
+
+def write_lines(path, count, trailing_newline=True):
+    # Строки разной длины, чтобы границы шардов попадали в середину строк
+    lines = [b'{"n": %d, "pad": "%s"}\n' % (i, b'x' * (i % 97)) for i in range(count)]
+    if not trailing_newline:
+        lines[-1] = lines[-1].rstrip(b'\n')
+    path.write_bytes(b''.join(lines))
+    return lines
+
+def read_shards(path, ranges):
+    with open(path, 'rb') as f:
+        return [line for start, end in ranges for line in iter_range_lines(f, start, end)]
+
+@pytest.mark.parametrize('shards', [1, 2, 3, 8, 17])
+def test_ranges_cover_file_on_line_boundaries(tmp_path, shards):
+    path = tmp_path / 'eve.json'
+    write_lines(path, 3000)
+    data = path.read_bytes()
+    ranges = split_ranges(str(path), shards)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert data[start - 1:start] == b'\n'
+    assert all(end > start for start, end in ranges)
+
+@pytest.mark.parametrize('trailing_newline', [True, False])
+def test_every_line_read_exactly_once(tmp_path, trailing_newline):
+    path = tmp_path / 'eve.json'
+    lines = write_lines(path, 3000, trailing_newline)
+    assert read_shards(path, split_ranges(str(path), 8)) == lines
+
+def test_small_file_is_one_shard(tmp_path):
+    path = tmp_path / 'eve.json'
+    lines = write_lines(path, 10)
+    ranges = split_ranges(str(path), 8)
+    assert ranges == [(0, path.stat().st_size)]
+    assert read_shards(path, ranges) == lines
+
+def test_empty_file_has_no_shards(tmp_path):
+    path = tmp_path / 'eve.json'
+    path.write_bytes(b'')
+    assert split_ranges(str(path), 4) == []
+
+def test_range_starting_on_line_start_excludes_previous_line(tmp_path):
+    path = tmp_path / 'eve.json'
+    path.write_bytes(b'aaa\nbbb\nccc\n')
+    with open(path, 'rb') as f:
+        assert list(iter_range_lines(f, 4, 8)) == [b'bbb\n']
+        assert list(iter_range_lines(f, 4, 9)) == [b'bbb\n', b'ccc\n']
+        assert list(iter_range_lines(f, 8, 8)) == []
+
+def test_parallel_output_matches_serial(tmp_path):
+    with open(SAMPLE, 'rb') as f:
+        sample = f.read()
+    big = tmp_path / 'eve.json'
+    big.write_bytes(sample * 50)
+    serial, parallel = str(tmp_path / 'serial.txt'), str(tmp_path / 'parallel.txt')
+
+    converter = LogConverter()
+    converter.write_records(converter.iter_formatted_records(str(big)), serial)
+    count = converter.convert_parallel(str(big), parallel, workers=2)
+    with open(serial, 'rb') as s, open(parallel, 'rb') as p:
+        assert p.read() == s.read()
+    assert count == 20 * 50
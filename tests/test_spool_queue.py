@@ -0,0 +1,135 @@
+import json
+import os
+from services.log_batch import LogBatch
+from services.spool_queue import SpoolQueue, _RECORD_HEADER
+
+def make_batch(data, name='batch.txt', source='suricata', count=1):
+    batch = LogBatch(name, source)
+    batch.write(data, records=count)
+    return batch
+
+def open_queue(directory, **kwargs):
+    # Без фонового fsync по времени: моменты fsync задает тест
+    kwargs.setdefault('fsync_interval', 3600)
+    kwargs.setdefault('fsync_bytes', 1 << 30)
+    return SpoolQueue(str(directory), **kwargs)
+
+def read_all(batch):
+    return batch.open().read()
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith('segment-'))
+
+def test_roundtrip_keeps_payload_and_metadata(tmp_path):
+    spool = open_queue(tmp_path)
+    spool.put(make_batch(b'first\n', 'a.txt', 'suricata', 3))
+    spool.put(make_batch(b'second\n', 'b.json', 'system', 1))
+
+    first = spool.get_batch()
+    assert (first.filename, first.source, first.count) == ('a.txt', 'suricata', 3)
+    assert read_all(first) == b'first\n'
+    second = spool.get_batch()
+    assert (second.filename, second.source) == ('b.json', 'system')
+    assert read_all(second) == b'second\n'
+    assert spool.get_batch() is None
+    spool.close()
+
+def test_record_framing_is_length_and_crc(tmp_path):
+    import zlib
+    spool = open_queue(tmp_path)
+    spool.put(make_batch(b'payload'))
+    spool.close()
+
+    data = (tmp_path / segment_files(tmp_path)[0]).read_bytes()
+    length, crc = _RECORD_HEADER.unpack_from(data)
+    payload = data[_RECORD_HEADER.size:]
+    assert len(payload) == length
+    assert zlib.crc32(payload) == crc
+    meta, body = payload.split(b'\n', 1)
+    assert json.loads(meta)['filename'] == 'batch.txt'
+    assert body == b'payload'
+
+def test_on_durable_runs_only_after_fsync(tmp_path):
+    spool = open_queue(tmp_path)
+    durable = []
+    spool.put(make_batch(b'x'), on_durable=lambda: durable.append(1))
+    assert durable == []
+    spool.sync()
+    assert durable == [1]
+    spool.close()
+
+def test_acked_batches_are_not_redelivered_after_restart(tmp_path):
+    spool = open_queue(tmp_path)
+    for data in (b'one', b'two', b'three'):
+        spool.put(make_batch(data))
+    spool.get_batch().commit()
+    spool.close()
+
+    reopened = open_queue(tmp_path)
+    assert read_all(reopened.get_batch()) == b'two'
+    assert read_all(reopened.get_batch()) == b'three'
+    assert reopened.get_batch() is None
+    assert reopened.counters['acked'] == 0
+    reopened.close()
+
+def test_rollback_rewinds_to_last_ack(tmp_path):
+    spool = open_queue(tmp_path)
+    for data in (b'one', b'two', b'three'):
+        spool.put(make_batch(data))
+    spool.get_batch().commit()
+    second = spool.get_batch()
+    spool.get_batch()
+    second.rollback()
+
+    assert spool.rewinds == 1
+    assert read_all(spool.get_batch()) == b'two'
+    spool.close()
+
+def test_fully_acked_segments_are_removed(tmp_path):
+    spool = open_queue(tmp_path, segment_size=16)
+    for data in (b'a' * 32, b'b' * 32, b'c' * 32):
+        spool.put(make_batch(data))
+    assert len(segment_files(tmp_path)) == 3
+
+    first = segment_files(tmp_path)[0]
+    spool.get_batch().commit()
+    # Подтверждение на конце первого сегмента - сегмент еще нужен позиции ack
+    assert first in segment_files(tmp_path)
+    spool.get_batch().commit()
+    assert first not in segment_files(tmp_path)
+    assert len(segment_files(tmp_path)) == 2
+    spool.close()
+
+def test_torn_tail_is_truncated_on_open(tmp_path):
+    spool = open_queue(tmp_path)
+    spool.put(make_batch(b'complete'))
+    spool.close()
+    segment = tmp_path / segment_files(tmp_path)[0]
+    valid_size = segment.stat().st_size
+    # Сбой посреди записи: заголовок и часть данных
+    with open(segment, 'ab') as f:
+        f.write(_RECORD_HEADER.pack(100, 0) + b'{"filename": "torn')
+
+    reopened = open_queue(tmp_path)
+    assert segment.stat().st_size == valid_size
+    reopened.put(make_batch(b'after restart'))
+    assert read_all(reopened.get_batch()) == b'complete'
+    assert read_all(reopened.get_batch()) == b'after restart'
+    assert reopened.get_batch() is None
+    reopened.close()
+
+def test_crc_mismatch_skips_rest_of_segment(tmp_path):
+    spool = open_queue(tmp_path, segment_size=16)
+    spool.put(make_batch(b'good' * 8))
+    spool.put(make_batch(b'damaged' * 8))
+    spool.put(make_batch(b'next segment' * 4))
+    spool.sync()
+    damaged = tmp_path / segment_files(tmp_path)[1]
+    data = bytearray(damaged.read_bytes())
+    data[-1] ^= 0xFF
+    damaged.write_bytes(bytes(data))
+
+    assert read_all(spool.get_batch()) == b'good' * 8
+    assert read_all(spool.get_batch()) == b'next segment' * 4
+    assert spool.counters['corrupted'] == 1
+    spool.close()
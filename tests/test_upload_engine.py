@@ -0,0 +1,82 @@
+import threading
+import pytest
+from services.log_batch import LogBatch
+from services.upload_engine import AsyncUploadEngine
+
+class Sender:
+    """Отправитель, ответ которого на каждую пачку задает тест"""
+
+    def __init__(self):
+        self.pool_size = 1
+        self.results = {}
+        self.released = {}
+
+    def send_batch(self, batch, url):
+        self.released[batch.filename].wait(5)
+        return self.results.get(batch.filename, True)
+
+    def finish(self, name, success=True):
+        self.results[name] = success
+        self.released[name].set()
+
+@pytest.fixture
+def sender():
+    return Sender()
+
+@pytest.fixture
+def engine(sender):
+    engine = AsyncUploadEngine(sender, max_in_flight=2)
+    yield engine
+    for event in sender.released.values():
+        event.set()
+    engine.close(5)
+
+def submit(engine, sender, name, events):
+    sender.released[name] = threading.Event()
+    batch = LogBatch(name, 'test', on_commit=lambda: events.append(('commit', name)),
+                     on_rollback=lambda: events.append(('rollback', name)))
+    return engine.submit(batch, 'http://server/upload')
+
+def test_batches_settle_in_submission_order(engine, sender):
+    events = []
+    first = submit(engine, sender, 'a', events)
+    second = submit(engine, sender, 'b', events)
+    sender.finish('b')
+    second.result(5)
+    engine.acquire(0)
+    # Вторая пачка отправлена, но ждет подтверждения первой
+    assert events == []
+
+    sender.finish('a')
+    first.result(5)
+    assert engine.drain(5)
+    assert events == [('commit', 'a'), ('commit', 'b')]
+    assert engine.stats()['succeeded'] == 2
+
+def test_failure_discards_batches_read_before_rollback(engine, sender):
+    events = []
+    submit(engine, sender, 'a', events)
+    submit(engine, sender, 'b', events)
+    sender.finish('a', success=False)
+    sender.finish('b')
+    assert engine.drain(5)
+    # Пачка b прочитана до отката источника и будет прочитана заново
+    assert events == [('rollback', 'a')]
+    stats = engine.stats()
+    assert (stats['failed'], stats['discarded'], stats['succeeded']) == (1, 1, 0)
+
+    submit(engine, sender, 'c', events)
+    sender.finish('c')
+    assert engine.drain(5)
+    assert events[-1] == ('commit', 'c')
+
+def test_acquire_applies_backpressure(engine, sender):
+    events = []
+    assert engine.acquire(0)
+    submit(engine, sender, 'a', events)
+    submit(engine, sender, 'b', events)
+    assert not engine.acquire(0.05)
+    assert engine.in_flight == 2
+
+    sender.finish('a')
+    assert engine.acquire(5)